@@ -1,75 +1,129 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import urllib.request
-import io
-import random
+
+from map_frame import SOURCE_COLUMNS, build_map_frame, classify_status
+from regions import REGION_FILES, load_regions
+import map_layer
+import region_summary
+import results_index
+import search_index
 
 st.set_page_config(page_title="KOSMOS Schools Map", page_icon="🗺️")
 
-# UK postcode to lat/lon
-def geocode_uk(postcode):
-    if pd.isna(postcode) or not postcode:
-        return None, None
+# Load region(s) - local data/ first, GitHub otherwise, in parallel for All Regions
+@st.cache_data
+def load_region(region):
+    if region == 'All Regions':
+        return load_regions(list(REGION_FILES), columns=SOURCE_COLUMNS)
+    return load_regions([region], columns=SOURCE_COLUMNS)
+
+# Map frame - geocoding is deterministic, so it can be cached per region
+@st.cache_data
+def region_map_frame(region, rows, _df):
+    # The enriched CSVs have their own status column (Open, Found, ...) - ours replaces it
+    return build_map_frame(_df.assign(status=classify_status(_df)))
+
+# Region summary - only regions whose CSV changed are re-read
+@st.cache_data(ttl=60)
+def summary_table():
+    summary, _ = region_summary.update_summary()
+    return summary
+
+# Map points (lat/lon/status/id) - built once per region frame
+@st.cache_data
+def map_points(region, rows, _map_df):
+    return map_layer.map_points(_map_df)
+
+# List filter / sort index - built once per region frame, read-only after that
+@st.cache_resource
+def list_index(region, rows, _map_df):
+    return results_index.ResultsIndex(_map_df)
+
+# Search index (python search_index.py build) - one read-only connection for all sessions
+@st.cache_resource
+def search_connection():
+    if not os.path.exists(search_index.INDEX_PATH):
+        return None
+    return search_index.open_index()
+
+def show_school(school):
+    """Every field we hold for one school (a map_frame row)"""
+    # Basic info
+    col1, col2 = st.columns(2)
+    col1.write(f"**Type:** {school['type']}")
+    col2.write(f"**Town:** {school['town']}")
     
-    pc = str(postcode).strip().upper().replace(' ', '')
+    # Address
+    st.write("---")
+    st.write("**📍 Address:**")
+    parts = []
+    if school.get('street'):
+        parts.append(str(school.get('street', '')))
+    if school.get('locality'):
+        parts.append(str(school.get('locality', '')))
+    if school.get('town'):
+        parts.append(str(school.get('town', '')))
+    if school.get('county'):
+        parts.append(str(school.get('county', '')))
+    if school.get('postcode'):
+        parts.append(str(school.get('postcode', '')))
     
-    centers = {
-        'LE': (52.63, -1.13), 'NG': (52.95, -1.15), 'DE': (52.92, -1.55),
-        'CV': (52.48, -1.50), 'NN': (52.24, -0.90), 'PE': (52.57, -0.24),
-        'MK': (52.04, -0.76), 'WS': (52.58, -1.98), 'DY': (52.51, -2.08),
-        'B':  (52.48, -1.89), 'WR': (52.19, -2.22), 'OX': (51.75, -1.25),
-        'CB': (52.20, 0.12), 'ST': (52.90, -2.25), 'TF': (52.74, -2.50),
-    }
+    address = ', '.join([p for p in parts if p and p != 'nan'])
+    if address:
+        st.write(f"  {address}")
+    else:
+        st.write("  ❌ MISSING")
     
-    outward = pc[:2] if len(pc) >= 2 else pc[:1]
+    # Contact
+    st.write("---")
+    st.write("**📧 Contact:**")
+    email = school['email'] if school['email'] != 'MISSING' else '❌ MISSING'
+    st.write(f"  Email: {email}")
     
-    if outward in centers:
-        lat, lon = centers[outward]
-        lat += random.uniform(-0.04, 0.04)
-        lon += random.uniform(-0.04, 0.04)
-        return lat, lon
+    website = school['website'] if school['website'] != 'MISSING' else '❌ MISSING'
+    st.write(f"  Website: {website}")
     
-    return 52.5 + random.uniform(-0.5, 0.5), -1.5 + random.uniform(-0.5, 0.5)
-
-# Load region
-@st.cache_data
-def load_region(region):
-    urls = {
-        'Leicester': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/leicester_schools_enriched.csv',
-        'Nottingham': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/nottingham_schools_enriched.csv',
-        'Derbyshire': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/derbyshire_schools_enriched.csv',
-        'Warwickshire': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/warwickshire_schools_enriched.csv',
-        'Staffordshire': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/staffordshire_schools_enriched.csv',
-        'Birmingham': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/birmingham_schools_enriched.csv',
-        'Dudley': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/dudley_schools_enriched.csv',
-        'Walsall': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/walsall_schools_enriched.csv',
-        'Wolverhampton': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/wolverhampton_schools_enriched.csv',
-        'All Regions': 'ALL'
-    }
+    # Headteacher
+    st.write("---")
+    st.write("**👤 Headteacher:**")
+    head = f"{school['head_title']} {school['head_first_name']} {school['head_last_name']}".strip()
+    if head:
+        st.write(f"  Name: {head}")
+    else:
+        st.write("  Name: ❌ MISSING")
     
-    if region == 'All Regions':
-        dfs = []
-        for r, url in urls.items():
-            if r == 'All Regions': continue
-            try:
-                df_r = pd.read_csv(io.StringIO(urllib.request.urlopen(url).read().decode('utf-8')))
-                df_r['region'] = r
-                dfs.append(df_r)
-            except:
-                pass
-        if dfs:
-            return pd.concat(dfs, ignore_index=True)
-        return None
+    if school['head_job_title']:
+        st.write(f"  Title: {school['head_job_title']}")
     
-    if region not in urls:
-        return None
+    # Pupil Premium
+    st.write("---")
+    st.write("**💰 Pupil Premium:**")
+    pp = school['has_pupil_premium']
+    st.write(f"  Status: {'✅ Yes' if pp else '❌ No/Unknown'}")
     
-    try:
-        df = pd.read_csv(io.StringIO(urllib.request.urlopen(urls[region]).read().decode('utf-8')))
-        df['region'] = region
-        return df
-    except:
-        return None
+    # Financial
+    fin = school['has_financial_reports']
+    st.write(f"  Financial Reports: {'✅ Yes' if fin else '❌ No/Unknown'}")
+    
+    # All emails
+    if school['all_emails']:
+        st.write("---")
+        st.write("**📬 All Emails:**")
+        st.write(f"  {school['all_emails']}")
+    
+    # NEW: Ofsted, SEND, Governors
+    st.write("---")
+    st.write("**🏫 Ofsted & SEND:**")
+    ofsted = school.get('ofsted_rating', '')
+    st.write(f"  Rating: {ofsted if ofsted else '❌ Not found'}")
+    send = school.get('has_send', False)
+    st.write(f"  SEND Support: {'✅ Yes' if send else '❌ No/Unknown'}")
+    
+    if school.get('governors'):
+        st.write("---")
+        st.write("**👥 Governors:**")
+        st.write(f"  {school['governors']}")
 
 st.title("🗺️ KOSMOS Schools Map")
 
@@ -78,31 +132,23 @@ regions = ['All Regions', 'Leicester', 'Nottingham', 'Derbyshire', 'Warwickshire
            'Staffordshire', 'Birmingham', 'Dudley', 'Walsall', 'Wolverhampton']
 selected_region = st.selectbox("Select Region", regions)
 
-df = load_region(selected_region)
+df, load_errors = load_region(selected_region)
+
+for failed_region, error in load_errors.items():
+    st.warning(f"⚠️ Could not load {failed_region}: {error}")
+
+summary = summary_table()
 
 if df is not None:
-    # Determine status - only green if ALL three: email + headteacher + pupil premium confirmed
-    def get_status(row):
-        has_email = pd.notna(row.get('email', '')) and str(row.get('email', '')).strip() != ''
-        has_head = pd.notna(row.get('head_first_name', '')) or pd.notna(row.get('head_last_name', ''))
-        has_pp = row.get('has_pupil_premium', False) == True or row.get('has_pupil_premium', '') == True
-        
-        if has_email and has_head and has_pp:
-            return 'green'
-        elif has_email:
-            return 'orange'
-        else:
-            return 'red'
-    
-    df['status'] = df.apply(get_status, axis=1)
-    
-    # Stats
-    total = len(df)
-    green = len(df[df['status'] == 'green'])
-    orange = len(df[df['status'] == 'orange'])
-    red = len(df[df['status'] == 'red'])
-    send_count = df['has_send'].sum() if 'has_send' in df.columns else 0
-    ofsted_count = df['ofsted_rating'].notna().sum() if 'ofsted_rating' in df.columns else 0
+    # Stats - from the summary table, not a scan of the frame
+    in_view = list(REGION_FILES) if selected_region == 'All Regions' else [selected_region]
+    stats = region_summary.totals(summary, in_view)
+    total = stats['total']
+    green = stats['green']
+    orange = stats['orange']
+    red = stats['red']
+    send_count = stats['send']
+    ofsted_count = stats['ofsted']
     
     st.subheader(f"📊 {selected_region}")
     
@@ -114,142 +160,100 @@ if df is not None:
     col5.metric("⭐ Ofsted", ofsted_count, delta=f"{ofsted_count/total*100:.0f}%" if total else "0%")
     col6.metric("♿ SEND", send_count, delta=f"{send_count/total*100:.0f}%" if total else "0%")
     
-    # Map
-    map_data = []
-    for _, row in df.iterrows():
-        lat, lon = geocode_uk(row.get('postcode', ''))
-        if lat:
-            map_data.append({
-                'lat': lat,
-                'lon': lon,
-                'name': str(row.get('name', '')),
-                'town': str(row.get('town', '')),
-                'status': row.get('status', 'red'),
-                # All fields
-                'email': str(row.get('email', '')) if pd.notna(row.get('email', '')) else 'MISSING',
-                'phone': str(row.get('phone', '')) if pd.notna(row.get('phone', '')) else 'MISSING',
-                'website': str(row.get('website', '')) if pd.notna(row.get('website', '')) else 'MISSING',
-                'head_title': str(row.get('head_title', '')) if pd.notna(row.get('head_title', '')) else '',
-                'head_first_name': str(row.get('head_first_name', '')) if pd.notna(row.get('head_first_name', '')) else '',
-                'head_last_name': str(row.get('head_last_name', '')) if pd.notna(row.get('head_last_name', '')) else '',
-                'head_job_title': str(row.get('head_job_title', '')) if pd.notna(row.get('head_job_title', '')) else '',
-                'type': str(row.get('type', '')) if pd.notna(row.get('type', '')) else 'MISSING',
-                'postcode': str(row.get('postcode', '')) if pd.notna(row.get('postcode', '')) else 'MISSING',
-                # Address fields
-                'street': str(row.get('street', '')) if pd.notna(row.get('street', '')) else '',
-                'locality': str(row.get('locality', '')) if pd.notna(row.get('locality', '')) else '',
-                'county': str(row.get('county', '')) if pd.notna(row.get('county', '')) else '',
-                'has_pupil_premium': row.get('has_pupil_premium', False),
-                'has_financial_reports': row.get('has_financial_reports', False),
-                'all_emails': str(row.get('all_emails', '')) if pd.notna(row.get('all_emails', '')) else '',
-                'staff_contacts': str(row.get('staff_contacts', '')) if pd.notna(row.get('staff_contacts', '')) else '',
-                # New enrichment fields
-                'ofsted_rating': str(row.get('ofsted_rating', '')) if pd.notna(row.get('ofsted_rating', '')) else '',
-                'has_send': row.get('has_send', False),
-                'governors': str(row.get('governors', '')) if pd.notna(row.get('governors', '')) else '',
-            })
+    # Map - status (only green if ALL three: email + headteacher + pupil premium) is set here
+    map_df = region_map_frame(selected_region, len(df), df)
     
-    if map_data:
-        map_df = pd.DataFrame(map_data)
-        st.map(map_df, zoom=8)
+    if not map_df.empty:
+        # Clustered server-side - the browser gets lat/lon/id for what's in view
+        points = map_points(selected_region, len(map_df), map_df)
+        view_key = f"map_view:{selected_region}"
+        if view_key not in st.session_state:
+            st.session_state[view_key] = map_layer.fit_view(points)
+        zoom, lat, lon = st.session_state[view_key]
+        
+        zoom_out, reset, _ = st.columns([1, 1, 4])
+        if zoom_out.button("➖ Zoom out", disabled=zoom <= map_layer.MIN_ZOOM):
+            st.session_state[view_key] = (zoom - 2, lat, lon)
+            st.rerun()
+        if reset.button("⟲ Whole region"):
+            st.session_state[view_key] = map_layer.fit_view(points)
+            st.rerun()
+        
+        frame = map_layer.layer_frame(points, zoom, lat, lon)
+        event = st.pydeck_chart(map_layer.deck(frame, zoom, lat, lon), on_select="rerun",
+                                key=f"map:{selected_region}:{zoom}:{lat:.4f}:{lon:.4f}")
+        
+        # Clicked a cluster: zoom in on it. Clicked a school: fetch its details now
+        clicked = map_layer.picked(event)
+        if clicked and clicked['count'] > 1:
+            st.session_state[view_key] = (min(zoom + 2, map_layer.MAX_ZOOM), clicked['lat'], clicked['lon'])
+            st.rerun()
+        elif clicked:
+            school = map_df.iloc[int(clicked['id'])]
+            with st.expander(f"📍 {school['name']}", expanded=True):
+                show_school(school)
         
         st.caption("🟢 = Email + Headteacher + Pupil Premium | 🟠 = Email only | 🔴 = No email | ⭐ = Ofsted rated | ♿ = SEND support")
         
-        # Search
+        # Search - names, towns, postcodes, heads, governors and emails, typo tolerant
         search = st.text_input("Search schools", "")
-        if search:
-            map_df = map_df[map_df['name'].str.contains(search, case=False, na=False)]
+        conn = search_connection()
+        rows = None
+        if search and conn is not None:
+            hits = search_index.search(conn, search, limit=len(map_df), kinds=['school'], regions=in_view)
+            rows = search_index.filter_frame(map_df, hits).index
+            
+            # Everything else we hold - schools elsewhere, universities, companies, charities, politicians
+            others = [h for h in search_index.search(conn, search, limit=20) if h['region'] not in in_view]
+            if others:
+                with st.expander(f"🔎 {len(others)} more matches outside {selected_region}"):
+                    for hit in others:
+                        place = ", ".join(p for p in (hit['town'], hit['postcode'], hit['region']) if p)
+                        st.write(f"**{hit['name']}** ({hit['kind']}{', ' + hit['detail'] if hit['detail'] else ''}) - {place}")
+        elif search:
+            rows = map_df.index[map_df['name'].str.contains(search, case=False, na=False, regex=False)]
+        
+        # Filters + sort - answered from the list index, not by masking the frame
+        index = list_index(selected_region, len(map_df), map_df)
+        col1, col2, col3 = st.columns(3)
+        sort = col1.selectbox("Sort by", results_index.SORTS)
+        types = col2.multiselect("Type", index.options('type'))
+        phases = col3.multiselect("Phase", index.options('phase'))
+        col1, col2 = st.columns(2)
+        send_only = col1.checkbox("♿ SEND support only")
+        pp_only = col2.checkbox("Pupil Premium only")
+        filters = {
+            'type': types,
+            'phase': phases,
+            'has_send': True if send_only else None,
+            'has_pupil_premium': True if pp_only else None,
+        }
+        selected = index.select(filters, rows)
         
-        st.metric("Showing", len(map_df))
+        pages = results_index.page_count(len(selected))
+        col1, col2 = st.columns([3, 1])
+        col1.metric("Showing", len(selected))
+        # A new query starts back on page 1
+        page = col2.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                                 key=f"page:{selected_region}:{search}:{sort}:{filters}")
         
-        # Show ALL data for each school
-        for _, school in map_df.head(30).iterrows():
+        # Only this page is rendered, and a school's details only once it's opened
+        for i in index.page(selected, sort, page):
+            school = map_df.iloc[i]
             emoji = "🟢" if school['status'] == 'green' else "🟠" if school['status'] == 'orange' else "🔴"
             
-            with st.expander(f"{emoji} {school['name']}"):
-                # Basic info
-                col1, col2 = st.columns(2)
-                col1.write(f"**Type:** {school['type']}")
-                col2.write(f"**Town:** {school['town']}")
-                
-                # Address
-                st.write("---")
-                st.write("**📍 Address:**")
-                parts = []
-                if school.get('street'):
-                    parts.append(str(school.get('street', '')))
-                if school.get('locality'):
-                    parts.append(str(school.get('locality', '')))
-                if school.get('town'):
-                    parts.append(str(school.get('town', '')))
-                if school.get('county'):
-                    parts.append(str(school.get('county', '')))
-                if school.get('postcode'):
-                    parts.append(str(school.get('postcode', '')))
-                
-                address = ', '.join([p for p in parts if p and p != 'nan'])
-                if address:
-                    st.write(f"  {address}")
-                else:
-                    st.write("  ❌ MISSING")
-                
-                # Contact
-                st.write("---")
-                st.write("**📧 Contact:**")
-                email = school['email'] if school['email'] != 'MISSING' else '❌ MISSING'
-                st.write(f"  Email: {email}")
-                
-                website = school['website'] if school['website'] != 'MISSING' else '❌ MISSING'
-                st.write(f"  Website: {website}")
-                
-                # Headteacher
-                st.write("---")
-                st.write("**👤 Headteacher:**")
-                head = f"{school['head_title']} {school['head_first_name']} {school['head_last_name']}".strip()
-                if head:
-                    st.write(f"  Name: {head}")
-                else:
-                    st.write("  Name: ❌ MISSING")
-                
-                if school['head_job_title']:
-                    st.write(f"  Title: {school['head_job_title']}")
-                
-                # Pupil Premium
-                st.write("---")
-                st.write("**💰 Pupil Premium:**")
-                pp = school['has_pupil_premium']
-                st.write(f"  Status: {'✅ Yes' if pp else '❌ No/Unknown'}")
-                
-                # Financial
-                fin = school['has_financial_reports']
-                st.write(f"  Financial Reports: {'✅ Yes' if fin else '❌ No/Unknown'}")
-                
-                # All emails
-                if school['all_emails']:
-                    st.write("---")
-                    st.write("**📬 All Emails:**")
-                    st.write(f"  {school['all_emails']}")
-                
-                # NEW: Ofsted, SEND, Governors
-                st.write("---")
-                st.write("**🏫 Ofsted & SEND:**")
-                ofsted = school.get('ofsted_rating', '')
-                st.write(f"  Rating: {ofsted if ofsted else '❌ Not found'}")
-                send = school.get('has_send', False)
-                st.write(f"  SEND Support: {'✅ Yes' if send else '❌ No/Unknown'}")
-                
-                if school.get('governors'):
-                    st.write("---")
-                    st.write("**👥 Governors:**")
-                    st.write(f"  {school['governors']}")
+            with st.expander(f"{emoji} {school['name']}", key=f"school:{selected_region}:{i}",
+                             on_change="rerun") as details:
+                if details.open:
+                    show_school(school)
 
 # Sidebar
 st.sidebar.header("📊 All Regions")
-st.sidebar.write("🗺️ **All Regions:** 2,488 schools")
-st.sidebar.write("Leicester: 381 | Nottingham: 334")
-st.sidebar.write("Derbyshire: 485 | Warwickshire: 239")
-st.sidebar.write("Staffordshire: 303 | Birmingham: 301")
-st.sidebar.write("Dudley: 78 | Walsall: 85 | Wolverhampton: 72")
+region_counts = region_summary.region_totals(summary, list(REGION_FILES))
+st.sidebar.write(f"🗺️ **All Regions:** {int(region_counts['total'].sum()):,} schools")
+rows = [f"{region}: {int(count):,}" for region, count in region_counts['total'].items()]
+for i in range(0, len(rows), 2):
+    st.sidebar.write(" | ".join(rows[i:i + 2]))
 st.sidebar.write("---")
 st.sidebar.write("**New Data Available:**")
 st.sidebar.write("• Ofsted ratings (enriched regions)")
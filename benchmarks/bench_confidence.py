@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Confidence scoring benchmark
+Per-record scoring (score_record over dicts, as the collectors did it) vs
+column-wise scoring of the whole batch (score_frame), and re-scoring files
+already on disk after a rule change (rescore_parquet / rescore_ndjson)
+
+Usage: python benchmarks/bench_confidence.py [--records 1000000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scrapers"))
+
+import confidence
+import kosmos_unified
+from confidence import RULES, RuleSet, score_frame, score_record, score_records
+from bench_kosmos_records import synthetic_raw_csv
+from kosmos_unified import SchoolsCollector
+
+# A rule change: weight the phone number, and trust this source less
+CHANGED = RuleSet(
+    entity_type="education",
+    fields=("name", "address.postcode", "contact.phone", "contact.website"),
+    weights={"contact.phone": 2},
+    trust={"UK School Data (GitHub)": 90},
+    source_field="_kosmos.source_name",
+)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--file-records", type=int, default=200000, help="records in the re-scored files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kosmos_unified.OUTPUT_ROOT = tmp
+        csv_file = os.path.join(tmp, "uk_schools_raw.csv")
+        synthetic_raw_csv(csv_file, args.file_records)
+        collector = SchoolsCollector(csv_file)
+        records = [r.to_dict() for r in collector.iter_records()]
+        records = (records * (args.records // len(records) + 1))[:args.records]
+
+        frame = pd.json_normalize(records[:args.file_records])
+        frame = pd.concat([frame] * (len(records) // len(frame) + 1), ignore_index=True).iloc[:len(records)]
+        for rules in (RULES["education"], CHANGED):
+            one_by_one, per_record = timed(lambda: [score_record(r, rules) for r in records])
+            from_dicts, dicts = timed(lambda: score_records(records, rules))
+            batch, columnar = timed(lambda: score_frame(frame, rules))
+            assert np.array_equal(np.array(one_by_one), batch), "score_record and score_frame disagree"
+            assert np.array_equal(from_dicts, batch), "score_records and score_frame disagree"
+        print(f"✓ score_record, score_records and score_frame agree on all {len(records):,} records (two rule sets)")
+
+        print(f"\n{len(records):,} records, changed rule set")
+        print(f"  per record (score_record)    {per_record:7.2f}s")
+        print(f"  list of dicts (score_records){dicts:7.2f}s  {per_record / dicts:5.0f}x")
+        print(f"  DataFrame (score_frame)      {columnar:7.2f}s  {per_record / columnar:5.0f}x")
+
+        parquet = collector.stream("schools.parquet")
+        ndjson = collector.stream("schools.ndjson")
+        # Parquet rows hold a provenance index, not the source name
+        parquet_rules = RuleSet(**{**CHANGED.__dict__, "source_field": "source_name"})
+        count, parquet_time = timed(lambda: confidence.rescore_parquet(parquet, parquet_rules))
+        _, ndjson_time = timed(lambda: confidence.rescore_ndjson(ndjson, CHANGED))
+        scores = pd.read_parquet(parquet, columns=["confidence_score"])["confidence_score"]
+
+        print(f"\nRe-scoring {count:,} stored records after the rule change")
+        print(f"  Parquet (in place)           {parquet_time:7.2f}s")
+        print(f"  NDJSON (in place)            {ndjson_time:7.2f}s")
+        print(f"  scores now: {scores.value_counts().sort_index().to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
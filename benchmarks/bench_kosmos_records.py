@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+KOSMOS record model benchmark
+Peak memory (tracemalloc) and time for SchoolsCollector: the old dict-per-
+record model (a nested "_kosmos" dict each, all held until save) vs compact
+slotted records held in memory vs streaming to NDJSON / Parquet
+
+Usage: python benchmarks/bench_kosmos_records.py [--records 100000]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scrapers"))
+
+import kosmos_unified
+from kosmos_unified import SchoolsCollector
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Enriched region CSV column -> uk_schools_raw.csv column
+RAW_COLUMNS = {
+    'name': 'name', 'type': 'type', 'county': 'la', 'street': 'street', 'locality': 'locality',
+    'town': 'town', 'postcode': 'postcode', 'phone': 'tel', 'website': 'web',
+    'head_title': 'headtitle', 'head_first_name': 'headfirstname', 'head_last_name': 'headsecondname',
+}
+
+
+def synthetic_raw_csv(path, rows, seed=0):
+    """Resample the enriched region CSVs into the raw GitHub CSV's layout"""
+    files = sorted(f for f in os.listdir(DATA_DIR) if f.endswith("_schools_enriched.csv"))
+    base = pd.concat([pd.read_csv(os.path.join(DATA_DIR, f), dtype=str) for f in files], ignore_index=True)
+    df = base.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+    raw = df[list(RAW_COLUMNS)].rename(columns=RAW_COLUMNS).fillna('')
+    raw['county'] = df['county'].fillna('')
+    raw.to_csv(path, index=False, encoding='latin-1', errors='replace')
+
+
+# --- Old model (as it was in kosmos_unified.py) ------------------------------
+
+class OldSchoolsCollector:
+    def __init__(self, csv_file):
+        self.entity_type = "education"
+        self.ingested_at = datetime.now().isoformat()
+        self.records = []
+        self.csv_file = csv_file
+        self.source_url = "https://github.com/MagneticMule/UK-School-Data"
+        self.source_name = "UK School Data (GitHub)"
+        self.required_fields = ["name", "postcode", "phone"]
+
+    def calculate_confidence(self, record, required_fields):
+        filled_fields = sum(1 for f in required_fields if record.get(f))
+        return round((filled_fields / len(required_fields)) * 100, 0)
+
+    def create_provenance(self, record, pipeline):
+        key_content = f"{self.entity_type}|{json.dumps(record, sort_keys=True)}"
+        return {
+            "pipeline": pipeline,
+            "source_hash": hashlib.md5(key_content.encode()).hexdigest(),
+            "ingested_at": self.ingested_at
+        }
+
+    def add_universal_fields(self, record, source_url, source_name, confidence, gdpr_compliant=True):
+        return {
+            **record,
+            "_kosmos": {
+                "entity_type": self.entity_type,
+                "source_url": source_url,
+                "source_name": source_name,
+                "source_date": datetime.now().strftime("%Y-%m-%d"),
+                "ingested_at": self.ingested_at,
+                "confidence_score": confidence,
+                "provenance": self.create_provenance(record, f"{self.entity_type}_collector"),
+                "gdpr_flags": {
+                    "public_only_contact": gdpr_compliant,
+                    "minimised": False,
+                    "rectification_requested": False,
+                    "takedown_requested": False
+                },
+                "last_verified": self.ingested_at,
+                "next_review_due": None
+            }
+        }
+
+    def collect(self):
+        with open(self.csv_file, 'r', encoding='latin-1') as f:
+            for row in csv.DictReader(f):
+                record = {
+                    "name": row.get("name", ""),
+                    "type": row.get("type", ""),
+                    "local_authority": row.get("la", ""),
+                    "address": {
+                        "street": row.get("street", ""),
+                        "locality": row.get("locality", ""),
+                        "town": row.get("town", ""),
+                        "county": row.get("county", ""),
+                        "postcode": row.get("postcode", ""),
+                        "country": "UK"
+                    },
+                    "contact": {
+                        "phone": row.get("tel", ""),
+                        "website": row.get("web", ""),
+                        "email": None
+                    },
+                    "headteacher": {
+                        "name": f"{row.get('headfirstname', '')} {row.get('headsecondname', '')}".strip(),
+                        "title": row.get("headtitle", "")
+                    }
+                }
+                confidence = self.calculate_confidence(record, self.required_fields)
+                self.records.append(self.add_universal_fields(record, self.source_url, self.source_name, confidence))
+        return self.records
+
+
+def comparable(records):
+    """
+    source_hash moved from MD5-of-JSON to provenance.py, and confidence to
+    confidence.py's rules - everything else must match
+    """
+    for record in records:
+        record["_kosmos"]["provenance"].pop("source_hash")
+        record["_kosmos"].pop("confidence_score")
+    return records
+
+
+def check_same_output(csv_file, out_dir):
+    """The compact model's save() must write what the old model wrote"""
+    old = OldSchoolsCollector(csv_file)
+    old.collect()
+    new = SchoolsCollector(csv_file)
+    new.ingested_at = old.ingested_at
+    new.source_date = old.ingested_at[:10]
+    new.collect()
+    expected = comparable(old.records)
+
+    with open(new.save("schools.json")) as f:
+        assert comparable(json.load(f)) == expected, "save() output differs"
+
+    with open(new.stream("schools.ndjson")) as f:
+        assert comparable([json.loads(line) for line in f]) == expected, "NDJSON records differ"
+
+
+def measured(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kosmos_unified.OUTPUT_ROOT = tmp
+        check_file = os.path.join(tmp, "check.csv")
+        synthetic_raw_csv(check_file, 2000, seed=1)
+        check_same_output(check_file, tmp)
+        print("✓ save() and NDJSON write the same records as the old model")
+
+        csv_file = os.path.join(tmp, "uk_schools_raw.csv")
+        synthetic_raw_csv(csv_file, args.records)
+        runs = [
+            ("old: dicts in memory", lambda: OldSchoolsCollector(csv_file).collect()),
+            ("new: slotted in memory", lambda: SchoolsCollector(csv_file).collect()),
+            ("new: stream NDJSON", lambda: SchoolsCollector(csv_file).stream("schools.ndjson")),
+            ("new: stream Parquet", lambda: SchoolsCollector(csv_file).stream("schools.parquet")),
+        ]
+
+        print(f"\n{args.records:,} records")
+        print(f"{'':<24} {'peak (MB)':>10} {'time (s)':>9}  (times include tracemalloc overhead)")
+        baseline = None
+        for label, fn in runs:
+            _, peak, elapsed = measured(fn)
+            baseline = baseline or peak
+            print(f"{label:<24} {peak / 2**20:>10.1f} {elapsed:>9.2f}   {peak / baseline:>5.0%} of old")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Map frame benchmark
+Row-wise (df.apply + iterrows) vs columnar status/map-frame building
+
+Usage: python benchmarks/bench_map_frame.py [--sizes 2500 30000 300000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from geocode import CENTERS
+from map_frame import build_map_frame, classify_status, status_counts
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+# --- Old path (as it was in app.py) ---------------------------------------
+
+def geocode_uk(postcode):
+    if pd.isna(postcode) or not postcode:
+        return None, None
+    pc = str(postcode).strip().upper().replace(' ', '')
+    outward = pc[:2] if len(pc) >= 2 else pc[:1]
+    if outward in CENTERS:
+        lat, lon = CENTERS[outward]
+        return lat + random.uniform(-0.04, 0.04), lon + random.uniform(-0.04, 0.04)
+    return 52.5 + random.uniform(-0.5, 0.5), -1.5 + random.uniform(-0.5, 0.5)
+
+
+def get_status(row):
+    has_email = pd.notna(row.get('email', '')) and str(row.get('email', '')).strip() != ''
+    has_head = pd.notna(row.get('head_first_name', '')) or pd.notna(row.get('head_last_name', ''))
+    has_pp = row.get('has_pupil_premium', False) == True or row.get('has_pupil_premium', '') == True
+    if has_email and has_head and has_pp:
+        return 'green'
+    elif has_email:
+        return 'orange'
+    return 'red'
+
+
+def text(row, col, missing):
+    return str(row.get(col, '')) if pd.notna(row.get(col, '')) else missing
+
+
+def old_path(df):
+    df = df.copy()
+    df['status'] = df.apply(get_status, axis=1)
+    metrics = {
+        'total': len(df),
+        'green': len(df[df['status'] == 'green']),
+        'orange': len(df[df['status'] == 'orange']),
+        'red': len(df[df['status'] == 'red']),
+    }
+    map_data = []
+    for _, row in df.iterrows():
+        lat, lon = geocode_uk(row.get('postcode', ''))
+        if lat:
+            map_data.append({
+                'lat': lat,
+                'lon': lon,
+                'name': str(row.get('name', '')),
+                'town': str(row.get('town', '')),
+                'status': row.get('status', 'red'),
+                'email': text(row, 'email', 'MISSING'),
+                'phone': text(row, 'phone', 'MISSING'),
+                'website': text(row, 'website', 'MISSING'),
+                'head_title': text(row, 'head_title', ''),
+                'head_first_name': text(row, 'head_first_name', ''),
+                'head_last_name': text(row, 'head_last_name', ''),
+                'head_job_title': text(row, 'head_job_title', ''),
+                'type': text(row, 'type', 'MISSING'),
+                'postcode': text(row, 'postcode', 'MISSING'),
+                'street': text(row, 'street', ''),
+                'locality': text(row, 'locality', ''),
+                'county': text(row, 'county', ''),
+                'has_pupil_premium': row.get('has_pupil_premium', False),
+                'has_financial_reports': row.get('has_financial_reports', False),
+                'all_emails': text(row, 'all_emails', ''),
+                'staff_contacts': text(row, 'staff_contacts', ''),
+                'ofsted_rating': text(row, 'ofsted_rating', ''),
+                'has_send': row.get('has_send', False),
+                'governors': text(row, 'governors', ''),
+            })
+    return metrics, pd.DataFrame(map_data)
+
+
+# --- New path ---------------------------------------------------------------
+
+def new_path(df):
+    df = df.copy()
+    df['status'] = classify_status(df)
+    stats = status_counts(df)
+    metrics = {k: stats[k] for k in ('total', 'green', 'orange', 'red')}
+    return metrics, build_map_frame(df)
+
+
+def synthetic_frame(rows, seed=0):
+    """Resample the enriched region CSVs up to the requested row count"""
+    files = sorted(f for f in os.listdir(DATA_DIR) if f.endswith("_schools_enriched.csv"))
+    base = pd.concat([pd.read_csv(os.path.join(DATA_DIR, f)) for f in files], ignore_index=True)
+    return base.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+
+
+def check_equivalent(df):
+    """Both paths must agree on metrics and every non-random map column"""
+    old_metrics, old_map = old_path(df)
+    new_metrics, new_map = new_path(df)
+    assert old_metrics == new_metrics, (old_metrics, new_metrics)
+    # The old path rendered missing names/towns as the string 'nan'
+    old_map[['name', 'town']] = old_map[['name', 'town']].replace('nan', '')
+    # ...and passed unknown (NaN) flags through, which read as truthy
+    for col in ('has_pupil_premium', 'has_financial_reports', 'has_send'):
+        old_map[col] = old_map[col].eq(True)
+    cols = [c for c in old_map.columns if c not in ('lat', 'lon')]
+    pd.testing.assert_frame_equal(old_map[cols], new_map[cols], check_dtype=False)
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    fn(df)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2500, 30000, 300000])
+    args = parser.parse_args()
+
+    check_equivalent(synthetic_frame(2500))
+    print("✓ Old and new paths produce the same metrics and map frame")
+
+    print(f"\n{'rows':>10} {'old (s)':>10} {'new (s)':>10} {'speedup':>9}")
+    for rows in args.sizes:
+        df = synthetic_frame(rows)
+        old = timed(old_path, df)
+        new = timed(new_path, df)
+        print(f"{rows:>10,} {old:>10.3f} {new:>10.3f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Map layer benchmark
+st.map (every school, every rerun) vs the clustered, viewport-cropped
+pydeck layer: JSON sent to the browser, points drawn and server-side time,
+at the whole-region view and zoomed in on the busiest spot
+
+Browser render time can't be measured headless; the number of points drawn
+is the proxy for it (deck.gl's cost is linear in the points it gets).
+
+Usage: python benchmarks/bench_map_layer.py [--sizes 300 2500 30000 60000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+from streamlit.elements.map import to_deckgl_json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import map_layer
+from map_frame import build_map_frame, classify_status
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def synthetic_map_frame(rows, seed=0):
+    """Resample the enriched region CSVs up to the requested row count"""
+    files = sorted(f for f in os.listdir(DATA_DIR) if f.endswith("_schools_enriched.csv"))
+    base = pd.concat([pd.read_csv(os.path.join(DATA_DIR, f)) for f in files], ignore_index=True)
+    df = base.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+    return build_map_frame(df.assign(status=classify_status(df)))
+
+
+def old_map(map_df):
+    """What st.map(map_df, zoom=8) serialises"""
+    return len(to_deckgl_json(map_df, None, None, None, None, 8)), len(map_df)
+
+
+def new_map(points, zoom, lat, lon):
+    frame = map_layer.layer_frame(points, zoom, lat, lon)
+    return len(map_layer.deck(frame, zoom, lat, lon).to_json()), len(frame)
+
+
+def timed(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[300, 2500, 30000, 60000])
+    args = parser.parse_args()
+
+    print(f"{'schools':>9} {'view':>14} {'points':>8} {'JSON (KB)':>10} {'server (ms)':>12}")
+    for rows in args.sizes:
+        map_df = synthetic_map_frame(rows)
+        (size, drawn), elapsed = timed(old_map, map_df)
+        print(f"{len(map_df):>9,} {'st.map':>14} {drawn:>8,} {size / 1024:>10,.0f} {elapsed * 1000:>12.0f}")
+
+        start = time.perf_counter()
+        points = map_layer.map_points(map_df)
+        prep = time.perf_counter() - start
+        zoom, lat, lon = map_layer.fit_view(points)
+        # Zoomed in on the densest spot - where the old map was worst
+        busiest = map_layer.cluster(points, zoom).sort_values('count').iloc[-1]
+        views = [("whole region", zoom, lat, lon)]
+        views += [(f"zoom {z}", z, busiest['lat'], busiest['lon']) for z in (zoom + 2, zoom + 4)]
+        for label, z, la, lo in views:
+            (size, drawn), elapsed = timed(new_map, points, z, la, lo)
+            print(f"{'':>9} {label:>14} {drawn:>8,} {size / 1024:>10,.0f} {elapsed * 1000:>12.0f}")
+        print(f"{'':>9} {'(points prep)':>14} {'':>8} {'':>10} {prep * 1000:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Parallel CSV ingestion benchmark
+SchoolsCollector and kosmos_schools.collect_schools reading the raw schools
+CSV serially (csv.DictReader, one core) vs split into byte ranges on a
+process pool (csv_ranges.py) - checking first that the parallel output is
+byte-identical, including on a file full of quoted commas, newlines and
+quotes cut into many small ranges. Also splits the time into worker-side
+and parent-side (splitting, unpickling, merging) work, which bounds the
+speedup on machines with more cores than this one
+
+Usage: python benchmarks/bench_parallel_csv.py [--records 300000] [--processes 2 4 8]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import pickle
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scrapers"))
+
+import csv_ranges
+import kosmos_schools
+import kosmos_unified
+from bench_kosmos_records import synthetic_raw_csv
+from kosmos_unified import KOSMOSRecord, SchoolRow, SchoolsCollector
+
+
+def awkward_csv(path, rows, seed=0):
+    """Quoted commas, embedded newlines (\\n and \\r\\n), doubled quotes, blank lines"""
+    rng = random.Random(seed)
+    pieces = ["plain", "with, comma", 'say "hi"', "two\nlines", "crlf\r\nline", '"', "", "é ü"]
+    with open(path, 'w', encoding='latin-1', newline='') as f:
+        writer = csv.writer(f, lineterminator=rng.choice(["\n", "\r\n"]))
+        writer.writerow(["name", "town", "postcode", "tel", "headfirstname", "headsecondname"])
+        for i in range(rows):
+            writer.writerow([f"{rng.choice(pieces)} {i}"] + [rng.choice(pieces) for _ in range(5)])
+            if i % 997 == 0:
+                f.write("\n")
+
+
+def check_ranges(path):
+    """Rows from many tiny ranges == rows from one serial DictReader"""
+    with open(path, 'r', encoding='latin-1') as f:
+        expected = list(csv.DictReader(f))
+    for parts in (2, 7, 64, 500):
+        fieldnames, ranges = csv_ranges.record_ranges(path, parts, 'latin-1', min_size=1)
+        rows = [row for start, end in ranges
+                for row in csv_ranges.read_range(path, start, end, fieldnames, 'latin-1')]
+        assert rows == expected, f"rows differ with {parts} ranges"
+
+
+def ndjson_bytes(csv_file, processes, ingested_at):
+    collector = SchoolsCollector(csv_file, processes=processes)
+    collector.ingested_at = ingested_at
+    collector.source_date = ingested_at[:10]
+    with open(collector.stream(f"schools_{processes}.ndjson"), 'rb') as f:
+        return f.read()
+
+
+def check_same_output(csv_file, processes):
+    ingested_at = "2026-01-01T00:00:00"
+    serial = ndjson_bytes(csv_file, 1, ingested_at)
+    assert ndjson_bytes(csv_file, processes, ingested_at) == serial, "SchoolsCollector output differs"
+
+    serial = json.dumps(kosmos_schools.collect_schools(csv_file), indent=2)
+    assert json.dumps(kosmos_schools.collect_schools(csv_file, processes), indent=2) == serial, \
+        "collect_schools output differs"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def work_split(csv_file, fn, args, merge, parts=32):
+    """(worker seconds, parent seconds) for one parallel run, measured in this process"""
+    parent = timed(lambda: csv_ranges.record_ranges(csv_file, parts, 'latin-1'))
+    fieldnames, ranges = csv_ranges.record_ranges(csv_file, parts, 'latin-1')
+    start = time.perf_counter()
+    blobs = [pickle.dumps(fn(csv_file, a, b, fieldnames, 'latin-1', *args), pickle.HIGHEST_PROTOCOL)
+             for a, b in ranges]
+    worker = time.perf_counter() - start
+    parent += timed(lambda: merge([pickle.loads(blob) for blob in blobs]))
+    return worker, parent
+
+
+def merge_records(results, provenance):
+    return [KOSMOSRecord(SchoolRow(*values), confidence, source_hash, provenance)
+            for rows in results for values, confidence, source_hash in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=300000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kosmos_unified.OUTPUT_ROOT = tmp
+        awkward = os.path.join(tmp, "awkward.csv")
+        awkward_csv(awkward, 20000)
+        check_ranges(awkward)
+        print("✓ Byte ranges of an awkward CSV parse to the same rows as one DictReader")
+
+        csv_file = os.path.join(tmp, "uk_schools_raw.csv")
+        synthetic_raw_csv(csv_file, args.records)
+        small = os.path.join(tmp, "small.csv")
+        synthetic_raw_csv(small, 20000, seed=1)
+        # Small ranges, so the check really runs on several workers
+        csv_ranges.MIN_RANGE, min_range = 1 << 14, csv_ranges.MIN_RANGE
+        check_same_output(small, max(args.processes))
+        csv_ranges.MIN_RANGE = min_range
+        print("✓ Parallel output is byte-identical to the serial path (NDJSON and collect_schools)")
+
+        size = os.path.getsize(csv_file) / 2**20
+        print(f"\n{args.records:,} rows ({size:.0f} MB), {os.cpu_count()} cores available")
+        print(f"{'':<28} {'collect (s)':>11} {'speedup':>8} {'collect_schools (s)':>20} {'speedup':>8}")
+        runs = [("serial", 1)] + [(f"{n} processes", n) for n in args.processes if n > 1]
+        base_records = base_leaders = None
+        for label, processes in runs:
+            records = timed(lambda: SchoolsCollector(csv_file, processes=processes).collect())
+            leaders = timed(lambda: kosmos_schools.collect_schools(csv_file, processes))
+            base_records = base_records or records
+            base_leaders = base_leaders or leaders
+            print(f"{label:<28} {records:>11.2f} {base_records / records:>7.1f}x "
+                  f"{leaders:>20.2f} {base_leaders / leaders:>7.1f}x")
+
+        collector = SchoolsCollector(csv_file)
+        provenance = collector.run_provenance(collector.source_url, collector.source_name)
+        splits = [
+            ("SchoolsCollector", kosmos_unified._school_range, (collector.rules,),
+             lambda results: merge_records(results, provenance)),
+            ("collect_schools", kosmos_schools._leader_range, (kosmos_schools.INGESTED_AT,),
+             lambda results: [record for records in results for record in records]),
+        ]
+        print(f"\nWhere the time goes (parent = splitting, unpickling results, merging - the serial part)")
+        print(f"{'':<28} {'workers (s)':>11} {'parent (s)':>11} {'8 cores':>8} {'16 cores':>9} {'limit':>7}")
+        for label, fn, fn_args, merge in splits:
+            worker, parent = work_split(csv_file, fn, fn_args, merge)
+            total = worker + parent
+            speedups = [total / max(worker / n, parent) for n in (8, 16)]
+            print(f"{label:<28} {worker:>11.2f} {parent:>11.2f} {speedups[0]:>7.1f}x {speedups[1]:>8.1f}x "
+                  f"{total / parent:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Provenance hashing benchmark
+MD5 over json.dumps(record, sort_keys=True) (the old source_hash) vs
+provenance.py's field-ordered BLAKE2b, per record and in batches - and a
+stability check: known digests, the same digests from a fresh interpreter
+with a different PYTHONHASHSEED, and no dependence on dict key order
+
+Usage: python benchmarks/bench_provenance.py [--records 100000]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import subprocess
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scrapers"))
+
+import provenance
+from kosmos_unified import SCHOOL_HASHER, SchoolRow
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Digests these inputs must always produce - a change here breaks every stored hash
+SAMPLE = {
+    "name": "Latimer Primary School",
+    "address": {"town": "Anstey", "postcode": "LE7 7AW", "country": "UK"},
+    "contact": {"phone": "0116 236 2231", "email": None},
+    "capacity": 420,
+    "has_send": True,
+}
+KNOWN = {
+    "hash_record": "84ff250c77faf4b6",
+    "hash_values": "1304cf2f35c21eae",
+    "RecordHasher": "27c108584024170a",
+}
+
+
+def sample_digests():
+    return {
+        "hash_record": provenance.hash_record(SAMPLE, "education"),
+        "hash_values": provenance.hash_values(["Latimer Primary School", "Anstey", "LE7 7AW"], "uk_schools_collector"),
+        "RecordHasher": provenance.RecordHasher(["name", "address.postcode", "capacity"], "education")(SAMPLE),
+    }
+
+
+def shuffled(record, rng):
+    """Same record, keys inserted in a different order (recursively)"""
+    items = list(record.items())
+    rng.shuffle(items)
+    return {k: shuffled(v, rng) if isinstance(v, dict) else v for k, v in items}
+
+
+def check_stability(records):
+    digests = sample_digests()
+    assert digests == KNOWN, f"digests changed: {digests}"
+
+    # A fresh interpreter, different string hashing seed
+    code = ("import sys, json; sys.path.insert(0, 'benchmarks'); import bench_provenance as b; "
+            "print(json.dumps(b.sample_digests()))")
+    env = {**os.environ, "PYTHONHASHSEED": "12345"}
+    root = os.path.join(os.path.dirname(__file__), "..")
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == KNOWN, "digests differ across interpreters"
+
+    rng = random.Random(0)
+    sample = records[:1000]
+    assert [provenance.hash_record(r) for r in sample] == [provenance.hash_record(shuffled(r, rng)) for r in sample], \
+        "hash_record depends on key order"
+
+    hashes = provenance.hash_batch([[r["name"], r["address"]["postcode"]] for r in records])
+    assert hashes == provenance.hash_batch([[r["name"], r["address"]["postcode"]] for r in records]), "unstable"
+
+
+def synthetic_schools(rows, seed=0):
+    """Resample the enriched region CSVs into SchoolRows"""
+    files = sorted(f for f in os.listdir(DATA_DIR) if f.endswith("_schools_enriched.csv"))
+    base = pd.concat([pd.read_csv(os.path.join(DATA_DIR, f), dtype=str) for f in files], ignore_index=True)
+    df = base.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True).fillna('')
+    df = df.rename(columns={'county': 'la', 'phone': 'tel', 'website': 'web', 'head_title': 'headtitle',
+                            'head_first_name': 'headfirstname', 'head_last_name': 'headsecondname'})
+    df['county'] = df['la']
+    return [SchoolRow.from_csv(row) for row in df.to_dict('records')]
+
+
+def old_hash(record):
+    key_content = f"education|{json.dumps(record, sort_keys=True)}"
+    return hashlib.md5(key_content.encode()).hexdigest()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = synthetic_schools(args.records)
+    records = [row.to_dict() for row in rows]
+
+    check_stability(records)
+    print("✓ Known digests match, identical in a fresh interpreter, independent of key order")
+
+    fields = ["name", "type", "local_authority", "address.street", "address.locality", "address.town",
+              "address.county", "address.postcode", "contact.phone", "contact.website",
+              "headteacher.name", "headteacher.title"]
+    hasher = provenance.RecordHasher(fields, "education")
+    frame = pd.DataFrame([[getattr(r, f) for f in SchoolRow.__slots__] for r in rows],
+                         columns=list(SchoolRow.__slots__))
+
+    runs = [
+        ("MD5 of sorted JSON (old)", lambda: [old_hash(r) for r in records]),
+        ("hash_record, any dict", lambda: [provenance.hash_record(r, "education") for r in records]),
+        ("RecordHasher, per record", lambda: [hasher(r) for r in records]),
+        ("RecordHasher.many", lambda: hasher.many(records)),
+        ("SchoolRow attributes", lambda: SCHOOL_HASHER.many(rows)),
+        ("hash_frame (DataFrame)", lambda: provenance.hash_frame(frame, list(SchoolRow.__slots__), "education")),
+    ]
+
+    print(f"\n{args.records:,} school records")
+    print(f"{'':<28} {'total (s)':>10} {'µs/record':>10} {'speedup':>8}")
+    baseline = None
+    for label, fn in runs:
+        elapsed = timed(fn)
+        baseline = baseline or elapsed
+        print(f"{label:<28} {elapsed:>10.3f} {elapsed / args.records * 1e6:>10.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+School crawler benchmark
+Crawls generated school sites on a local fixture server - every school on
+its own loopback address (127.0.x.y), so per-host politeness applies as it
+would on the real web - and reports schools/hour plus extraction accuracy
+
+Usage: python benchmarks/bench_school_crawler.py [--schools 2000] [--delay 0.5] [--latency 0.05]
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scrapers"))
+
+from school_crawler import crawl_schools
+
+PORT = 8719
+
+ROBOTS = "User-agent: *\nDisallow: /private/\n"
+
+HOME = """<html><head><title>School {i}</title><script>var x = "noreply@tracker.example";</script></head>
+<body><nav>
+<a href="/about-us/">About us</a> <a href="/news/">News</a> <a href="/contact-us/">Contact Us</a>
+<a href="/about-us/governors/">Our Governors</a> <a href="/key-information/pupil-premium/">Pupil Premium</a>
+<a href="/key-information/send/">SEND Information Report</a> <a href="/private/staff-login/">Staff login</a>
+<a href="/policies/behaviour.pdf">Behaviour policy</a> <a href="https://twitter.com/school{i}">Twitter</a>
+</nav>
+<p>Welcome to School {i}. {filler}</p>
+<footer><a href="mailto:office@school{i}.sch.uk">Email us</a></footer>
+</body></html>"""
+
+PAGES = {
+    "/contact-us/": "<html><body><h1>Contact</h1><p>Head: head@school{i}.sch.uk<br>"
+                    "SENCo: senco@school{i}.sch.uk</p><p>{filler}</p></body></html>",
+    "/about-us/governors/": "<html><body><h1>Governors</h1><ul><li>Mrs Emma Dibble (Chair)</li>"
+                            "<li>Mr Richard Dax</li><li>Rev Nigel Wakefield</li></ul></body></html>",
+    "/key-information/pupil-premium/": "<html><body><h1>Pupil Premium</h1><p>{filler}</p></body></html>",
+    "/key-information/send/": "<html><body><h1>SEND</h1><p>{filler}</p></body></html>",
+    "/about-us/": "<html><body><h1>About</h1><p>{filler}</p></body></html>",
+    "/news/": "<html><body><h1>News</h1><p>{filler}</p></body></html>",
+    "/private/staff-login/": "<html><body>secret@school{i}.sch.uk</body></html>",
+}
+
+FILLER = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40
+
+
+def host_for(i):
+    return f"127.0.{i // 250}.{i % 250 + 1}"
+
+
+def school_of(host):
+    _, _, a, b = host.split(":")[0].split(".")
+    return int(a) * 250 + int(b) - 1
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        i = school_of(self.headers.get("Host", "127.0.0.1"))
+        path = self.path.split("?")[0]
+        if path == "/robots.txt":
+            body, content_type = ROBOTS, "text/plain"
+        elif path == "/":
+            body, content_type = HOME.format(i=i, filler=FILLER), "text/html"
+        elif path in PAGES:
+            body, content_type = PAGES[path].format(i=i, filler=FILLER), "text/html"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(latency):
+    FixtureHandler.latency = latency
+    server = ThreadingHTTPServer(("0.0.0.0", PORT), FixtureHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    server.serve_forever()
+
+
+def check(i, result):
+    """Everything the fixture site says, and nothing it hides"""
+    expected_emails = {f"office@school{i}.sch.uk", f"head@school{i}.sch.uk", f"senco@school{i}.sch.uk"}
+    return (
+        result.get("email") == f"office@school{i}.sch.uk"
+        and set(result.get("all_emails", "").split(", ")) == expected_emails
+        and result.get("governors") == "Mrs Emma Dibble, Mr Richard Dax, Rev Nigel Wakefield"
+        and result.get("has_pupil_premium") and result.get("has_send")
+        and not result.get("has_financial_reports")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schools", type=int, default=2000)
+    parser.add_argument("--delay", type=float, default=0.5, help="politeness delay per host (s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="server response time (s)")
+    parser.add_argument("--concurrency", type=int, default=200, help="schools crawled at once")
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=serve, args=(args.latency,), daemon=True)
+    server.start()
+    time.sleep(0.5)
+
+    try:
+        websites = [f"http://{host_for(i)}:{PORT}/" for i in range(args.schools)]
+        start = time.perf_counter()
+        results = crawl_schools(websites, delay=args.delay, concurrency=args.concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+
+    correct = sum(check(i, r) for i, r in enumerate(results))
+    print(f"{args.schools:,} schools ({args.delay}s politeness delay, {args.latency * 1000:.0f} ms responses, "
+          f"{args.concurrency} at once)")
+    print(f"  {elapsed:.1f}s -> {args.schools / elapsed * 3600:,.0f} schools/hour")
+    print(f"  extracted correctly: {correct:,}/{args.schools:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Storage backend benchmark
+Output size and write / read time for KOSMOS school records in every
+storage.py backend - json.dump(indent=2) as the scrapers wrote it, NDJSON,
+a Parquet dataset and SQLite, with gzip / zstd - after checking that each
+one reads back what was written and that a failed write leaves the
+previous output untouched
+
+Usage: python benchmarks/bench_storage.py [--records 200000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scrapers"))
+
+import kosmos_unified
+import storage
+from bench_kosmos_records import synthetic_raw_csv
+from kosmos_unified import SchoolsCollector
+
+RUNS = [
+    ("json", None), ("json", "gzip"), ("json", "zstd"),
+    ("ndjson", None), ("ndjson", "gzip"), ("ndjson", "zstd"),
+    ("parquet", "zstd"), ("parquet", "gzip"),
+    ("sqlite", None),
+]
+
+
+def failing(records, after):
+    for i, record in enumerate(records):
+        if i == after:
+            raise RuntimeError("collector failed part way")
+        yield record
+
+
+def check_atomic(root, records):
+    """A write that fails part way leaves the last good output, and no temporary files"""
+    for backend, compression in RUNS:
+        store = storage.open_store("check", backend, compression, root)
+        store.write("schools", records[:10])
+        try:
+            store.write("schools", failing(records, after=len(records) // 2))
+        except RuntimeError:
+            pass
+        assert list(store.read("schools")) == records[:10], f"{backend}/{compression}: output lost"
+    leftovers = [name for name in os.listdir(os.path.join(root, "check")) if ".tmp" in name]
+    assert not leftovers, f"temporary files left behind: {leftovers}"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def size_of(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kosmos_unified.OUTPUT_ROOT = tmp
+        csv_file = os.path.join(tmp, "uk_schools_raw.csv")
+        synthetic_raw_csv(csv_file, args.records)
+        records = [r.to_dict() for r in SchoolsCollector(csv_file).iter_records()]
+
+        check_atomic(tmp, records[:2000])
+        print("✓ A failed write leaves the previous output in place, no temporary files")
+
+        print(f"\n{len(records):,} school records")
+        print(f"{'':<18} {'size (MB)':>10} {'write (s)':>10} {'read (s)':>9}  round trip")
+        baseline = None
+        for backend, compression in RUNS:
+            store = storage.open_store("education", backend, compression, tmp)
+            path, write_time = timed(lambda: store.write("schools", records))
+            back, read_time = timed(lambda: list(store.read("schools")))
+            size = size_of(path)
+            baseline = baseline or (size, write_time)
+            label = f"{backend} {compression or ''}".strip()
+            print(f"{label:<18} {size / 2**20:>10.1f} {write_time:>10.2f} {read_time:>9.2f}  "
+                  f"{'identical' if back == records else 'DIFFERS'}   "
+                  f"{size / baseline[0]:>4.0%} of the size, {baseline[1] / write_time:.1f}x write speed")
+
+
+if __name__ == "__main__":
+    main()
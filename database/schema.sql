@@ -1,12 +1,13 @@
 -- Kronos Database Schema
 -- UK Public Data Database for AI Email Campaigns
 
--- Enable UUID extension
-CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- UUIDs from gen_random_uuid() (built in since PostgreSQL 13, no uuid-ossp needed)
 
 -- Main entity table
-CREATE TABLE entities (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+CREATE TABLE IF NOT EXISTS entities (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    -- Stable source identifier, e.g. school:100000, company:00000006 (loader upserts on it)
+    natural_key VARCHAR(200) UNIQUE,
     name VARCHAR(500) NOT NULL,
     category VARCHAR(100) NOT NULL,
     subcategory VARCHAR(100),
@@ -27,8 +28,9 @@ CREATE TABLE entities (
 );
 
 -- Contacts table (linked to entities)
-CREATE TABLE contacts (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+CREATE TABLE IF NOT EXISTS contacts (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    natural_key VARCHAR(200) UNIQUE,
     entity_id UUID REFERENCES entities(id) ON DELETE CASCADE,
     name VARCHAR(500),
     title VARCHAR(500),
@@ -41,7 +43,7 @@ CREATE TABLE contacts (
 );
 
 -- Categories reference
-CREATE TABLE categories (
+CREATE TABLE IF NOT EXISTS categories (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) UNIQUE NOT NULL,
     description TEXT,
@@ -58,15 +60,16 @@ INSERT INTO categories (name, description, priority) VALUES
 ('politics', 'MPs, lords, mayors, councillors', 6),
 ('media', 'Newspapers, media outlets', 7),
 ('grants', 'Grant bodies and funding organizations', 8),
-('businesses', 'Top UK companies with CSR/ESG depts', 9);
+('businesses', 'Top UK companies with CSR/ESG depts', 9)
+ON CONFLICT (name) DO NOTHING;
 
 -- Indexes for performance
-CREATE INDEX idx_entities_category ON entities(category);
-CREATE INDEX idx_entities_city ON entities(city);
-CREATE INDEX idx_entities_postcode ON entities(postcode);
-CREATE INDEX idx_entities_name ON entities(name);
-CREATE INDEX idx_contacts_entity_id ON contacts(entity_id);
-CREATE INDEX idx_contacts_email ON contacts(email);
+CREATE INDEX IF NOT EXISTS idx_entities_category ON entities(category);
+CREATE INDEX IF NOT EXISTS idx_entities_city ON entities(city);
+CREATE INDEX IF NOT EXISTS idx_entities_postcode ON entities(postcode);
+CREATE INDEX IF NOT EXISTS idx_entities_name ON entities(name);
+CREATE INDEX IF NOT EXISTS idx_contacts_entity_id ON contacts(entity_id);
+CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email);
 
 -- Full text search (if using PostgreSQL)
 -- CREATE EXTENSION IF NOT EXISTS pg_trgm;
@@ -74,9 +77,9 @@ CREATE INDEX idx_contacts_email ON contacts(email);
 -- CREATE INDEX idx_entities_metadata_fts ON entities USING gin(metadata jsonb_path_ops);
 
 -- Source tracking
-CREATE TABLE data_sources (
+CREATE TABLE IF NOT EXISTS data_sources (
     id SERIAL PRIMARY KEY,
-    source_name VARCHAR(200) NOT NULL,
+    source_name VARCHAR(200) UNIQUE NOT NULL,
     source_url VARCHAR(1000),
     api_available BOOLEAN DEFAULT FALSE,
     data_format VARCHAR(100),
@@ -85,7 +88,7 @@ CREATE TABLE data_sources (
 );
 
 -- Scraping/collection log
-CREATE TABLE collection_log (
+CREATE TABLE IF NOT EXISTS collection_log (
     id SERIAL PRIMARY KEY,
     category VARCHAR(100),
     source_name VARCHAR(200),
@@ -0,0 +1,93 @@
+-- Kronos Database Schema (SQLite)
+-- Same tables as schema.sql for local use: UUIDs are TEXT (generated by the
+-- loader), JSONB is JSON text, SERIAL is INTEGER PRIMARY KEY
+
+-- Main entity table
+CREATE TABLE IF NOT EXISTS entities (
+    id TEXT PRIMARY KEY,
+    natural_key TEXT UNIQUE,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    subcategory TEXT,
+    address_line1 TEXT,
+    address_line2 TEXT,
+    city TEXT,
+    county TEXT,
+    postcode TEXT,
+    country TEXT DEFAULT 'UK',
+    website TEXT,
+    email TEXT,
+    phone TEXT,
+    source_url TEXT,
+    source_name TEXT,
+    metadata TEXT DEFAULT '{}',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Contacts table (linked to entities)
+CREATE TABLE IF NOT EXISTS contacts (
+    id TEXT PRIMARY KEY,
+    natural_key TEXT UNIQUE,
+    entity_id TEXT REFERENCES entities(id) ON DELETE CASCADE,
+    name TEXT,
+    title TEXT,
+    department TEXT,
+    email TEXT,
+    phone TEXT,
+    role TEXT,
+    metadata TEXT DEFAULT '{}',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Categories reference
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    description TEXT,
+    priority INTEGER DEFAULT 0
+);
+
+INSERT INTO categories (name, description, priority) VALUES
+('education', 'Schools, colleges, universities', 1),
+('healthcare', 'Hospitals, NHS trusts, healthcare providers', 2),
+('public_buildings', 'Government buildings, councils, libraries', 3),
+('vc', 'Venture capital and angel investors', 4),
+('charities', 'Charities and NGOs', 5),
+('politics', 'MPs, lords, mayors, councillors', 6),
+('media', 'Newspapers, media outlets', 7),
+('grants', 'Grant bodies and funding organizations', 8),
+('businesses', 'Top UK companies with CSR/ESG depts', 9)
+ON CONFLICT (name) DO NOTHING;
+
+-- Indexes for performance
+CREATE INDEX IF NOT EXISTS idx_entities_category ON entities(category);
+CREATE INDEX IF NOT EXISTS idx_entities_city ON entities(city);
+CREATE INDEX IF NOT EXISTS idx_entities_postcode ON entities(postcode);
+CREATE INDEX IF NOT EXISTS idx_entities_name ON entities(name);
+CREATE INDEX IF NOT EXISTS idx_contacts_entity_id ON contacts(entity_id);
+CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email);
+
+-- Source tracking
+CREATE TABLE IF NOT EXISTS data_sources (
+    id INTEGER PRIMARY KEY,
+    source_name TEXT UNIQUE NOT NULL,
+    source_url TEXT,
+    api_available BOOLEAN DEFAULT FALSE,
+    data_format TEXT,
+    last_scraped TIMESTAMP,
+    record_count INTEGER DEFAULT 0
+);
+
+-- Scraping/collection log
+CREATE TABLE IF NOT EXISTS collection_log (
+    id INTEGER PRIMARY KEY,
+    category TEXT,
+    source_name TEXT,
+    action TEXT,
+    records_collected INTEGER,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP,
+    status TEXT,
+    notes TEXT
+);
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Entity Resolution
+Merges the overlapping copies of the same school (leicester_schools.csv,
+_fixed, _emails_fixed, _enriched, chunks, schools_export.csv, ...) and the
+same person (Companies House directors, charity trustees) into canonical
+entities, keeping track of which source each record and field came from.
+
+Blocking keeps it near-linear: records are only compared with records that
+share a block key -
+
+    schools: URN, postcode, pairs of adjacent name words
+    people:  surname + first initial
+
+Blocks bigger than MAX_BLOCK (e.g. every "church england" school) carry no
+signal and are skipped; the other keys still pair those records up.
+
+    python entity_resolution.py               # -> data/entities/{schools,people}.ndjson
+    python entity_resolution.py --kinds schools
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from functools import lru_cache
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+from parquet_store import DATA_DIR
+
+OUTPUT_DIR = os.path.join(DATA_DIR, "entities")
+
+MAX_BLOCK = 200
+MATCH_THRESHOLD = 0.8
+# Below this, names are different schools whatever the location says
+MIN_NAME_SIMILARITY = 0.75
+
+# Name similarity vs location agreement, for schools
+NAME_WEIGHT = 0.6
+LOCATION_WEIGHT = 0.4
+
+# Rewritten before tokenizing, so "St Mary's C of E" == "Saint Marys Church of England"
+NAME_REWRITES = [
+    (re.compile(r"\bc\.?\s?of\s?e\.?(?=\W|$)"), " church of england "),
+    (re.compile(r"&"), " and "),
+    (re.compile(r"['’]"), ""),
+]
+ABBREVIATIONS = {
+    "st": "saint", "cofe": "church of england", "ce": "church of england", "rc": "roman catholic",
+    "sch": "school", "prim": "primary", "jnr": "junior", "jun": "junior", "juniors": "junior",
+    "inf": "infant", "infants": "infant", "acad": "academy", "coll": "college",
+}
+# Too common to block on
+NAME_STOPWORDS = {"the", "of", "and", "school", "schools", "saint", "church", "england", "academy"}
+# Two schools on one site often differ only by these (X Infant / X Junior School)
+DISCRIMINATORS = {
+    "infant", "junior", "nursery", "primary", "secondary", "first", "middle", "upper", "lower",
+    "high", "special", "sixth", "girls", "boys", "centre", "college", "senior", "preparatory", "prep",
+    "north", "south", "east", "west", "central",
+}
+# Shared by thousands of names - similarity is measured on what's left
+GENERIC_WORDS = NAME_STOPWORDS | DISCRIMINATORS | {
+    "children", "childrens", "sure", "start", "surestart", "linked", "site", "community", "county",
+    "roman", "catholic", "voluntary", "aided", "controlled", "foundation", "free",
+}
+TITLES = {"mr", "mrs", "ms", "miss", "dr", "prof", "professor", "sir", "dame", "lord", "lady", "rev", "revd"}
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+
+def normalize_postcode(postcode):
+    return re.sub(r"\s+", "", _text(postcode).upper())
+
+
+@lru_cache(maxsize=None)
+def _generic_spelling(word):
+    """'primray' -> 'primary', so a typo in a generic word doesn't look like a different school"""
+    if word in GENERIC_WORDS or len(word) < 5:
+        return word
+    for generic in GENERIC_WORDS:
+        if len(generic) >= 5 and abs(len(generic) - len(word)) <= 1 and _similarity(word, generic) >= 0.8:
+            return generic
+    return word
+
+
+def name_tokens(name):
+    """Lowercased, abbreviations expanded, punctuation dropped"""
+    name = _text(name).lower()
+    for pattern, replacement in NAME_REWRITES:
+        name = pattern.sub(replacement, name)
+    tokens = []
+    for word in WORD_RE.findall(name):
+        tokens.extend(_generic_spelling(w) for w in ABBREVIATIONS.get(word, word).split())
+    return tokens
+
+
+def person_tokens(name):
+    """'SMITH, John Michael' and 'Mr John Michael Smith' -> ['john', 'michael', 'smith']"""
+    name = _text(name)
+    if "," in name:
+        surname, _, forenames = name.partition(",")
+        name = f"{forenames} {surname}"
+    return [w for w in WORD_RE.findall(name.lower()) if w not in TITLES]
+
+
+# --- Sources ----------------------------------------------------------------
+
+def school_sources(data_dir=DATA_DIR):
+    """School CSVs in data/, best first: enriched region files, the rest, then the export"""
+    paths = [p for p in glob.glob(os.path.join(data_dir, "*.csv"))
+             if not os.path.basename(p).startswith("universities")]
+
+    def priority(path):
+        name = os.path.basename(path)
+        if name.endswith("_schools_enriched.csv"):
+            return 0, name
+        if name == "schools_export.csv":
+            return 2, name
+        return 1, name
+
+    return sorted(paths, key=priority)
+
+
+def school_records(paths):
+    """One record per CSV row: identifiers pulled out, everything else kept in `fields`"""
+    for path in paths:
+        source = os.path.basename(path)
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        df = df.rename(columns={"school": "name", "town_name": "town"})
+        if "name" not in df.columns:
+            continue
+        for i, row in enumerate(df.to_dict('records')):
+            name = _text(row.get("name"))
+            if not name:
+                continue
+            type_column = "type" if _text(row.get("type")) else "category"
+            yield {
+                "kind": "school",
+                "source": source,
+                "row": i,
+                "name": name,
+                "tokens": name_tokens(name),
+                "postcode": normalize_postcode(row.get("postcode")),
+                "town": _text(row.get("town")).lower(),
+                "urn": _text(row.get("urn")).split(".")[0],
+                # GIAS establishment type - a nursery and the children's centre it runs are two entities.
+                # `type` and `category` columns use different vocabularies, so remember which one it came from
+                "type": _text(row.get(type_column)).lower(),
+                "type_column": type_column,
+                "fields": {k: _text(v) for k, v in row.items() if _text(v)},
+            }
+
+
+def _read_json_records(path):
+    if not os.path.exists(path):
+        return []
+    if path.endswith(".ndjson"):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    with open(path) as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else data.get("records", [])
+
+
+def person_records(data_dir=DATA_DIR):
+    """Company directors and charity trustees"""
+    directors = os.path.join(data_dir, "businesses", "directors.json")
+    for i, director in enumerate(_read_json_records(directors)):
+        dob = director.get("date_of_birth") or {}
+        address = director.get("address") or {}
+        yield _person(
+            "directors.json", i, director.get("name"),
+            org=f"company:{director.get('company_number')}",
+            dob=f"{dob.get('year', '')}-{dob.get('month', '')}" if dob.get("year") else "",
+            postcode=address.get("postal_code"),
+            fields={k: director.get(k) for k in ("name", "role", "company_number", "company_name",
+                                                 "appointment_date", "nationality")},
+        )
+
+    for relative in ("charities/charities_register.ndjson", "charities/charities.json"):
+        source = os.path.basename(relative)
+        n = 0
+        for charity in _read_json_records(os.path.join(data_dir, relative)):
+            number = charity.get("charity_number")
+            for trustee in charity.get("trustees") or []:
+                name = trustee.get("name") or trustee.get("trustee_name")
+                yield _person(
+                    source, n, name, org=f"charity:{number}",
+                    fields={"name": name, "role": "trustee", "charity_number": number,
+                            "charity_name": charity.get("name"),
+                            "appointment_date": trustee.get("appointment_date")},
+                )
+                n += 1
+
+
+def _person(source, row, name, org, dob="", postcode="", fields=None):
+    return {
+        "kind": "person",
+        "source": source,
+        "row": row,
+        "name": _text(name),
+        "tokens": person_tokens(name),
+        "org": org,
+        "dob": dob,
+        "postcode": normalize_postcode(postcode),
+        "fields": {k: _text(v) for k, v in (fields or {}).items() if _text(v)},
+    }
+
+
+# --- Blocking ---------------------------------------------------------------
+
+def school_block_keys(record):
+    keys = []
+    if record["urn"]:
+        keys.append(f"urn:{record['urn']}")
+    if record["postcode"]:
+        keys.append(f"pc:{record['postcode']}")
+    words = [w for w in record["tokens"] if w not in NAME_STOPWORDS]
+    if len(words) == 1:
+        keys.append(f"nm:{words[0]}")
+    keys.extend(f"nm:{a} {b}" for a, b in zip(words, words[1:]))
+    return keys
+
+
+def person_block_keys(record):
+    tokens = record["tokens"]
+    if len(tokens) < 2:
+        return []
+    return [f"nm:{tokens[-1]} {tokens[0][0]}"]
+
+
+BLOCK_KEYS = {"school": school_block_keys, "person": person_block_keys}
+
+
+def candidate_pairs(records, max_block=MAX_BLOCK):
+    """Distinct (i, j) pairs sharing a block; also returns blocking stats"""
+    blocks = defaultdict(list)
+    for i, record in enumerate(records):
+        for key in BLOCK_KEYS[record["kind"]](record):
+            blocks[key].append(i)
+
+    pairs = set()
+    skipped = 0
+    for members in blocks.values():
+        if len(members) > max_block:
+            skipped += 1
+            continue
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                pairs.add((members[a], members[b]))
+
+    return sorted(pairs), {"blocks": len(blocks), "oversized_blocks": skipped, "pairs": len(pairs)}
+
+
+# --- Scoring ----------------------------------------------------------------
+
+def _similarity(a, b):
+    matcher = SequenceMatcher(None, a, b)
+    if matcher.real_quick_ratio() < 0.5 or matcher.quick_ratio() < 0.5:
+        return 0.0
+    return matcher.ratio()
+
+
+def _core_name(tokens):
+    core = [t for t in tokens if t not in GENERIC_WORDS]
+    return " ".join(core or tokens)
+
+
+def score_schools(a, b):
+    """0..1 - URNs decide outright; otherwise name similarity + location agreement"""
+    if a["urn"] and b["urn"]:
+        return 1.0 if a["urn"] == b["urn"] else 0.0
+
+    # "Community school" and "Primary" can be the same school - only compare like with like
+    if a["type"] and b["type"] and a["type_column"] == b["type_column"] and a["type"] != b["type"]:
+        return 0.0
+    ta, tb = set(a["tokens"]), set(b["tokens"])
+    if (ta ^ tb) & DISCRIMINATORS:
+        return 0.0
+    # Canary Wharf College / Canary Wharf College 3
+    if {t for t in ta if t.isdigit()} != {t for t in tb if t.isdigit()}:
+        return 0.0
+
+    if a["postcode"] and b["postcode"]:
+        if a["postcode"] == b["postcode"]:
+            location = 1.0
+        elif a["postcode"][:-3] == b["postcode"][:-3]:
+            # Same outward code - a corrected postcode, or a neighbour
+            location = 0.25
+        else:
+            return 0.0
+    else:
+        location = 0.5 if a["town"] and a["town"] == b["town"] else 0.0
+
+    name = _similarity(_core_name(a["tokens"]), _core_name(b["tokens"]))
+    if name < MIN_NAME_SIMILARITY:
+        return 0.0
+    return NAME_WEIGHT * name + LOCATION_WEIGHT * location
+
+
+def score_people(a, b):
+    """
+    Name compatibility is required (same surname, forenames equal or one a
+    prefix of the other); then a second signal - date of birth, organisation,
+    postcode - or a full name of three or more words
+    """
+    if a["dob"] and b["dob"] and a["dob"] != b["dob"]:
+        return 0.0
+    ta, tb = a["tokens"], b["tokens"]
+    if ta[-1] != tb[-1]:
+        return 0.0
+    fa, fb = ta[:-1], tb[:-1]
+    shorter, longer = sorted((fa, fb), key=len)
+    if longer[:len(shorter)] != shorter:
+        return 0.0
+
+    if a["dob"] and a["dob"] == b["dob"]:
+        return 1.0
+    if a["org"] == b["org"] or (a["postcode"] and a["postcode"] == b["postcode"]):
+        return 0.9
+    if ta == tb and len(ta) >= 3:
+        return 0.8
+    return 0.5
+
+
+SCORERS = {"school": score_schools, "person": score_people}
+
+
+def _hard_ids(record):
+    """Values two records of one entity can never disagree on"""
+    if record.get("urn"):
+        return {record["urn"]}
+    if record.get("dob"):
+        return {record["dob"]}
+    return set()
+
+
+# --- Clustering + merging ---------------------------------------------------
+
+class Clusters:
+    """Union-find that refuses to join two clusters with different URNs (or dates of birth)"""
+
+    def __init__(self, records):
+        self.parent = list(range(len(records)))
+        self.ids = [_hard_ids(r) for r in records]
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj:
+            return True
+        if self.ids[ri] and self.ids[rj] and self.ids[ri] != self.ids[rj]:
+            return False
+        if ri > rj:
+            ri, rj = rj, ri
+        self.parent[rj] = ri
+        self.ids[ri] |= self.ids[rj]
+        return True
+
+    def groups(self):
+        groups = defaultdict(list)
+        for i in range(len(self.parent)):
+            groups[self.find(i)].append(i)
+        return list(groups.values())
+
+
+def merge_cluster(records, members):
+    """
+    Canonical entity: each field takes the first non-empty value in source
+    priority order, and field_sources records where it came from
+    """
+    members = sorted(members)
+    fields, field_sources = {}, {}
+    for i in members:
+        record = records[i]
+        for key, value in record["fields"].items():
+            if key not in fields:
+                fields[key] = value
+                field_sources[key] = record["source"]
+
+    first = records[members[0]]
+    urn = next((records[i]["urn"] for i in members if records[i].get("urn")), "")
+    entity_id = f"{first['kind']}:urn:{urn}" if urn else f"{first['kind']}:{first['source']}:{first['row']}"
+    return {
+        "id": entity_id,
+        "kind": first["kind"],
+        "name": fields.get("name", first["name"]),
+        **{k: v for k, v in fields.items() if k != "name"},
+        "provenance": {
+            "records": [{"source": records[i]["source"], "row": records[i]["row"]} for i in members],
+            "fields": field_sources,
+        },
+    }
+
+
+def resolve(records, threshold=MATCH_THRESHOLD, max_block=MAX_BLOCK):
+    """Records -> (canonical entities, stats)"""
+    records = list(records)
+    start = time.perf_counter()
+    pairs, stats = candidate_pairs(records, max_block)
+
+    clusters = Clusters(records)
+    matched = conflicts = 0
+    for i, j in pairs:
+        if SCORERS[records[i]["kind"]](records[i], records[j]) >= threshold:
+            matched += 1
+            if not clusters.union(i, j):
+                conflicts += 1
+
+    entities = [merge_cluster(records, members) for members in clusters.groups()]
+    entities.sort(key=lambda e: e["id"])
+    stats.update(
+        records=len(records), matched_pairs=matched, id_conflicts=conflicts,
+        entities=len(entities), seconds=round(time.perf_counter() - start, 3),
+    )
+    return entities, stats
+
+
+def write_entities(entities, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", 'w') as f:
+        for entity in entities:
+            f.write(json.dumps(entity) + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate schools and people into canonical entities")
+    parser.add_argument("--kinds", nargs="+", choices=["schools", "people"], default=["schools", "people"])
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    inputs = {
+        "schools": lambda: school_records(school_sources(args.data_dir)),
+        "people": lambda: person_records(args.data_dir),
+    }
+    for kind in args.kinds:
+        entities, stats = resolve(inputs[kind]())
+        path = os.path.join(args.output_dir, f"{kind}.ndjson")
+        write_entities(entities, path)
+        print(f"✓ {kind}: {stats['records']:,} records -> {stats['entities']:,} entities "
+              f"({stats['pairs']:,} pairs compared, {stats['seconds']}s) - {path}")
+
+
+if __name__ == "__main__":
+    main()
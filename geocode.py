@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Offline Postcode Geocoder
+Memory-mapped postcode -> (lat, lon) index with sector/district/area fallback
+
+Build the index once from an ONS Postcode Directory style CSV:
+    python geocode.py build data/ONSPD.csv
+
+https://geoportal.statistics.gov.uk/ (search "ONS Postcode Directory")
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "postcode_index")
+
+# Most specific first - a postcode resolves at the first level that knows it
+LEVELS = ["unit", "sector", "district", "area"]
+
+# Column names used by ONSPD / NSPL / postcodes.io style exports
+POSTCODE_COLUMNS = ["pcds", "pcd", "pcd2", "postcode"]
+LAT_COLUMNS = ["lat", "latitude"]
+LON_COLUMNS = ["long", "lon", "longitude"]
+
+# Postcode area centres, used when no index has been built
+CENTERS = {
+    'LE': (52.63, -1.13), 'NG': (52.95, -1.15), 'DE': (52.92, -1.55),
+    'CV': (52.48, -1.50), 'NN': (52.24, -0.90), 'PE': (52.57, -0.24),
+    'MK': (52.04, -0.76), 'WS': (52.58, -1.98), 'DY': (52.51, -2.08),
+    'B':  (52.48, -1.89), 'WR': (52.19, -2.22), 'OX': (51.75, -1.25),
+    'CB': (52.20, 0.12), 'ST': (52.90, -2.25), 'TF': (52.74, -2.50),
+}
+DEFAULT_CENTER = (52.5, -1.5)
+
+# area, district digits, then optional inward code (sector digit + unit letters)
+POSTCODE_RE = r"^([A-Z]{1,2})([0-9][A-Z0-9]?)(?:([0-9])([A-Z]{2}))?$"
+
+
+def split_postcodes(postcodes):
+    """
+    Split a postcode column into unit/sector/district/area keys
+    e.g. "le7 7aw" -> LE77AW / LE77 / LE7 / LE (NaN where not derivable)
+    """
+    pc = pd.Series(postcodes, dtype=object).astype(str).str.upper().str.replace(r"\s+", "", regex=True)
+    parts = pc.str.extract(POSTCODE_RE)
+    area, district, sector, unit = parts[0], parts[1], parts[2], parts[3]
+
+    return pd.DataFrame({
+        "unit": area + district + sector + unit,
+        "sector": area + district + sector,
+        "district": area + district,
+        "area": area,
+    })
+
+
+def _pick_column(columns, candidates):
+    for name in candidates:
+        if name in columns:
+            return name
+    raise ValueError(f"None of {candidates} found in CSV columns")
+
+
+def build_index(csv_path, index_dir=INDEX_DIR, chunksize=500_000):
+    """
+    Build the postcode index from an ONSPD-style CSV
+    Writes sorted fixed-width keys plus float32 coords per level as .npy files
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    pc_col = _pick_column(header, POSTCODE_COLUMNS)
+    lat_col = _pick_column(header, LAT_COLUMNS)
+    lon_col = _pick_column(header, LON_COLUMNS)
+
+    print(f"Reading postcodes from: {csv_path}")
+
+    frames = []
+    for chunk in pd.read_csv(csv_path, usecols=[pc_col, lat_col, lon_col],
+                             dtype={pc_col: str}, chunksize=chunksize):
+        # ONSPD uses 99.999999 for postcodes with no grid reference
+        chunk = chunk[chunk[lat_col].between(49, 61) & chunk[lon_col].between(-9, 3)]
+        keys = split_postcodes(chunk[pc_col])
+        keys["lat"] = chunk[lat_col].to_numpy(dtype=np.float32)
+        keys["lon"] = chunk[lon_col].to_numpy(dtype=np.float32)
+        frames.append(keys.dropna(subset=["unit"]))
+        print(f"  {sum(len(f) for f in frames):,} postcodes")
+
+    units = pd.concat(frames, ignore_index=True)
+
+    os.makedirs(index_dir, exist_ok=True)
+    for level in LEVELS:
+        # Sectors, districts and areas sit at the mean of their postcodes
+        table = units.groupby(level, sort=True)[["lat", "lon"]].mean()
+        keys = table.index.to_numpy().astype("S7")
+        coords = table.to_numpy(dtype=np.float32)
+        np.save(os.path.join(index_dir, f"{level}_keys.npy"), keys)
+        np.save(os.path.join(index_dir, f"{level}_coords.npy"), coords)
+        print(f"✓ {level}: {len(keys):,} entries")
+
+    print(f"\n✓ Saved postcode index to {index_dir}")
+    return index_dir
+
+
+class PostcodeIndex:
+    """Read-only, memory-mapped postcode index"""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self.tables = {}
+        for level in LEVELS:
+            keys = np.load(os.path.join(index_dir, f"{level}_keys.npy"), mmap_mode="r")
+            coords = np.load(os.path.join(index_dir, f"{level}_coords.npy"), mmap_mode="r")
+            self.tables[level] = (keys, coords)
+
+    @staticmethod
+    def exists(index_dir=INDEX_DIR):
+        return all(
+            os.path.exists(os.path.join(index_dir, f"{level}_keys.npy")) for level in LEVELS
+        )
+
+    def lookup(self, postcodes):
+        """
+        Geocode a whole postcode column
+        Returns (lat, lon, level) arrays; level is "" where nothing matched
+        """
+        keys = split_postcodes(postcodes)
+        n = len(keys)
+        lat = np.full(n, np.nan)
+        lon = np.full(n, np.nan)
+        level_hit = np.full(n, "", dtype=object)
+        todo = np.ones(n, dtype=bool)
+
+        for level in LEVELS:
+            wanted = todo & keys[level].notna().to_numpy()
+            if not wanted.any():
+                continue
+
+            table_keys, table_coords = self.tables[level]
+            if len(table_keys) == 0:
+                continue
+            query = keys[level].to_numpy()[wanted].astype("S7")
+            pos = np.searchsorted(table_keys, query)
+            pos = np.minimum(pos, len(table_keys) - 1)
+            found = table_keys[pos] == query
+
+            rows = np.flatnonzero(wanted)[found]
+            lat[rows] = table_coords[pos[found], 0]
+            lon[rows] = table_coords[pos[found], 1]
+            level_hit[rows] = level
+            todo[rows] = False
+
+        return lat, lon, level_hit
+
+
+def _area_centres(postcodes):
+    """No index: area centre plus a small offset derived from the postcode itself"""
+    keys = split_postcodes(postcodes)
+    area = keys["area"]
+
+    centre = area.map(CENTERS)
+    known = centre.notna().to_numpy()
+    lat = np.where(known, centre.str[0], DEFAULT_CENTER[0]).astype(float)
+    lon = np.where(known, centre.str[1], DEFAULT_CENTER[1]).astype(float)
+
+    # Stable across runs (unlike random jitter), so pins don't move between reruns
+    normalized = pd.Series(postcodes, dtype=object).astype(str).str.upper().str.replace(r"\s+", "", regex=True)
+    h = pd.util.hash_array(normalized.to_numpy(dtype=object))
+    spread = np.where(known, 0.04, 0.5)
+    lat += ((h & 0xFFFF) / 0xFFFF * 2 - 1) * spread
+    lon += (((h >> 16) & 0xFFFF) / 0xFFFF * 2 - 1) * spread
+    return lat, lon
+
+
+_index = None
+
+
+def get_index(index_dir=INDEX_DIR):
+    """Shared index for this process, or None if it hasn't been built"""
+    global _index
+    if _index is None and PostcodeIndex.exists(index_dir):
+        _index = PostcodeIndex(index_dir)
+    return _index
+
+
+def geocode_postcodes(postcodes):
+    """
+    Geocode a postcode column to (lat, lon) arrays - deterministic
+    NaN where the postcode is missing or blank
+    """
+    postcodes = pd.Series(postcodes)
+    valid = (postcodes.notna() & (postcodes.astype(str).str.strip() != "")).to_numpy()
+
+    lat = np.full(len(postcodes), np.nan)
+    lon = np.full(len(postcodes), np.nan)
+    if not valid.any():
+        return lat, lon
+
+    values = postcodes[valid]
+    index = get_index()
+
+    if index is not None:
+        v_lat, v_lon, _ = index.lookup(values)
+        # Postcodes the index doesn't know (new, typos) still get an approximate pin
+        missing = np.isnan(v_lat)
+        if missing.any():
+            f_lat, f_lon = _area_centres(values[missing])
+            v_lat[missing] = f_lat
+            v_lon[missing] = f_lon
+    else:
+        v_lat, v_lon = _area_centres(values)
+
+    lat[valid] = v_lat
+    lon[valid] = v_lon
+    return lat, lon
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "build":
+        print("Usage: python geocode.py build <onspd.csv>")
+        sys.exit(1)
+    build_index(sys.argv[2])
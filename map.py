@@ -1,55 +1,34 @@
 import streamlit as st
 import pandas as pd
-import urllib.request
-import io
-import random
+
+from geocode import geocode_postcodes
+from map_frame import classify_status
+from regions import load_regions
+import region_summary
+import map_layer
+import results_index
 
 st.set_page_config(page_title="KOSMOS Schools Map", page_icon="🗺️")
 
-# UK postcode to lat/lon
-def geocode_uk(postcode):
-    if pd.isna(postcode) or not postcode:
-        return None, None
-    
-    pc = str(postcode).strip().upper().replace(' ', '')
-    
-    centers = {
-        'LE': (52.63, -1.13), 'NG': (52.95, -1.15), 'DE': (52.92, -1.55),
-        'CV': (52.48, -1.50), 'NN': (52.24, -0.90), 'PE': (52.57, -0.24),
-        'MK': (52.04, -0.76), 'WS': (52.58, -1.98), 'DY': (52.51, -2.08),
-        'B':  (52.48, -1.89), 'WR': (52.19, -2.22), 'OX': (51.75, -1.25),
-        'CB': (52.20, 0.12), 'ST': (52.90, -2.25), 'TF': (52.74, -2.50),
-    }
-    
-    outward = pc[:2] if len(pc) >= 2 else pc[:1]
-    
-    if outward in centers:
-        lat, lon = centers[outward]
-        lat += random.uniform(-0.04, 0.04)
-        lon += random.uniform(-0.04, 0.04)
-        return lat, lon
-    
-    return 52.5 + random.uniform(-0.5, 0.5), -1.5 + random.uniform(-0.5, 0.5)
+# Columns this page reads
+MAP_COLUMNS = ['name', 'town', 'postcode', 'email', 'head_first_name', 'head_last_name', 'has_pupil_premium',
+               'type', 'phase', 'has_send', 'ofsted_rating']
 
-# Load single region
+# Load single region - local data/ first, GitHub otherwise
 @st.cache_data
 def load_region(region):
-    urls = {
-        'Leicester': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/leicester_schools_enriched.csv',
-        'Nottingham': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/nottingham_schools_enriched.csv',
-        'Derbyshire': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/derbyshire_schools_enriched.csv',
-        'Warwickshire': 'https://raw.githubusercontent.com/simonbullows/kosmos/master/data/warwickshire_schools_enriched.csv',
-    }
-    
-    if region not in urls:
-        return None
-    
-    try:
-        df = pd.read_csv(io.StringIO(urllib.request.urlopen(urls[region]).read().decode('utf-8')))
-        df['region'] = region
-        return df
-    except:
-        return None
+    return load_regions([region], columns=MAP_COLUMNS)
+
+# List filter / sort index - built once per region frame
+@st.cache_resource
+def list_index(region, rows, _map_df):
+    return results_index.ResultsIndex(_map_df)
+
+# Region summary - only regions whose CSV changed are re-read
+@st.cache_data(ttl=60)
+def summary_table():
+    summary, _ = region_summary.update_summary()
+    return summary
 
 st.title("🗺️ KOSMOS Schools Map")
 
@@ -58,43 +37,35 @@ regions = ['Leicester', 'Nottingham', 'Derbyshire', 'Warwickshire']
 selected_region = st.selectbox("Select Region", regions)
 
 # Load data
-df = load_region(selected_region)
+df, load_errors = load_region(selected_region)
+
+for failed_region, error in load_errors.items():
+    st.warning(f"⚠️ Could not load {failed_region}: {error}")
 
 if df is not None:
     # Status
-    def get_status(row):
-        has_email = pd.notna(row.get('email', '')) and str(row.get('email', '')).strip() != ''
-        has_head = pd.notna(row.get('head_first_name', '')) or pd.notna(row.get('head_last_name', ''))
-        has_pp = row.get('has_pupil_premium', False)
-        
-        if has_email and has_head and has_pp:
-            return 'green'
-        elif has_email:
-            return 'orange'
-        else:
-            return 'red'
-    
-    df['status'] = df.apply(get_status, axis=1)
+    df['status'] = classify_status(df)
     
-    # Stats - big display
-    total = len(df)
-    green = len(df[df['status'] == 'green'])
-    orange = len(df[df['status'] == 'orange'])
-    red = len(df[df['status'] == 'red'])
+    # Stats - big display, from the summary table
+    stats = region_summary.totals(summary_table(), [selected_region])
+    total = stats['total']
+    green = stats['green']
+    orange = stats['orange']
+    red = stats['red']
     
     st.subheader(f"📊 {selected_region}")
     
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total", total)
-    col2.metric("🟢 Best", green, delta=f"{green/total*100:.0f}%")
-    col3.metric("🟠 Email", orange, delta=f"{orange/total*100:.0f}%")
-    col4.metric("🔴 None", red, delta=f"{red/total*100:.0f}%")
+    col2.metric("🟢 Best", green, delta=f"{green/total*100:.0f}%" if total else "0%")
+    col3.metric("🟠 Email", orange, delta=f"{orange/total*100:.0f}%" if total else "0%")
+    col4.metric("🔴 None", red, delta=f"{red/total*100:.0f}%" if total else "0%")
     
     # Create map data
+    lats, lons = geocode_postcodes(df.get('postcode', pd.Series(index=df.index, dtype=object)))
     map_data = []
-    for _, row in df.iterrows():
-        lat, lon = geocode_uk(row.get('postcode', ''))
-        if lat:
+    for (_, row), lat, lon in zip(df.iterrows(), lats, lons):
+        if pd.notna(lat):
             map_data.append({
                 'lat': lat,
                 'lon': lon,
@@ -103,25 +74,62 @@ if df is not None:
                 'email': str(row.get('email', 'N/A')),
                 'head': f"{row.get('head_first_name', '')} {row.get('head_last_name', '')}".strip(),
                 'has_pp': row.get('has_pupil_premium', False),
+                'has_pupil_premium': row.get('has_pupil_premium') == True,
+                'has_send': row.get('has_send') == True,
+                'type': row.get('type') if pd.notna(row.get('type')) else '',
+                'phase': row.get('phase') if pd.notna(row.get('phase')) else '',
+                'ofsted_rating': row.get('ofsted_rating') if pd.notna(row.get('ofsted_rating')) else '',
                 'status': row.get('status', 'red')
             })
     
     if map_data:
         map_df = pd.DataFrame(map_data)
-        st.map(map_df, zoom=8)
+        # Clustered server-side - only lat/lon/id for what's in view goes to the browser
+        points = map_layer.map_points(map_df)
+        zoom, lat, lon = map_layer.fit_view(points)
+        frame = map_layer.layer_frame(points, zoom, lat, lon)
+        event = st.pydeck_chart(map_layer.deck(frame, zoom, lat, lon), on_select="rerun",
+                                key=f"map:{selected_region}")
+        clicked = map_layer.picked(event)
+        if clicked and clicked['count'] == 1:
+            school = map_df.iloc[int(clicked['id'])]
+            st.info(f"📍 **{school['name']}** - {school['town']} - {school['email']}")
         
         # Legend
         st.caption("🟢 = Email+Head+Pupil Premium | 🟠 = Email only | 🔴 = No email")
         
         # Search
         search = st.text_input("Search schools", "")
+        rows = None
         if search:
-            map_df = map_df[map_df['name'].str.contains(search, case=False, na=False)]
+            rows = map_df.index[map_df['name'].str.contains(search, case=False, na=False)]
+        
+        # Filters + sort, from the list index
+        index = list_index(selected_region, len(map_df), map_df)
+        col1, col2, col3 = st.columns(3)
+        sort = col1.selectbox("Sort by", results_index.SORTS)
+        types = col2.multiselect("Type", index.options('type'))
+        phases = col3.multiselect("Phase", index.options('phase'))
+        col1, col2 = st.columns(2)
+        send_only = col1.checkbox("♿ SEND support only")
+        pp_only = col2.checkbox("Pupil Premium only")
+        filters = {
+            'type': types,
+            'phase': phases,
+            'has_send': True if send_only else None,
+            'has_pupil_premium': True if pp_only else None,
+        }
+        selected = index.select(filters, rows)
         
-        st.metric("Showing", len(map_df))
+        pages = results_index.page_count(len(selected))
+        col1, col2 = st.columns([3, 1])
+        col1.metric("Showing", len(selected))
+        page = col2.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                                 key=f"page:{selected_region}:{search}:{sort}:{filters}")
         
-        # List
-        for _, school in map_df.head(30).iterrows():
+        # List - this page only
+        for i in index.page(selected, sort, page):
+            school = map_df.iloc[i]
             emoji = "🟢" if school['status'] == 'green' else "🟠" if school['status'] == 'orange' else "🔴"
             with st.expander(f"{emoji} {school['name']}"):
                 st.write(f"**Town:** {school['town']}")
@@ -133,16 +141,11 @@ if df is not None:
 # Sidebar with all regions
 st.sidebar.header("📊 All Regions")
 
-region_stats = {
-    'Leicester': (381, 257, 241, 118),
-    'Nottingham': (334, 205, 242, None),
-    'Derbyshire': (485, 281, 331, None),
-    'Warwickshire': (239, 138, 136, None),
-}
+region_counts = region_summary.region_totals(summary_table())
 
-for region, stats in region_stats.items():
-    total, emails, pp, staff = stats
-    st.sidebar.write(f"**{region}:** {total} schools, {emails} emails ({emails/total*100:.0f}%)")
+for region, stats in region_counts.iterrows():
+    total, emails = int(stats['total']), int(stats['email'])
+    st.sidebar.write(f"**{region}:** {total} schools, {emails} emails ({emails/total*100 if total else 0:.0f}%)")
 
 st.sidebar.write("---")
-st.sidebar.write(f"**Total: 1,439 schools**")
+st.sidebar.write(f"**Total: {int(region_counts['total'].sum()):,} schools**")
@@ -0,0 +1,109 @@
+"""
+KOSMOS Map Frame
+Columnar status classification and map-row building for the schools map
+"""
+
+import numpy as np
+import pandas as pd
+
+from geocode import geocode_postcodes
+
+# Text columns copied onto the map frame, with the value used when missing
+TEXT_COLUMNS = {
+    'email': 'MISSING',
+    'phone': 'MISSING',
+    'website': 'MISSING',
+    'head_title': '',
+    'head_first_name': '',
+    'head_last_name': '',
+    'head_job_title': '',
+    'type': 'MISSING',
+    'phase': '',
+    'postcode': 'MISSING',
+    'street': '',
+    'locality': '',
+    'county': '',
+    'all_emails': '',
+    'staff_contacts': '',
+    'ofsted_rating': '',
+    'governors': '',
+}
+
+# Flag columns - True only when confirmed, unknown counts as False
+FLAG_COLUMNS = ['has_pupil_premium', 'has_financial_reports', 'has_send']
+
+# Everything the map frame and metrics read - pass to load_regions(columns=...)
+SOURCE_COLUMNS = ['name', 'town'] + list(TEXT_COLUMNS) + FLAG_COLUMNS
+
+MAP_COLUMNS = [
+    'lat', 'lon', 'name', 'town', 'status',
+    'email', 'phone', 'website',
+    'head_title', 'head_first_name', 'head_last_name', 'head_job_title',
+    'type', 'phase', 'postcode', 'street', 'locality', 'county',
+    'has_pupil_premium', 'has_financial_reports', 'all_emails', 'staff_contacts',
+    'ofsted_rating', 'has_send', 'governors',
+]
+
+
+def _column(df, name):
+    """Return a column, or an all-missing column if the CSV doesn't have it"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(np.nan, index=df.index, dtype=object)
+
+
+def _flag(df, name):
+    """Boolean flag column; NaN/NA (not yet enriched) is False"""
+    return _column(df, name).eq(True).fillna(False).astype(bool)
+
+
+def classify_status(df):
+    """
+    Status per school - only green if ALL three: email + headteacher + pupil premium confirmed
+    """
+    email = _column(df, 'email')
+    has_email = email.notna() & (email.astype(str).str.strip() != '')
+    has_head = _column(df, 'head_first_name').notna() | _column(df, 'head_last_name').notna()
+    has_pp = _flag(df, 'has_pupil_premium')
+
+    status = np.where(has_email & has_head & has_pp, 'green',
+                      np.where(has_email, 'orange', 'red'))
+    return pd.Series(status, index=df.index, name='status')
+
+
+def build_map_frame(df):
+    """Build the map frame (one row per geocoded school) from a region frame"""
+    lat, lon = geocode_postcodes(_column(df, 'postcode'))
+    keep = ~np.isnan(lat)
+    src = df[keep]
+
+    out = {
+        'lat': lat[keep],
+        'lon': lon[keep],
+        'name': _column(src, 'name').fillna('').astype(str),
+        'town': _column(src, 'town').fillna('').astype(str),
+        'status': src['status'] if 'status' in src.columns else classify_status(src),
+    }
+
+    for col, missing in TEXT_COLUMNS.items():
+        values = _column(src, col)
+        out[col] = values.astype(str).where(values.notna(), missing)
+
+    for col in FLAG_COLUMNS:
+        out[col] = _flag(src, col)
+
+    map_df = pd.DataFrame(out, index=src.index)
+    return map_df[MAP_COLUMNS].reset_index(drop=True)
+
+
+def status_counts(df):
+    """Headline metrics for a region frame that already has a status column"""
+    counts = df['status'].value_counts()
+    return {
+        'total': len(df),
+        'green': int(counts.get('green', 0)),
+        'orange': int(counts.get('orange', 0)),
+        'red': int(counts.get('red', 0)),
+        'send': df['has_send'].sum() if 'has_send' in df.columns else 0,
+        'ofsted': df['ofsted_rating'].notna().sum() if 'ofsted_rating' in df.columns else 0,
+    }
@@ -0,0 +1,179 @@
+"""
+KOSMOS Map Layer
+Server-side clustering for the schools map
+
+The browser only ever gets lat/lon/id (+ count for clusters), one layer per
+status colour, and only for the area on screen (plus a margin): at low
+zoom, schools are binned into square Web Mercator cells about CELL_PIXELS
+wide on screen and each cell is drawn as a single circle coloured by its
+most common status. Clicking a cluster zooms in on it; clicking a school
+looks its details up by id on the server.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+from pydeck.bindings.json_tools import default_serialize
+
+STATUSES = ['red', 'orange', 'green']
+STATUS_COLORS = {
+    'green': [34, 139, 34, 200],
+    'orange': [255, 140, 0, 200],
+    'red': [220, 20, 60, 200],
+}
+
+TILE_SIZE = 256
+CELL_PIXELS = 48
+# Send individual schools when there are at most this many in view
+MAX_POINTS = 2000
+# Map size in pixels, and how far past its edges (in map widths) points are still sent
+WIDTH, HEIGHT = 700, 500
+VIEW_MARGIN = 0.5
+MIN_ZOOM, MAX_ZOOM = 5, 16
+# ~1 m - plenty for a map pin, and a third of the JSON of full float precision
+DECIMALS = 5
+# Circle radius in pixels: count * scale, clamped
+RADIUS_SCALE = 0.5
+MIN_RADIUS, MAX_RADIUS = 5, 30
+
+
+def _mercator(lat, lon):
+    """Web Mercator world coordinates in [0, 1)"""
+    x = (np.asarray(lon) + 180.0) / 360.0
+    sin = np.sin(np.radians(np.clip(lat, -85.0, 85.0)))
+    y = 0.5 - np.log((1 + sin) / (1 - sin)) / (4 * np.pi)
+    return x, y
+
+
+def map_points(map_df):
+    """
+    The only columns the map needs: lat, lon, status code, id (row in map_df)
+    + Web Mercator x/y, kept server-side for clustering and cropping
+    """
+    lat = map_df['lat'].to_numpy(dtype='float64')
+    lon = map_df['lon'].to_numpy(dtype='float64')
+    x, y = _mercator(lat, lon)
+    return pd.DataFrame({
+        'lat': lat,
+        'lon': lon,
+        # Anything that isn't a map status is drawn red rather than dropped
+        'status': np.maximum(pd.Categorical(map_df['status'], categories=STATUSES).codes, 0).astype('int8'),
+        'id': np.arange(len(map_df), dtype='int32'),
+        'x': x,
+        'y': y,
+    })
+
+
+def fit_view(points, width=WIDTH, height=HEIGHT):
+    """(zoom, lat, lon) that fits every point on a width x height map"""
+    if points.empty:
+        return MIN_ZOOM + 1, 52.5, -1.5
+    x, y = points['x'], points['y']
+    span_x = max(x.max() - x.min(), 1e-9)
+    span_y = max(y.max() - y.min(), 1e-9)
+    zoom = np.floor(np.log2(min(width / (span_x * TILE_SIZE), height / (span_y * TILE_SIZE))))
+    lat = (points['lat'].min() + points['lat'].max()) / 2
+    lon = (points['lon'].min() + points['lon'].max()) / 2
+    return int(np.clip(zoom, MIN_ZOOM, MAX_ZOOM)), float(lat), float(lon)
+
+
+def cluster(points, zoom, cell_pixels=CELL_PIXELS):
+    """
+    One row per occupied cell: mean lat/lon, count, per-status counts,
+    dominant status, and the school id when the cell holds a single school
+    """
+    if points.empty:
+        return pd.DataFrame(columns=['lat', 'lon', 'count', 'status', 'id'])
+
+    cell = cell_pixels / (TILE_SIZE * 2.0 ** zoom)
+    cx = np.floor(points['x'].to_numpy() / cell).astype(np.int64)
+    cy = np.floor(points['y'].to_numpy() / cell).astype(np.int64)
+    keys, cells = np.unique(cx * (1 << 32) + cy, return_inverse=True)
+
+    n = len(keys)
+    count = np.bincount(cells, minlength=n)
+    lat = np.bincount(cells, weights=points['lat'].to_numpy(), minlength=n) / count
+    lon = np.bincount(cells, weights=points['lon'].to_numpy(), minlength=n) / count
+    by_status = np.stack([
+        np.bincount(cells, weights=(points['status'].to_numpy() == code), minlength=n)
+        for code in range(len(STATUSES))
+    ], axis=1)
+    # Last id seen per cell - only meaningful where count == 1
+    ids = np.full(n, -1, dtype=np.int64)
+    ids[cells] = points['id'].to_numpy()
+
+    return pd.DataFrame({
+        'lat': lat,
+        'lon': lon,
+        'count': count,
+        'status': by_status.argmax(axis=1).astype('int8'),
+        'id': np.where(count == 1, ids, -1),
+    })
+
+
+def in_view(points, zoom, lat, lon, width=WIDTH, height=HEIGHT, margin=VIEW_MARGIN):
+    """Points on a width x height map centred on lat/lon, plus margin map-widths around it"""
+    (cx,), (cy,) = _mercator([lat], [lon])
+    world = TILE_SIZE * 2.0 ** zoom
+    half_x = width / world * (0.5 + margin)
+    half_y = height / world * (0.5 + margin)
+    keep = ((points['x'] - cx).abs() <= half_x) & ((points['y'] - cy).abs() <= half_y)
+    return points[keep]
+
+
+def layer_frame(points, zoom, lat, lon):
+    """What gets drawn for this view - the schools themselves, or clusters"""
+    points = in_view(points, zoom, lat, lon)
+    if len(points) <= MAX_POINTS or zoom >= MAX_ZOOM:
+        return points.assign(count=1)[['lat', 'lon', 'count', 'status', 'id']]
+    return cluster(points, zoom)
+
+
+class CompactDeck(pdk.Deck):
+    """pydeck pretty-prints (indent=2) - over half the bytes of a points layer"""
+
+    def to_json(self):
+        return json.dumps(self, sort_keys=True, default=default_serialize, separators=(',', ':'))
+
+
+def deck(frame, zoom, lat, lon, height=500):
+    """pydeck chart: one ScatterplotLayer per status, data = lat/lon/count/id only"""
+    frame = frame.assign(lat=frame['lat'].round(DECIMALS), lon=frame['lon'].round(DECIMALS))
+
+    layers = []
+    for code, status in enumerate(STATUSES):
+        data = frame.loc[frame['status'] == code, ['lat', 'lon', 'count', 'id']]
+        if data.empty:
+            continue
+        layers.append(pdk.Layer(
+            "ScatterplotLayer",
+            data=data,
+            id=status,
+            get_position="[lon, lat]",
+            get_fill_color=STATUS_COLORS[status],
+            # Bigger clusters, bigger circles - clamped so a city doesn't cover the county
+            get_radius="count",
+            radius_scale=RADIUS_SCALE,
+            radius_units="pixels",
+            radius_min_pixels=MIN_RADIUS,
+            radius_max_pixels=MAX_RADIUS,
+            pickable=True,
+        ))
+
+    return CompactDeck(
+        layers=layers,
+        initial_view_state=pdk.ViewState(latitude=lat, longitude=lon, zoom=zoom),
+        tooltip={"text": "{count} school(s) - click to zoom in / open"},
+        height=height,
+    )
+
+
+def picked(event):
+    """The clicked object from st.pydeck_chart(on_select="rerun"), or None"""
+    objects = getattr(getattr(event, 'selection', None), 'objects', None) or {}
+    for items in objects.values():
+        if items:
+            return items[0]
+    return None
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Parquet Store
+Typed, dictionary-encoded Parquet copies of the enriched school CSVs
+
+Convert everything in data/:
+    python parquet_store.py
+"""
+
+import os
+import sys
+import glob
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+PARQUET_DIR = os.path.join(DATA_DIR, "parquet")
+
+# Low-cardinality text - stored as dictionaries (pandas categoricals)
+CATEGORICAL_COLUMNS = ['type', 'phase', 'county', 'ofsted_rating', 'category', 'region']
+
+# True/False/unknown flags written by the enrichment scripts
+BOOL_COLUMNS = ['has_pupil_premium', 'has_send', 'has_financial_reports']
+
+# Same field, different header in some region exports
+COLUMN_ALIASES = {'town_name': 'town'}
+
+BOOL_VALUES = {'true': True, 'false': False, '1': True, '0': False, 'yes': True, 'no': False}
+
+
+def _to_bool(values):
+    """Object/str/bool column -> nullable boolean (NA where unknown)"""
+    if values.dtype == bool:
+        return values.astype('boolean')
+    mapped = values.map(lambda v: v if isinstance(v, bool) else BOOL_VALUES.get(str(v).strip().lower()))
+    return mapped.astype('boolean')
+
+
+def normalize_frame(df):
+    """Apply the storage schema: aliases, nullable booleans, categoricals"""
+    df = df.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if v not in df.columns})
+
+    for col in BOOL_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_bool(df[col])
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    return df
+
+
+def write_frame(df, path):
+    """Write a normalized frame as zstd Parquet (write-then-rename)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    df.to_parquet(tmp_path, engine='pyarrow', compression='zstd', index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_frame(path, columns=None):
+    """Read a Parquet file, loading only the requested columns that exist"""
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in available]
+    return pd.read_parquet(path, columns=columns)
+
+
+def parquet_path(csv_path, parquet_dir=PARQUET_DIR):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(parquet_dir, f"{name}.parquet")
+
+
+def is_fresh(csv_path, path):
+    """Parquet copy exists and is at least as new as its CSV"""
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+
+def convert_csv(csv_path, parquet_dir=PARQUET_DIR):
+    """Convert one CSV to typed Parquet; returns (frame, parquet path)"""
+    df = normalize_frame(pd.read_csv(csv_path))
+    return df, write_frame(df, parquet_path(csv_path, parquet_dir))
+
+
+def source_csvs(data_dir=DATA_DIR):
+    files = sorted(glob.glob(os.path.join(data_dir, "*_schools_enriched.csv")))
+    export = os.path.join(data_dir, "schools_export.csv")
+    if os.path.exists(export):
+        files.append(export)
+    return files
+
+
+def convert_all(data_dir=DATA_DIR, parquet_dir=PARQUET_DIR):
+    """Convert every enriched region CSV plus schools_export.csv"""
+    print("=" * 50)
+    print("KOSMOS - Parquet Conversion")
+    print("=" * 50)
+
+    written = []
+    for csv_path in source_csvs(data_dir):
+        df, path = convert_csv(csv_path, parquet_dir)
+        csv_kb = os.path.getsize(csv_path) / 1024
+        pq_kb = os.path.getsize(path) / 1024
+        print(f"✓ {os.path.basename(path)}: {len(df)} rows, {csv_kb:.0f} KB -> {pq_kb:.0f} KB")
+        written.append(path)
+
+    print(f"\n✓ Wrote {len(written)} files to {parquet_dir}")
+
+    # Refresh the region summary for any region whose CSV changed
+    from region_summary import update_summary
+    _, updated = update_summary()
+    if updated:
+        print(f"✓ Region summary updated: {', '.join(updated)}")
+    return written
+
+
+if __name__ == "__main__":
+    convert_all(*sys.argv[1:2])
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Region Summary
+Materialized per region / type / phase counts (totals, status, Ofsted,
+SEND, ...) so the apps' sidebars and metric tiles read a few dozen rows
+instead of scanning every school
+
+Stored as data/parquet/region_summary.parquet, with the signature (size +
+mtime, or HTTP ETag for GitHub copies) of each region's source beside it;
+update_summary() only re-reads regions whose source has changed.
+
+    python region_summary.py            # build / refresh
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from map_frame import classify_status
+from parquet_store import PARQUET_DIR, write_frame
+from regions import REGION_FILES, load_region_frame, region_signature
+
+SUMMARY_PATH = os.path.join(PARQUET_DIR, "region_summary.parquet")
+SIGNATURES_PATH = os.path.join(PARQUET_DIR, "region_summary.json")
+
+GROUP_COLUMNS = ['region', 'type', 'phase']
+COUNT_COLUMNS = ['total', 'green', 'orange', 'red', 'email', 'pupil_premium', 'send', 'ofsted',
+                 'financial_reports']
+
+# Only the columns the counts need are read
+SUMMARY_SOURCE_COLUMNS = ['type', 'phase', 'email', 'head_first_name', 'head_last_name',
+                          'has_pupil_premium', 'has_send', 'has_financial_reports', 'ofsted_rating']
+
+
+def _flag(df, name):
+    if name not in df.columns:
+        return pd.Series(False, index=df.index)
+    return df[name].eq(True).fillna(False).astype(bool)
+
+
+def summarize_region(region, df):
+    """One region frame -> its summary rows (one per type + phase)"""
+    status = classify_status(df)
+    counts = pd.DataFrame({
+        'region': region,
+        'type': df['type'].astype(object).fillna('') if 'type' in df.columns else '',
+        'phase': df['phase'].astype(object).fillna('') if 'phase' in df.columns else '',
+        'total': 1,
+        'green': status.eq('green'),
+        'orange': status.eq('orange'),
+        'red': status.eq('red'),
+        'email': status.ne('red'),
+        'pupil_premium': _flag(df, 'has_pupil_premium'),
+        'send': _flag(df, 'has_send'),
+        'ofsted': df['ofsted_rating'].notna() if 'ofsted_rating' in df.columns else False,
+        'financial_reports': _flag(df, 'has_financial_reports'),
+    }, index=df.index)
+    summary = counts.groupby(GROUP_COLUMNS, sort=True, as_index=False)[COUNT_COLUMNS].sum()
+    return summary.astype({c: 'int64' for c in COUNT_COLUMNS})
+
+
+def _read_signatures():
+    if not os.path.exists(SIGNATURES_PATH):
+        return {}
+    with open(SIGNATURES_PATH) as f:
+        return json.load(f)
+
+
+def load_summary():
+    """The stored summary table (empty if it hasn't been built)"""
+    if not os.path.exists(SUMMARY_PATH):
+        return pd.DataFrame(columns=GROUP_COLUMNS + COUNT_COLUMNS)
+    return pd.read_parquet(SUMMARY_PATH)
+
+
+def update_summary(regions=None, force=False):
+    """
+    Recompute the regions whose source changed (all of them with force=True)
+    and keep the stored rows for the rest; returns (summary, regions updated)
+    """
+    regions = list(regions or REGION_FILES)
+    signatures = _read_signatures()
+    summary = load_summary()
+
+    stale = [r for r in regions
+             if force or signatures.get(r) is None or signatures.get(r) != region_signature(r)]
+    if not stale:
+        return summary, []
+
+    fresh, updated = [], []
+    for region in stale:
+        try:
+            df = load_region_frame(region, columns=SUMMARY_SOURCE_COLUMNS)
+        except Exception as e:
+            # Keep the last good rows for a region we can't reach
+            print(f"✗ {region}: {e}")
+            continue
+        fresh.append(summarize_region(region, df))
+        updated.append(region)
+        # Read after loading - a GitHub region only has an ETag once it's been fetched
+        signatures[region] = region_signature(region)
+
+    if not updated:
+        return summary, []
+    kept = summary[~summary['region'].isin(updated)]
+    summary = pd.concat([kept, *fresh], ignore_index=True)
+    summary = summary.sort_values(GROUP_COLUMNS, kind='stable').reset_index(drop=True)
+    summary = summary.astype({c: 'int64' for c in COUNT_COLUMNS})
+
+    write_frame(summary, SUMMARY_PATH)
+    with open(SIGNATURES_PATH + ".tmp", 'w') as f:
+        json.dump(signatures, f, indent=2, sort_keys=True)
+    os.replace(SIGNATURES_PATH + ".tmp", SIGNATURES_PATH)
+    return summary, updated
+
+
+def region_totals(summary, regions=None):
+    """Counts per region (index) - pass regions to restrict and order them"""
+    totals = summary.groupby('region')[COUNT_COLUMNS].sum()
+    if regions is not None:
+        totals = totals.reindex([r for r in regions if r in totals.index])
+    return totals
+
+
+def totals(summary, regions=None):
+    """One set of headline counts (dict) across the given regions"""
+    rows = region_totals(summary, regions)
+    return {c: int(rows[c].sum()) for c in COUNT_COLUMNS}
+
+
+if __name__ == "__main__":
+    summary, updated = update_summary(force=True)
+    print(f"✓ {len(summary)} summary rows, {len(updated)} regions updated -> {SUMMARY_PATH}")
+    print(region_totals(summary).to_string())
@@ -0,0 +1,166 @@
+"""
+KOSMOS Region Loader
+Loads enriched school CSVs per region - local files first, then GitHub -
+in parallel, with an on-disk cache validated by file mtime or HTTP ETag
+
+Both local and cached copies are typed Parquet (see parquet_store.py),
+so callers can ask for just the columns they need.
+"""
+
+import os
+import io
+import json
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from parquet_store import (
+    DATA_DIR, convert_csv, is_fresh, normalize_frame, parquet_path, read_frame, write_frame,
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("KOSMOS_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "regions"))
+
+RAW_URL = "https://raw.githubusercontent.com/simonbullows/kosmos/master/data"
+
+REGION_FILES = {
+    'Leicester': 'leicester_schools_enriched.csv',
+    'Nottingham': 'nottingham_schools_enriched.csv',
+    'Derbyshire': 'derbyshire_schools_enriched.csv',
+    'Warwickshire': 'warwickshire_schools_enriched.csv',
+    'Staffordshire': 'staffordshire_schools_enriched.csv',
+    'Birmingham': 'birmingham_schools_enriched.csv',
+    'Dudley': 'dudley_schools_enriched.csv',
+    'Walsall': 'walsall_schools_enriched.csv',
+    'Wolverhampton': 'wolverhampton_schools_enriched.csv',
+}
+
+# Bounded pool - one connection per region is plenty for raw.githubusercontent.com
+MAX_WORKERS = 9
+TIMEOUT = 30
+
+
+def _cache_paths(region):
+    key = REGION_FILES[region].replace('.csv', '')
+    return os.path.join(CACHE_DIR, f"{key}.parquet"), os.path.join(CACHE_DIR, f"{key}.meta.json")
+
+
+def _read_cache(region):
+    frame_path, meta_path = _cache_paths(region)
+    if not (os.path.exists(frame_path) and os.path.exists(meta_path)):
+        return None, {}
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return frame_path, meta
+
+
+def _write_cache(region, df, meta):
+    frame_path, meta_path = _cache_paths(region)
+    # Write-then-rename so a concurrent reader never sees half a file
+    write_frame(df, frame_path)
+    with open(meta_path + ".tmp", 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def _load_local(path, columns=None):
+    """Local CSV via its Parquet copy, reconverted whenever the CSV is newer"""
+    pq_path = parquet_path(path)
+    if is_fresh(path, pq_path):
+        return read_frame(pq_path, columns)
+
+    df, _ = convert_csv(path)
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+
+def _load_remote(region, url, columns=None):
+    """GitHub CSV, revalidated with If-None-Match / If-Modified-Since"""
+    frame_path, meta = _read_cache(region)
+    cached = frame_path if meta.get('source') == url else None
+
+    request = urllib.request.Request(url)
+    if cached and meta.get('etag'):
+        request.add_header('If-None-Match', meta['etag'])
+    if cached and meta.get('last_modified'):
+        request.add_header('If-Modified-Since', meta['last_modified'])
+
+    try:
+        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+            body = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return read_frame(cached, columns)
+        raise
+    except urllib.error.URLError:
+        # Offline - a previously fetched copy beats no region at all
+        if cached:
+            return read_frame(cached, columns)
+        raise
+
+    df = normalize_frame(pd.read_csv(io.StringIO(body.decode('utf-8'))))
+    _write_cache(region, df, {
+        'source': url,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+    })
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+
+def load_region_frame(region, columns=None):
+    """
+    Load one region's enriched data; raises if it can't be loaded
+    columns: optional projection - only these columns are read from Parquet
+    """
+    filename = REGION_FILES[region]
+    local_path = os.path.join(DATA_DIR, filename)
+
+    if os.path.exists(local_path):
+        df = _load_local(local_path, columns)
+    else:
+        df = _load_remote(region, f"{RAW_URL}/{filename}", columns)
+
+    df['region'] = region
+    return df
+
+
+def region_signature(region):
+    """
+    Identifies the region's current data - changes whenever the local CSV
+    (size + mtime) or the GitHub copy (ETag) does; None if never loaded
+    """
+    local_path = os.path.join(DATA_DIR, REGION_FILES[region])
+    if os.path.exists(local_path):
+        stat = os.stat(local_path)
+        return f"local:{stat.st_size}:{stat.st_mtime_ns}"
+
+    _, meta = _read_cache(region)
+    if meta:
+        return f"remote:{meta.get('etag') or meta.get('last_modified')}"
+    return None
+
+
+def load_regions(regions, columns=None, max_workers=MAX_WORKERS):
+    """
+    Load several regions concurrently
+    Returns (combined frame or None, {region: error message}) - regions in input order
+    """
+    regions = [r for r in regions if r in REGION_FILES]
+    frames = {}
+    errors = {}
+
+    def load(region):
+        try:
+            frames[region] = load_region_frame(region, columns)
+        except Exception as e:
+            errors[region] = str(e) or e.__class__.__name__
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(regions)))) as pool:
+        list(pool.map(load, regions))
+
+    dfs = [frames[r] for r in regions if r in frames]
+    if not dfs:
+        return None, errors
+    return pd.concat(dfs, ignore_index=True), errors
@@ -0,0 +1,128 @@
+"""
+KOSMOS Results Index
+Filter / sort / page index over a map frame, for the school list
+
+Built once per region frame (cache it): a posting list (sorted row
+positions) per value of each filter column, and a precomputed rank per
+sort order. A query intersects the posting lists for the chosen filters,
+orders what's left by rank and returns one page of row positions - the
+frame itself is never masked or re-sorted.
+
+    index = ResultsIndex(map_df)
+    selected = index.select({'phase': ['Primary'], 'has_send': True})
+    map_df.iloc[index.page(selected, sort='Ofsted', page=2)]
+"""
+
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ['type', 'phase', 'has_send', 'has_pupil_premium']
+# Values that mean "we don't know" - never offered as filter options
+MISSING_VALUES = {'', 'MISSING'}
+
+STATUS_ORDER = ['green', 'orange', 'red']
+OFSTED_ORDER = ['Outstanding', 'Good', 'Requires improvement', 'Inadequate',
+                'Serious weaknesses', 'Special measures']
+
+# 'Relevance' keeps the order rows come in (search rank, or the frame's own)
+SORTS = ['Relevance', 'Status', 'Ofsted', 'Town', 'Name']
+
+PAGE_SIZE = 25
+
+
+def _order_codes(values, order):
+    """Position in `order`, unknown values after all of them"""
+    codes = pd.Categorical(values, categories=order).codes.astype(np.int64)
+    return np.where(codes < 0, len(order), codes)
+
+
+def _text_codes(values):
+    """Case-insensitive alphabetical codes, blanks last"""
+    text = pd.Series(values, dtype=object).fillna('').astype(str).str.strip().str.lower()
+    categories = sorted(set(text) - {''})
+    codes = pd.Categorical(text, categories=categories).codes.astype(np.int64)
+    return np.where(codes < 0, len(categories), codes)
+
+
+def _ranks(*keys):
+    """Rank of each row under a lexicographic sort on keys (first key most significant)"""
+    order = np.lexsort(keys[::-1])
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    return ranks
+
+
+class ResultsIndex:
+    def __init__(self, map_df):
+        self.size = len(map_df)
+        self.postings = {}
+        for column in FILTER_COLUMNS:
+            if column not in map_df.columns:
+                continue
+            values = map_df[column].to_numpy()
+            codes, uniques = pd.factorize(values)
+            positions = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[positions], np.arange(len(uniques) + 1))
+            self.postings[column] = {
+                value: positions[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)
+            }
+
+        name = _text_codes(map_df['name'])
+        self.ranks = {
+            'Status': _ranks(_order_codes(map_df['status'], STATUS_ORDER), name),
+            'Ofsted': _ranks(_order_codes(map_df['ofsted_rating'], OFSTED_ORDER), name),
+            'Town': _ranks(_text_codes(map_df['town']), name),
+            'Name': _ranks(name),
+        }
+
+    def options(self, column):
+        """Filter values on offer for a column, most common first"""
+        postings = self.postings.get(column, {})
+        values = [v for v in postings if not (isinstance(v, str) and v in MISSING_VALUES)]
+        return sorted(values, key=lambda v: (-len(postings[v]), str(v)))
+
+    def select(self, filters=None, rows=None):
+        """
+        Row positions matching every filter - {column: value or list of values}
+        (a list matches any of them). rows restricts to those positions, in order
+        """
+        selected = None
+        for column, wanted in (filters or {}).items():
+            if column not in self.postings or wanted is None:
+                continue
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            if not wanted:
+                continue
+            postings = self.postings[column]
+            hits = np.concatenate([postings.get(v, np.empty(0, dtype=np.int64)) for v in wanted])
+            selected = np.unique(hits) if selected is None else np.intersect1d(selected, hits, assume_unique=True)
+
+        if rows is None:
+            return np.arange(self.size) if selected is None else selected
+        rows = np.asarray(rows, dtype=np.int64)
+        if selected is None:
+            return rows
+        return rows[np.isin(rows, selected, assume_unique=True)]
+
+    def sort(self, rows, sort='Relevance'):
+        """rows reordered by one of SORTS - Relevance leaves them as they are"""
+        if sort not in self.ranks:
+            return rows
+        return rows[np.argsort(self.ranks[sort][rows], kind='stable')]
+
+    def page(self, selected, sort='Relevance', page=1, page_size=PAGE_SIZE):
+        """Row positions on one page (counting from 1) of the selected rows"""
+        start = (max(page, 1) - 1) * page_size
+        stop = min(start + page_size, len(selected))
+        if start >= stop:
+            return selected[:0]
+        if sort in self.ranks and stop < len(selected):
+            # Only the rows up to the end of this page need to be in order
+            keys = self.ranks[sort][selected]
+            top = np.argpartition(keys, stop - 1)[:stop]
+            return selected[top[np.argsort(keys[top], kind='stable')]][start:stop]
+        return self.sort(selected, sort)[start:stop]
+
+
+def page_count(total, page_size=PAGE_SIZE):
+    return max(1, -(-total // page_size))
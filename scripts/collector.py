@@ -7,9 +7,14 @@ Base script for collecting UK public data
 import json
 import csv
 import os
+import sys
 from datetime import datetime
 
-DATA_DIR = "/home/ubuntu/.openclaw/workspace/kronos/data"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scrapers"))
+
+from storage import DATA_ROOT, atomic_open
+
+DATA_DIR = DATA_ROOT
 
 def ensure_dir(category):
     """Ensure data directory exists"""
@@ -20,7 +25,7 @@ def ensure_dir(category):
 def save_json(data, category, filename):
     """Save data as JSON"""
     path = os.path.join(ensure_dir(category), filename)
-    with open(path, 'w') as f:
+    with atomic_open(path) as f:
         json.dump(data, f, indent=2)
     print(f"✓ Saved {len(data)} records to {path}")
     return path
@@ -28,7 +33,7 @@ def save_json(data, category, filename):
 def save_csv(data, category, filename, headers):
     """Save data as CSV"""
     path = os.path.join(ensure_dir(category), filename)
-    with open(path, 'w', newline='') as f:
+    with atomic_open(path, newline='') as f:
         writer = csv.DictWriter(f, fieldnames=headers)
         writer.writeheader()
         writer.writerows(data)
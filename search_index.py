@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Search Index
+One SQLite FTS5 (trigram) index over every entity we hold - region schools,
+the schools export, universities, and whatever the scrapers have collected
+(companies + directors, charities + trustees, MPs and Lords)
+
+Indexed: names, towns, postcodes, people (heads, governors, trustees,
+directors, contacts) and email addresses.
+
+    python search_index.py build
+    python search_index.py "st marys leicester"
+
+Search is two passes: an exact substring match ranked by bm25, then - if
+that doesn't fill the page - a typo-tolerant pass where each query word may
+also match its closest spellings from a trigram index of indexed words.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+from parquet_store import DATA_DIR
+from regions import REGION_FILES, load_region_frame
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.environ.get("KOSMOS_SEARCH_INDEX", os.path.join(DATA_DIR, "search.db"))
+
+SCHEMA = """
+CREATE VIRTUAL TABLE documents USING fts5(
+    name, town, postcode, people, emails,
+    kind UNINDEXED, key UNINDEXED, region UNINDEXED, detail UNINDEXED,
+    tokenize = 'trigram'
+);
+-- Distinct words of names / towns / people, for correcting typos in queries
+CREATE VIRTUAL TABLE words USING fts5(word, tokenize = 'trigram');
+"""
+
+# bm25 column weights: name, town, postcode, people, emails (+ the unindexed columns)
+WEIGHTS = (10.0, 2.0, 4.0, 3.0, 2.0, 0.0, 0.0, 0.0, 0.0)
+
+# Typo-tolerant pass: each query word may also match up to FUZZY_ALTERNATIVES
+# indexed words at least FUZZY_MIN_SIMILARITY alike, then the top FUZZY_RESULTS
+# documents are reranked by similarity to the query
+FUZZY_ALTERNATIVES = 4
+FUZZY_MIN_SIMILARITY = 0.7
+FUZZY_RESULTS = 200
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Natural-key prefix (database/loader.py) -> document kind
+KEY_KINDS = {"school": "school", "company": "company", "charity": "charity", "mp": "politician", "lord": "politician"}
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+
+def _join(*values):
+    return " | ".join(v for v in (_text(v) for v in values) if v)
+
+
+def region_documents(data_dir=DATA_DIR):
+    """Enriched region schools - keyed so the app can match them back by (name, town)"""
+    for region, filename in REGION_FILES.items():
+        if not os.path.exists(os.path.join(data_dir, filename)):
+            continue
+        df = load_region_frame(region)
+        for row in df.to_dict('records'):
+            head = " ".join(_text(row.get(c)) for c in ('head_title', 'head_first_name', 'head_last_name')).strip()
+            yield {
+                "kind": "school",
+                "key": f"region:{region}:{_text(row.get('name'))}|{_text(row.get('town'))}",
+                "name": _text(row.get('name')),
+                "town": _text(row.get('town')),
+                "postcode": _text(row.get('postcode')),
+                "people": _join(head, row.get('governors')),
+                "emails": _join(row.get('email'), row.get('all_emails'), row.get('staff_contacts')),
+                "region": region,
+                "detail": _text(row.get('type')),
+            }
+
+
+def export_documents(data_dir=DATA_DIR):
+    """schools_export.csv - every school and children's centre in England"""
+    path = os.path.join(data_dir, "schools_export.csv")
+    if not os.path.exists(path):
+        return
+    df = pd.read_csv(path, dtype=str).fillna("")
+    for i, row in enumerate(df.itertuples(index=False)):
+        yield {
+            "kind": "school",
+            "key": f"export:{i}",
+            "name": row.name,
+            "town": row.town,
+            "postcode": row.postcode,
+            "people": "",
+            "emails": "",
+            "region": row.county,
+            "detail": row.category,
+        }
+
+
+def university_documents(data_dir=DATA_DIR):
+    path = os.path.join(data_dir, "universities_enriched.csv")
+    if not os.path.exists(path):
+        return
+    df = pd.read_csv(path, dtype=str).fillna("")
+    for row in df.to_dict('records'):
+        yield {
+            "kind": "university",
+            "key": f"university:{row['name']}",
+            "name": row['name'],
+            "town": "",
+            "postcode": "",
+            "people": row.get('key_contacts', ''),
+            "emails": row.get('emails', ''),
+            "region": row.get('region', ''),
+            "detail": row.get('type', ''),
+        }
+
+
+def scraper_documents(data_dir=DATA_DIR):
+    """Scraper outputs, through the database loader's mappings"""
+    sys.path.insert(0, os.path.join(BASE_DIR, "database"))
+    import loader
+
+    columns = loader.ENTITY_COLUMNS
+    contact_columns = loader.CONTACT_COLUMNS
+
+    for kind, path in loader.source_files(data_dir):
+        _, mapper = loader.MAPPERS[kind]
+        for record in loader.iter_records(path):
+            for table, row in mapper(record):
+                if table == "contacts":
+                    contact = dict(zip(contact_columns, row))
+                    yield {"merge_into": contact["entity_id"], "people": _text(contact["name"]),
+                           "emails": _text(contact["email"])}
+                    continue
+                entity = dict(zip(columns, row))
+                yield {
+                    "kind": KEY_KINDS.get(entity["natural_key"].split(":")[0], "other"),
+                    "key": entity["natural_key"],
+                    "id": entity["id"],
+                    "name": _text(entity["name"]),
+                    "town": _text(entity["city"]),
+                    "postcode": _text(entity["postcode"]),
+                    "people": "",
+                    "emails": _text(entity["email"]),
+                    "region": _text(entity["county"]),
+                    "detail": _text(entity["subcategory"]),
+                }
+
+
+def companies_dataset_documents():
+    """Companies House bulk snapshot (src/scrapers/companies_house_bulk.py), if ingested"""
+    sys.path.insert(0, os.path.join(BASE_DIR, "src", "scrapers"))
+    from companies_house_bulk import DATASET_DIR
+
+    if not os.path.isdir(DATASET_DIR):
+        return
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(DATASET_DIR, format="parquet", partitioning="hive")
+    for batch in dataset.to_batches(columns=["company_number", "name", "address", "sic_section"]):
+        for row in batch.to_pylist():
+            address = row["address"] or {}
+            yield {
+                "kind": "company",
+                "key": f"company:{row['company_number']}",
+                "name": _text(row["name"]),
+                "town": _text(address.get("locality")),
+                "postcode": _text(address.get("postal_code")),
+                "people": "",
+                "emails": "",
+                "region": _text(address.get("region")),
+                "detail": f"SIC {row['sic_section']}",
+            }
+
+
+def collect_documents(data_dir=DATA_DIR):
+    """Every document, one per key - people/emails from repeats are merged in"""
+    docs = {}
+    by_id = {}
+
+    sources = [
+        region_documents(data_dir), export_documents(data_dir), university_documents(data_dir),
+        companies_dataset_documents(), scraper_documents(data_dir),
+    ]
+    for source in sources:
+        for doc in source:
+            target = by_id.get(doc.get("merge_into")) if "merge_into" in doc else docs.get(doc["key"])
+            if target is None:
+                if "merge_into" in doc:
+                    continue
+                docs[doc["key"]] = doc
+                if "id" in doc:
+                    by_id[doc["id"]] = doc
+                continue
+            for field in ("people", "emails"):
+                if doc.get(field) and doc[field] not in target[field]:
+                    target[field] = _join(target[field], doc[field])
+            for field in ("name", "town", "postcode", "region", "detail"):
+                if doc.get(field) and not target[field]:
+                    target[field] = doc[field]
+            if "id" in doc:
+                by_id[doc["id"]] = target
+
+    return list(docs.values())
+
+
+def build_index(path=INDEX_PATH, data_dir=DATA_DIR):
+    """Rebuild the index from scratch (write-then-rename); returns the document count"""
+    docs = collect_documents(data_dir)
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(SCHEMA)
+    with conn:
+        conn.executemany(
+            "INSERT INTO documents (name, town, postcode, people, emails, kind, key, region, detail) "
+            "VALUES (:name, :town, :postcode, :people, :emails, :kind, :key, :region, :detail)",
+            docs
+        )
+    words = set()
+    for doc in docs:
+        for field in ("name", "town", "people"):
+            words.update(w for w in WORD_RE.findall(doc[field].lower()) if len(w) >= 3)
+    with conn:
+        conn.executemany("INSERT INTO words (word) VALUES (?)", ((w,) for w in sorted(words)))
+    conn.execute("INSERT INTO documents (documents) VALUES ('optimize')")
+    conn.execute("INSERT INTO words (words) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+
+    os.replace(tmp_path, path)
+    print(f"✓ Indexed {len(docs):,} documents to {path}")
+    return len(docs)
+
+
+def open_index(path=INDEX_PATH):
+    """Read-only connection, shareable across Streamlit sessions"""
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _trigrams(text):
+    text = text.lower()
+    return sorted({text[i:i + 3] for i in range(len(text) - 2) if " " not in text[i:i + 3]})
+
+
+def _filters(kinds, regions):
+    sql, params = "", []
+    if kinds:
+        sql += f" AND kind IN ({', '.join('?' * len(kinds))})"
+        params += list(kinds)
+    if regions:
+        sql += f" AND region IN ({', '.join('?' * len(regions))})"
+        params += list(regions)
+    return sql, params
+
+
+COLUMNS = ["kind", "key", "name", "town", "postcode", "region", "detail", "people", "emails"]
+SELECT = f"SELECT {', '.join(COLUMNS)}, bm25(documents, {', '.join(map(str, WEIGHTS))}) AS score FROM documents"
+
+
+def _rows(cursor):
+    return [dict(zip(COLUMNS + ["score"], row)) for row in cursor]
+
+
+def search(conn, query, limit=20, kinds=None, regions=None):
+    """
+    Ranked matches for `query` - list of dicts (kind, key, name, town, postcode, ...)
+    kinds: e.g. ["school"]; regions: e.g. ["Leicester"]
+    """
+    query = " ".join(query.split())
+    if not query:
+        return []
+
+    where, params = _filters(kinds, regions)
+
+    # Trigrams need 3+ characters - short queries are a name-prefix scan
+    if len(query) < 3:
+        return _rows(conn.execute(
+            f"{SELECT} WHERE name LIKE ? {where} LIMIT ?", [query + "%"] + params + [limit]
+        ))
+
+    # 1. Exact substring anywhere in the indexed columns
+    results = _rows(conn.execute(
+        f"{SELECT} WHERE documents MATCH ? {where} ORDER BY score LIMIT ?",
+        [_quote(query)] + params + [limit]
+    ))
+    if len(results) >= limit:
+        return results
+
+    # 2. Typo tolerant: every word (or a close spelling of it) somewhere in the document
+    terms = []
+    for word in WORD_RE.findall(query.lower()):
+        alternatives = _alternatives(conn, word) if len(word) >= 3 else [word]
+        if len(word) >= 3:
+            terms.append("(" + " OR ".join(_quote(w) for w in alternatives) + ")")
+    if not terms:
+        return results
+
+    seen = {r["key"] for r in results}
+    fuzzy = _rows(conn.execute(
+        f"{SELECT} WHERE documents MATCH ? {where} ORDER BY score LIMIT ?",
+        [" AND ".join(terms)] + params + [FUZZY_RESULTS]
+    ))
+
+    # bm25 can't tell a close spelling from a distant one - rerank by similarity to the name
+    needle = query.lower()
+    matcher = SequenceMatcher(None, "", needle)
+    span = len(needle.split())
+    scored = []
+    for i, row in enumerate(fuzzy):
+        if row["key"] in seen:
+            continue
+        # Best window of the name as long as the query ("latmer primary" vs "the latimer primary school")
+        words = row["name"].lower().split()
+        best = 0.0
+        for start in range(max(1, len(words) - span + 1)):
+            matcher.set_seq1(" ".join(words[start:start + span]))
+            best = max(best, matcher.ratio())
+        scored.append((-best, i, row))
+    scored.sort()
+
+    return results + [row for _, _, row in scored[:limit - len(results)]]
+
+
+def _alternatives(conn, word):
+    """The word itself plus the closest indexed words of similar length sharing a trigram"""
+    trigrams = _trigrams(word)
+    candidates = conn.execute(
+        "SELECT word FROM words WHERE words MATCH ? AND length(word) BETWEEN ? AND ?",
+        [" OR ".join(_quote(t) for t in trigrams), len(word) - 2, len(word) + 2]
+    )
+
+    # SequenceMatcher caches the second sequence - compare every candidate against `word`
+    matcher = SequenceMatcher(None, "", word)
+    scored = []
+    for (candidate,) in candidates:
+        if candidate == word:
+            continue
+        matcher.set_seq1(candidate)
+        if matcher.quick_ratio() >= FUZZY_MIN_SIMILARITY:
+            score = matcher.ratio()
+            if score >= FUZZY_MIN_SIMILARITY:
+                scored.append((score, candidate))
+
+    scored.sort(reverse=True)
+    return [word] + [c for _, c in scored[:FUZZY_ALTERNATIVES]]
+
+
+def filter_frame(df, hits):
+    """Rows of a region frame that match `hits` (region documents), in rank order"""
+    rank = {}
+    for i, hit in enumerate(hits):
+        rank.setdefault((hit["name"], hit["town"]), i)
+    keys = zip(df['name'].astype(str).str.strip(), df['town'].astype(str).str.strip())
+    order = pd.Series([rank.get(key) for key in keys], index=df.index, dtype=float)
+    return df[order.notna()].assign(_rank=order).sort_values('_rank').drop(columns='_rank')
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        build_index()
+    elif len(sys.argv) > 1:
+        import time
+
+        conn = open_index()
+        start = time.perf_counter()
+        hits = search(conn, " ".join(sys.argv[1:]))
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{hit['kind']:<11} {hit['name']} - {hit['town']} {hit['postcode']} ({hit['region']})")
+        print(f"\n{len(hits)} results in {elapsed:.1f} ms")
+    else:
+        print("Usage: python search_index.py build | <query>")
@@ -7,14 +7,23 @@ Runs all scrapers to collect UK public data
 import os
 import sys
 import json
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Add src directory to path
+# Add src directory to path (and scrapers/, for the scrapers' shared modules)
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "scrapers"))
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+from checkpoint import Checkpoint
+from storage import DATA_ROOT
+
+DATA_DIR = DATA_ROOT
 COLLECTION_LOG = os.path.join(DATA_DIR, "collection_log.jsonl")
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+
+
+_log_lock = threading.Lock()
 
 
 def log_collection(category, source, count, status="success"):
@@ -27,88 +36,97 @@ def log_collection(category, source, count, status="success"):
         "status": status
     }
     
-    with open(COLLECTION_LOG, 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    # Collectors run concurrently - one writer at a time
+    with _log_lock:
+        with open(COLLECTION_LOG, 'a') as f:
+            f.write(json.dumps(log_entry) + '\n')
     
     return log_entry
 
 
-def run_collectors():
-    """Run all data collectors"""
+def collect_companies(checkpoint):
+    from scrapers.companies_house import collect_top_companies
+    return collect_top_companies(count=100, checkpoint=checkpoint)
+
+
+def collect_schools(checkpoint):
+    # One CSV download - nothing to resume part way through. It either
+    # arrives and is parsed whole or the collector returns nothing
+    from scrapers.uk_schools import collect_all_schools
+    schools = collect_all_schools()
+    if schools:
+        checkpoint.finish(collected=len(schools))
+    return schools
+
+
+def collect_charities(checkpoint):
+    from scrapers.charity_commission import collect_sample_charities
+    return collect_sample_charities(count=50, checkpoint=checkpoint)
+
+
+def collect_politicians(checkpoint):
+    from scrapers.parliament_api import collect_parliament_data
+    return collect_parliament_data(checkpoint=checkpoint)
+
+
+# (name, checkpoint, log category, log source, collector)
+# Each collector has its own API and its own rate limiter, so they run side by side
+COLLECTORS = [
+    ("Companies", "companies", "businesses", "Companies House API", collect_companies),
+    ("Schools", "schools", "education", "DfE Schools CSV", collect_schools),
+    ("Charities", "charities", "charities", "Charity Commission API", collect_charities),
+    ("Politicians", "parliament", "politics", "UK Parliament API", collect_politicians),
+]
+
+
+def run_collector(name, checkpoint_name, category, source, collect, resume=False):
+    """Run one collector under its checkpoint; returns a results row"""
+    checkpoint = Checkpoint(os.path.join(CHECKPOINT_DIR, checkpoint_name))
+    
+    if not resume:
+        checkpoint.reset()
+    elif checkpoint.complete:
+        count = checkpoint.get("collected", 0)
+        print(f"✓ {name}: already complete ({count:,} records), skipping")
+        return (name, count)
+    
+    try:
+        records = collect(checkpoint)
+        # Each collector finishes its own checkpoint once it has reached the
+        # end of its work. The scrapers swallow network errors and return what
+        # they have, so anything short of that is left for --resume
+        if not checkpoint.complete:
+            print(f"… {name}: stopped part way ({len(records):,} records) - --resume carries on")
+            log_collection(category, source, len(records), "incomplete")
+        else:
+            log_collection(category, source, len(records))
+        return (name, len(records))
+    except Exception as e:
+        # Progress so far stays in the checkpoint for --resume
+        print(f"✗ {name} error: {e}")
+        log_collection(category, source, 0, str(e))
+        return (name, 0, str(e))
+
+
+def run_collectors(resume=False):
+    """
+    Run all data collectors concurrently
+    resume: carry on from the checkpoints of a previous (interrupted) run
+    """
     
     print("=" * 60)
     print("K O S M O S - Data Collection System")
     print("=" * 60)
     print(f"\nStarted at: {datetime.now().isoformat()}")
     print(f"Data directory: {DATA_DIR}")
+    print(f"Checkpoints: {CHECKPOINT_DIR}{' (resuming)' if resume else ''}")
+    print(f"Collectors: {', '.join(c[0] for c in COLLECTORS)}")
     
-    results = []
+    os.makedirs(DATA_DIR, exist_ok=True)
     
-    # 1. Companies House
-    print("\n" + "-" * 60)
-    print("1. COMPANIES HOUSE (Top UK Companies)")
-    print("-" * 60)
-    
-    try:
-        from scrapers.companies_house import collect_top_companies
-        companies = collect_top_companies(count=100)
-        log_collection("businesses", "Companies House API", len(companies))
-        results.append(("Companies", len(companies)))
-    except Exception as e:
-        print(f"✗ Error: {e}")
-        log_collection("businesses", "Companies House API", 0, str(e))
-        results.append(("Companies", 0, str(e)))
-    
-    time.sleep(2)  # Rate limiting between collectors
-    
-    # 2. UK Schools
-    print("\n" + "-" * 60)
-    print("2. UK SCHOOLS (DfE Get Information About Schools)")
-    print("-" * 60)
-    
-    try:
-        from scrapers.uk_schools import collect_all_schools
-        schools = collect_all_schools()
-        log_collection("education", "DfE Schools CSV", len(schools))
-        results.append(("Schools", len(schools)))
-    except Exception as e:
-        print(f"✗ Error: {e}")
-        log_collection("education", "DfE Schools CSV", 0, str(e))
-        results.append(("Schools", 0, str(e)))
-    
-    time.sleep(2)
-    
-    # 3. Charity Commission
-    print("\n" + "-" * 60)
-    print("3. CHARITY COMMISSION (UK Charities)")
-    print("-" * 60)
-    
-    try:
-        from scrapers.charity_commission import collect_sample_charities
-        charities = collect_sample_charities(count=50)
-        log_collection("charities", "Charity Commission API", len(charities))
-        results.append(("Charities", len(charities)))
-    except Exception as e:
-        print(f"✗ Error: {e}")
-        log_collection("charities", "Charity Commission API", 0, str(e))
-        results.append(("Charities", 0, str(e)))
-    
-    time.sleep(2)
-    
-    # 4. UK Parliament
-    print("\n" + "-" * 60)
-    print("4. UK PARLIAMENT (MPs and Lords)")
-    print("-" * 60)
-    
-    try:
-        from scrapers.parliament_api import collect_parliament_data
-        politicians = collect_parliament_data()
-        log_collection("politics", "UK Parliament API", len(politicians))
-        results.append(("Politicians", len(politicians)))
-    except Exception as e:
-        print(f"✗ Error: {e}")
-        log_collection("politics", "UK Parliament API", 0, str(e))
-        results.append(("Politicians", 0, str(e)))
+    with ThreadPoolExecutor(max_workers=len(COLLECTORS)) as pool:
+        futures = [pool.submit(run_collector, *collector, resume=resume) for collector in COLLECTORS]
+        results = [future.result() for future in futures]
     
     # Summary
     print("\n" + "=" * 60)
@@ -122,14 +140,17 @@ def run_collectors():
         if error:
             print(f"  {name}: ERROR - {error[0]}")
         else:
-            print(f"  {name}: {:,} records".format(count))
+            print(f"  {name}: {count:,} records")
             total += count
     
     print(f"\nTOTAL: {total:,} records")
     print(f"\nCollection log: {COLLECTION_LOG}")
     
+    import http_cache
+    http_cache.print_stats()
+    
     return results
 
 
 if __name__ == "__main__":
-    run_collectors()
+    run_collectors(resume="--resume" in sys.argv)
@@ -5,15 +5,15 @@ FREE - Official UK Charity Register
 https://register-of-charities.charitycommission.gov.uk/
 """
 
-import requests
-import json
-import time
 import os
 from datetime import datetime
 
+import http_cache
+from rate_limit import Limiter
+from storage import category_dir, open_store
+
 BASE_URL = "https://api.charitycommission.gov.uk/api/v1"
-DATA_DIR = "/home/ubuntu/.openclaw/workspace/kosmos/data/charities"
-OUTPUT_FILE = os.path.join(DATA_DIR, "charities.json")
+DATA_DIR = category_dir("charities")
 
 # API requires registration
 # Basic data available via downloads at:
@@ -22,6 +22,9 @@ OUTPUT_FILE = os.path.join(DATA_DIR, "charities.json")
 API_KEY = os.environ.get("CHARITY_COMMISSION_API_KEY", "")
 HEADERS = {"ApiKey": API_KEY} if API_KEY else {}
 
+# No published limit - stay polite
+LIMITER = Limiter(2, 1)
+
 
 def download_charities_csv():
     """
@@ -52,11 +55,12 @@ def search_charities(query="", registered_before=None,
     }
     
     try:
-        response = requests.get(
+        response = http_cache.get(
             endpoint,
             headers=HEADERS,
             params=params,
-            timeout=30
+            timeout=30,
+            limiter=LIMITER
         )
         
         if response.status_code == 200:
@@ -76,10 +80,11 @@ def get_charity_details(charity_number):
     endpoint = f"{BASE_URL}/charity/{charity_number}"
     
     try:
-        response = requests.get(
+        response = http_cache.get(
             endpoint,
             headers=HEADERS,
-            timeout=30
+            timeout=30,
+            limiter=LIMITER
         )
         
         if response.status_code == 200:
@@ -101,10 +106,11 @@ def get_charity_trustees(charity_number):
     endpoint = f"{BASE_URL}/charity/{charity_number}/trustees"
     
     try:
-        response = requests.get(
+        response = http_cache.get(
             endpoint,
             headers=HEADERS,
-            timeout=30
+            timeout=30,
+            limiter=LIMITER
         )
         
         if response.status_code == 200:
@@ -122,10 +128,11 @@ def get_charity_financials(charity_number):
     endpoint = f"{BASE_URL}/charity/{charity_number}/financial"
     
     try:
-        response = requests.get(
+        response = http_cache.get(
             endpoint,
             headers=HEADERS,
-            timeout=30
+            timeout=30,
+            limiter=LIMITER
         )
         
         if response.status_code == 200:
@@ -168,9 +175,14 @@ def parse_charity_record(data):
     }
 
 
-def collect_sample_charities(count=100):
-    """Collect sample charities for testing"""
-    charities = []
+def collect_sample_charities(count=100, checkpoint=None):
+    """
+    Collect sample charities for testing
+    checkpoint: checkpoint.Checkpoint - each charity is flushed as it's
+    collected, a resumed run skips the ones already done, and it's finished
+    once every charity found has been processed
+    """
+    charities = checkpoint.records() if checkpoint else []
     
     print("=" * 50)
     print("KOSMOS - Charity Commission Data Collector")
@@ -178,36 +190,54 @@ def collect_sample_charities(count=100):
     
     os.makedirs(DATA_DIR, exist_ok=True)
     
-    # Get top charities by income (example)
-    print("\nSearching for charities...")
+    charity_numbers = checkpoint.get("charity_numbers") if checkpoint else None
+    
+    if charity_numbers is None:
+        # Get top charities by income (example)
+        print("\nSearching for charities...")
+        
+        results = search_charities(size=50)
+        items = results.get("charities", [])[:count] if results else []
+        charity_numbers = [item.get("charityNumber") for item in items if item.get("charityNumber")]
+        
+        # The search failed (or found nothing) - nothing to resume, try again next time
+        if not charity_numbers:
+            print("\n✗ No charities found")
+            return charities
+        
+        if checkpoint:
+            checkpoint.flush(charity_numbers=charity_numbers, processed=0)
     
-    results = search_charities(size=50)
+    start = checkpoint.get("processed", 0) if checkpoint else 0
+    if start:
+        print(f"\nResuming after {start} charities ({len(charities)} collected)")
     
-    if results:
-        for item in results.get("charities", [])[:count]:
-            charity_number = item.get("charityNumber")
+    for i, charity_number in enumerate(charity_numbers[start:], start + 1):
+        collected = []
+        details = get_charity_details(charity_number)
+        
+        if details:
+            charity = parse_charity_record(details)
             
-            if charity_number:
-                details = get_charity_details(charity_number)
-                
-                if details:
-                    charity = parse_charity_record(details)
-                    
-                    # Get trustees
-                    trustees = get_charity_trustees(charity_number)
-                    if trustees:
-                        charity["trustees"] = trustees.get("trustees", [])
-                    
-                    charities.append(charity)
-                    print(f"✓ {charity['name']}")
-                    
-                    time.sleep(0.5)  # Rate limiting
+            # Get trustees
+            trustees = get_charity_trustees(charity_number)
+            if trustees:
+                charity["trustees"] = trustees.get("trustees", [])
+            
+            collected.append(charity)
+            print(f"✓ {charity['name']}")
+        
+        charities.extend(collected)
+        if checkpoint:
+            checkpoint.flush(collected, processed=i)
     
     # Save to file
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(charities, f, indent=2)
+    output_file = open_store("charities").write("charities", charities)
+    
+    print(f"\n✓ Saved {len(charities)} charities to {output_file}")
     
-    print(f"\n✓ Saved {len(charities)} charities to {OUTPUT_FILE}")
+    if checkpoint:
+        checkpoint.finish(collected=len(charities))
     
     return charities
 
@@ -219,7 +249,7 @@ def get_charity_summaries():
     
     print("\nNote: Full charity collection requires:")
     print("1. API key registration (free)")
-    print("2. Processing the monthly CSV download")
+    print("2. Processing the monthly register extract (charity_register.py)")
     print("3. Or targeted searches by criteria")
     
     return None
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Charity Register Bulk Loader
+FREE monthly extract of the whole register (~170,000 charities)
+https://register-of-charities.charitycommission.gov.uk/register/full-register-download
+
+Streams the charity, trustee and annual return (financial) tables and joins
+them on registered_charity_number with a partitioned hash join:
+
+1. each table is streamed once and split into PARTITIONS files by charity number
+2. per partition, trustees + financials go in a hash table and the charities
+   are streamed past it
+
+So memory is bounded by one partition, not by the register. Output rows have
+the same shape as charity_commission.parse_charity_record (+ trustees).
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from datetime import datetime
+
+import requests
+
+from charity_commission import parse_charity_record
+from storage import category_dir
+
+EXTRACT_URL = "https://ccewuksprdoneregsadata1.blob.core.windows.net/data/txt"
+DATA_DIR = category_dir("charities")
+EXTRACT_DIR = os.path.join(DATA_DIR, "register_extract")
+OUTPUT_FILE = os.path.join(DATA_DIR, "charities_register.ndjson")
+
+TABLES = {
+    "charity": "publicextract.charity",
+    "trustee": "publicextract.charity_trustee",
+    "financial": "publicextract.charity_annual_return_history",
+}
+
+# Only the columns we keep are written to the partition files
+TRUSTEE_COLUMNS = {
+    "trustee_id": "trustee_id",
+    "trustee_name": "name",
+    "trustee_is_chair": "is_chair",
+    "individual_or_organisation": "individual_or_organisation",
+    "trustee_date_of_appointment": "appointment_date",
+}
+FINANCIAL_COLUMNS = {
+    "fin_period_start_date": "period_start",
+    "fin_period_end_date": "period_end",
+    "total_gross_income": "income",
+    "total_gross_expenditure": "expenditure",
+}
+
+PARTITIONS = 32
+BATCH_SIZE = 2000
+
+# The extract's text columns can be very long (activities)
+csv.field_size_limit(sys.maxsize)
+
+
+def extract_url(table):
+    return f"{EXTRACT_URL}/{TABLES[table]}.zip"
+
+
+def download_extract(extract_dir=None, chunk_size=1024 * 1024):
+    """Download the three table zips; returns {table: path}"""
+    extract_dir = extract_dir or EXTRACT_DIR
+    os.makedirs(extract_dir, exist_ok=True)
+    paths = {}
+
+    for table in TABLES:
+        url = extract_url(table)
+        path = os.path.join(extract_dir, os.path.basename(url))
+        print(f"Downloading from: {url}")
+
+        with requests.get(url, stream=True, timeout=300) as response:
+            if response.status_code != 200:
+                print(f"Error downloading {table}: {response.status_code}")
+                continue
+
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+
+        paths[table] = path
+
+    return paths
+
+
+def find_extract(extract_dir=None):
+    """{table: path} for the zips / .txt files already in extract_dir"""
+    extract_dir = extract_dir or EXTRACT_DIR
+    paths = {}
+    for table, name in TABLES.items():
+        for ext in (".zip", ".txt"):
+            path = os.path.join(extract_dir, name + ext)
+            if os.path.exists(path):
+                paths[table] = path
+                break
+    return paths
+
+
+def iter_table(path):
+    """Stream rows (dicts) from a tab-separated table, zipped or not"""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            member = next(m for m in archive.namelist() if m.endswith(".txt"))
+            with archive.open(member) as raw:
+                yield from _iter_rows(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            yield from _iter_rows(f)
+
+
+def _iter_rows(text):
+    reader = csv.reader(text, delimiter="\t", quoting=csv.QUOTE_NONE)
+    header = [h.strip() for h in next(reader)]
+    for values in reader:
+        yield dict(zip(header, values))
+
+
+def partition_of(charity_number, partitions):
+    try:
+        return int(charity_number) % partitions
+    except ValueError:
+        return 0
+
+
+def partition_table(rows, name, directory, partitions, columns=None):
+    """Split a table into `partitions` NDJSON files by charity number"""
+    files = [open(os.path.join(directory, f"{name}_{i}.ndjson"), 'w') for i in range(partitions)]
+    count = 0
+    try:
+        for row in rows:
+            number = row.get("registered_charity_number", "")
+            if columns:
+                row = {"registered_charity_number": number,
+                       **{new: row.get(old, "") for old, new in columns.items()}}
+            files[partition_of(number, partitions)].write(json.dumps(row) + "\n")
+            count += 1
+    finally:
+        for f in files:
+            f.close()
+
+    print(f"  {name}: {count:,} rows")
+    return count
+
+
+def _read_partition(directory, name, i):
+    with open(os.path.join(directory, f"{name}_{i}.ndjson")) as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _group_by_charity(rows):
+    """The build side of the join: charity number -> [rows]"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.pop("registered_charity_number"), []).append(row)
+    return groups
+
+
+def parse_register_record(row, trustees, financials, collected_at):
+    """Extract row -> the record shape the API collector produces"""
+    record = parse_charity_record({
+        "charityNumber": row.get("registered_charity_number"),
+        "charityName": row.get("charity_name"),
+        "registrationStatus": row.get("charity_registration_status"),
+        "registrationDate": row.get("date_of_registration"),
+        "removalDate": row.get("date_of_removal"),
+        "charityType": row.get("charity_type"),
+        "subCharity": row.get("linked_charity_number", "0") != "0",
+        "addressLine1": row.get("charity_contact_address1", ""),
+        "addressLine2": row.get("charity_contact_address2", ""),
+        "townCity": row.get("charity_contact_address3", ""),
+        "county": row.get("charity_contact_address4", ""),
+        "country": row.get("charity_contact_address5", ""),
+        "postcode": row.get("charity_contact_postcode", ""),
+        "phoneNumber": row.get("charity_contact_phone", ""),
+        "website": row.get("charity_contact_web", ""),
+        "emailAddress": row.get("charity_contact_email", ""),
+        "numberOfTrustees": len(trustees),
+        "activities": row.get("charity_activities", ""),
+    })
+    record["trustees"] = trustees
+    record["financials"] = sorted(financials, key=lambda f: f["period_end"], reverse=True)
+    record["latest_income"] = row.get("latest_income", "")
+    record["latest_expenditure"] = row.get("latest_expenditure", "")
+    record["source"] = "Charity Commission register extract"
+    record["collected_at"] = collected_at
+    return record
+
+
+def iter_register(paths, partitions=PARTITIONS, work_dir=None):
+    """
+    Yield joined charity records from {table: path}
+    Main charities only - linked (sub) charities share the parent's number
+    """
+    collected_at = datetime.now().isoformat()
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as directory:
+        print(f"Partitioning tables into {partitions} parts...")
+        partition_table(
+            (r for r in iter_table(paths["charity"]) if r.get("linked_charity_number", "0") == "0"),
+            "charity", directory, partitions
+        )
+        partition_table(
+            (r for r in iter_table(paths["trustee"]) if r.get("linked_charity_number", "0") == "0"),
+            "trustee", directory, partitions, TRUSTEE_COLUMNS
+        )
+        if "financial" in paths:
+            partition_table(iter_table(paths["financial"]), "financial", directory, partitions, FINANCIAL_COLUMNS)
+
+        print("Joining...")
+        for i in range(partitions):
+            trustees = _group_by_charity(_read_partition(directory, "trustee", i))
+            financials = (
+                _group_by_charity(_read_partition(directory, "financial", i))
+                if "financial" in paths else {}
+            )
+
+            for row in _read_partition(directory, "charity", i):
+                number = row["registered_charity_number"]
+                yield parse_register_record(
+                    row, trustees.get(number, []), financials.get(number, []), collected_at
+                )
+
+
+def iter_batches(records, batch_size=BATCH_SIZE):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_register(paths=None, output_file=None, partitions=PARTITIONS, batch_size=BATCH_SIZE):
+    """Join the extract and write it to NDJSON in batches; returns the number of charities"""
+    paths = paths or find_extract() or download_extract()
+    output_file = output_file or OUTPUT_FILE
+    missing = {"charity", "trustee"} - set(paths)
+    if missing:
+        print(f"✗ Missing extract tables: {', '.join(sorted(missing))}")
+        return 0
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    tmp_path = output_file + ".tmp"
+    count = 0
+
+    with open(tmp_path, 'w') as f:
+        for batch in iter_batches(iter_register(paths, partitions), batch_size):
+            f.write("".join(json.dumps(record) + "\n" for record in batch))
+            count += len(batch)
+            print(f"  {count:,} charities")
+
+    os.replace(tmp_path, output_file)
+    print(f"\n✓ Saved {count:,} charities to {output_file}")
+    return count
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("KOSMOS - Charity Register Bulk Loader")
+    print("=" * 50)
+
+    extract_dir = sys.argv[1] if len(sys.argv) > 1 else EXTRACT_DIR
+    load_register(find_extract(extract_dir) or download_extract(extract_dir))
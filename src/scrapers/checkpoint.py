@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Collection Checkpoints
+Lets a collector pick up where it stopped instead of starting again
+
+Each checkpoint is two files:
+    <name>.ndjson  records flushed so far (append-only)
+    <name>.json    position (page, start_index, ...) + how much of the
+                   NDJSON is committed, written atomically
+
+Records are appended first and the state second, so a crash in between
+leaves uncommitted bytes that are truncated away on the next load.
+"""
+
+import json
+import os
+
+
+class Checkpoint:
+    """
+    checkpoint = Checkpoint("data/checkpoints/charities")
+    for page in pages[checkpoint.state.get("page", 0):]:
+        checkpoint.flush(parse(page), page=page + 1)
+    checkpoint.finish()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state_file = path + ".json"
+        self.records_file = path + ".ndjson"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.state = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            self._truncate(0)
+            return {"records": 0, "bytes": 0, "complete": False}
+
+        with open(self.state_file) as f:
+            state = json.load(f)
+        self._truncate(state["bytes"])
+        return state
+
+    def _truncate(self, size):
+        """Drop anything appended after the last committed state"""
+        mode = 'r+b' if os.path.exists(self.records_file) else 'wb'
+        with open(self.records_file, mode) as f:
+            f.truncate(size)
+
+    def _save(self):
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_file)
+
+    @property
+    def complete(self):
+        return self.state.get("complete", False)
+
+    def get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def flush(self, records=(), **position):
+        """Append records and commit the new position with them"""
+        with open(self.records_file, 'ab') as f:
+            for record in records:
+                f.write(json.dumps(record).encode() + b"\n")
+                self.state["records"] += 1
+            f.flush()
+            os.fsync(f.fileno())
+            self.state["bytes"] = f.tell()
+
+        self.state.update(position)
+        self._save()
+
+    def records(self):
+        """Every committed record, in flush order"""
+        with open(self.records_file, 'rb') as f:
+            return [json.loads(line) for line in f]
+
+    def finish(self, **position):
+        self.state.update(position, complete=True)
+        self._save()
+
+    def child(self, name):
+        """Separate checkpoint for one phase of a collector (e.g. MPs, then Lords)"""
+        return Checkpoint(f"{self.path}_{name}")
+
+    def reset(self):
+        """Forget all progress (a fresh, non --resume run)"""
+        directory, prefix = os.path.split(self.path)
+        for name in os.listdir(directory or "."):
+            if name == os.path.basename(self.state_file) or name == os.path.basename(self.records_file) \
+                    or name.startswith(prefix + "_"):
+                os.remove(os.path.join(directory, name))
+        self.state = self._load()
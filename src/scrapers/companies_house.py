@@ -5,27 +5,24 @@ FREE - No API key required for basic search
 https://developer.company-information.service.gov.uk/
 """
 
-import requests
-import json
-import time
 import os
 from datetime import datetime
 
-BASE_URL = "https://api.company-information.service.gov.uk"
-DATA_DIR = "/home/ubuntu/.openclaw/workspace/kosmos/data/businesses"
-OUTPUT_FILE = os.path.join(DATA_DIR, "companies_house.json")
+import companies_house_client
+from storage import category_dir, open_store
+
+DATA_DIR = category_dir("businesses")
 
 # Companies House API key (register for free at above URL)
 # Without key: 150 requests/5 seconds, 15,000 requests/day
 # With key: 600 requests/10 seconds, 500,000 requests/day
 API_KEY = os.environ.get("COMPANIES_HOUSE_API_KEY", "")
 
-HEADERS = {
-    "Accept": "application/json"
-}
+# Every request goes through companies_house_client, which keeps one token
+# bucket for the whole run
 
-if API_KEY:
-    HEADERS["Authorization"] = API_KEY
+# Companies fetched (and checkpointed) per round of concurrent requests
+BATCH_SIZE = 50
 
 
 def search_companies(query="", sector=None, location=None, size="large", limit=100):
@@ -33,119 +30,39 @@ def search_companies(query="", sector=None, location=None, size="large", limit=1
     Search for companies
     size: "large" (250+ employees), "medium" (50-249), "small" (10-49), "micro" (0-9)
     """
-    results = []
-    start_index = 0
-    
-    while start_index < limit:
-        params = {
-            "q": query,
-            "start_index": start_index,
-            "items_per_page": min(100, limit - start_index)
-        }
-        
-        if sector:
-            params["sic_codes"] = sector
-        
-        if location:
-            params["registered_office_address"] = location
-        
-        try:
-            response = requests.get(
-                f"{BASE_URL}/search/companies",
-                headers=HEADERS,
-                params=params,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                items = data.get("items", [])
-                results.extend(items)
-                
-                total = data.get("total_results", 0)
-                print(f"Found {len(items)} companies (total: {total})")
-                
-                if len(items) < 100:
-                    break
-                    
-                start_index += 100
-                time.sleep(1)  # Rate limiting
-                
-            elif response.status_code == 429:
-                print("Rate limited, waiting 60 seconds...")
-                time.sleep(60)
-            else:
-                print(f"Error: {response.status_code}")
-                print(response.text)
-                break
-                
-        except Exception as e:
-            print(f"Exception: {e}")
-            break
+    params = {"q": query}
+    
+    if sector:
+        params["sic_codes"] = sector
+    
+    if location:
+        params["registered_office_address"] = location
+    
+    # Pages are fetched concurrently within the rate limit
+    results = companies_house_client.search_companies(params, limit)
+    print(f"Found {len(results)} companies")
     
     return results
 
 
 def get_company_details(company_number):
     """Get detailed info for a single company"""
-    try:
-        response = requests.get(
-            f"{BASE_URL}/company/{company_number}",
-            headers=HEADERS,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error getting {company_number}: {response.status_code}")
-            return None
-            
-    except Exception as e:
-        print(f"Exception: {e}")
-        return None
+    return companies_house_client.get(f"/company/{company_number}")
 
 
 def get_company_officers(company_number):
     """Get directors/officers for a company"""
-    try:
-        response = requests.get(
-            f"{BASE_URL}/company/{company_number}/officers",
-            headers=HEADERS,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
-            
-    except Exception as e:
-        print(f"Exception: {e}")
-        return None
+    return companies_house_client.get(f"/company/{company_number}/officers")
 
 
 def get_filing_history(company_number, limit=10):
     """Get recent filing history"""
-    try:
-        response = requests.get(
-            f"{BASE_URL}/company/{company_number}/filing-history",
-            headers=HEADERS,
-            params={"items_per_page": limit},
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
-            
-    except Exception as e:
-        print(f"Exception: {e}")
-        return None
+    return companies_house_client.get(
+        f"/company/{company_number}/filing-history", {"items_per_page": limit}
+    )
 
 
-def collect_top_companies(industry=None, count=500):
+def collect_top_companies(industry=None, count=500, checkpoint=None):
     """
     Collect top companies by industry
     Industry SIC codes:
@@ -153,24 +70,47 @@ def collect_top_companies(industry=None, count=500):
     - 72: Scientific research
     - 85: Education
     - 86-88: Healthcare
+    checkpoint: checkpoint.Checkpoint - companies are flushed every BATCH_SIZE,
+    a resumed run carries on from the last company processed, and it's
+    finished once every company found has been processed
     """
-    companies = []
+    companies = checkpoint.records() if checkpoint else []
+    company_numbers = checkpoint.get("company_numbers") if checkpoint else None
     
-    if industry:
-        results = search_companies(sector=industry, limit=count)
-    else:
-        # Get large companies (250+ employees)
-        results = search_companies(size="large", limit=count)
+    if company_numbers is None:
+        if industry:
+            results = search_companies(sector=industry, limit=count)
+        else:
+            # Get large companies (250+ employees)
+            results = search_companies(size="large", limit=count)
+        
+        company_numbers = [c.get("company_number") for c in results if c.get("company_number")]
+        
+        # The search failed (or found nothing) - nothing to resume, try again next time
+        if not company_numbers:
+            return companies
+        
+        if checkpoint:
+            checkpoint.flush(company_numbers=company_numbers, processed=0)
+    
+    start = checkpoint.get("processed", 0) if checkpoint else 0
+    if start:
+        print(f"Resuming after {start} companies ({len(companies)} collected)")
     
-    for company in results:
-        company_number = company.get("company_number")
+    for batch_start in range(start, len(company_numbers), BATCH_SIZE):
+        batch = company_numbers[batch_start:batch_start + BATCH_SIZE]
         
-        if company_number:
-            # Get detailed info
-            details = get_company_details(company_number)
+        # Details, officers and filing history for every company, concurrently
+        bundles = companies_house_client.fetch_company_bundles(batch)
+        collected = []
+        
+        for company_number in batch:
+            bundle = bundles[company_number]
+            details = bundle["details"]
+            
             if details:
-                # Get officers (directors)
-                officers = get_company_officers(company_number)
+                officers = bundle["officers"]
+                filings = bundle["filing_history"]
                 
                 record = {
                     "company_number": company_number,
@@ -184,14 +124,20 @@ def collect_top_companies(industry=None, count=500):
                     "industry": details.get("industry_description", ""),
                     "website": details.get("company_uri"),
                     "officers": officers.get("items", []) if officers else [],
+                    "filing_history": filings.get("items", []) if filings else [],
                     "source": "Companies House API",
                     "collected_at": datetime.now().isoformat()
                 }
                 
-                companies.append(record)
+                collected.append(record)
                 print(f"✓ {record['name']}")
-                
-                time.sleep(0.5)  # Rate limiting
+        
+        companies.extend(collected)
+        if checkpoint:
+            checkpoint.flush(collected, processed=batch_start + len(batch))
+    
+    if checkpoint:
+        checkpoint.finish(collected=len(companies))
     
     return companies
 
@@ -211,10 +157,9 @@ if __name__ == "__main__":
     companies = collect_top_companies(industry=None, count=100)
     
     # Save to file
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(companies, f, indent=2)
+    output_file = open_store("businesses").write("companies_house", companies)
     
-    print(f"\n✓ Saved {len(companies)} companies to {OUTPUT_FILE}")
+    print(f"\n✓ Saved {len(companies)} companies to {output_file}")
     
     # Summary
     print("\n" + "=" * 50)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Companies House Bulk Loader
+FREE monthly "BasicCompanyData" snapshot - every live company on the register
+https://download.companieshouse.gov.uk/en_output.html
+
+Streams the CSVs straight out of the zip (no extraction) into a Parquet
+dataset partitioned by SIC section. The API is then only needed to top up
+officers for the companies we care about.
+"""
+
+import csv
+import io
+import os
+import sys
+import zipfile
+from datetime import datetime
+
+import requests
+
+from confidence import RULES, score_table
+from storage import category_dir
+
+DOWNLOAD_URL = "https://download.companieshouse.gov.uk"
+OUTPUT_DIR = category_dir("businesses")
+DATASET_DIR = os.path.join(OUTPUT_DIR, "companies_dataset")
+
+BATCH_SIZE = 50000
+
+# SIC 2007 sections by 2-digit division
+SIC_SECTIONS = [
+    ("A", 1, 3), ("B", 5, 9), ("C", 10, 33), ("D", 35, 35), ("E", 36, 39),
+    ("F", 41, 43), ("G", 45, 47), ("H", 49, 53), ("I", 55, 56), ("J", 58, 63),
+    ("K", 64, 66), ("L", 68, 68), ("M", 69, 75), ("N", 77, 82), ("O", 84, 84),
+    ("P", 85, 85), ("Q", 86, 88), ("R", 90, 93), ("S", 94, 96), ("T", 97, 98),
+    ("U", 99, 99),
+]
+DIVISION_TO_SECTION = {
+    division: section
+    for section, low, high in SIC_SECTIONS
+    for division in range(low, high + 1)
+}
+
+
+def sic_section(sic_code):
+    """'62020' -> 'J'; 'unknown' if it isn't a SIC 2007 code"""
+    try:
+        return DIVISION_TO_SECTION.get(int(sic_code[:2]), "unknown")
+    except (TypeError, ValueError):
+        return "unknown"
+
+
+def snapshot_url(date=None):
+    """URL of the single-file snapshot, published on the 1st of each month"""
+    date = date or datetime.now().strftime("%Y-%m-01")
+    return f"{DOWNLOAD_URL}/BasicCompanyDataAsOneFile-{date}.zip"
+
+
+def download_snapshot(url, path, chunk_size=1024 * 1024):
+    """Download the snapshot zip to disk in chunks"""
+    print(f"Downloading from: {url}")
+
+    with requests.get(url, stream=True, timeout=300) as response:
+        if response.status_code != 200:
+            print(f"Error downloading: {response.status_code}")
+            return None
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+    print(f"✓ Saved snapshot to {path}")
+    return path
+
+
+def iter_snapshot_rows(zip_paths):
+    """Yield CSV rows from every member of every zip, streamed - nothing extracted"""
+    for zip_path in zip_paths:
+        with zipfile.ZipFile(zip_path) as archive:
+            for member in archive.namelist():
+                if not member.lower().endswith(".csv"):
+                    continue
+
+                print(f"Reading {os.path.basename(zip_path)}:{member}")
+                with archive.open(member) as raw:
+                    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+                    reader = csv.reader(text)
+                    # Some headers have a leading space (" CompanyNumber")
+                    header = [h.strip() for h in next(reader)]
+                    for values in reader:
+                        yield dict(zip(header, values))
+
+
+def parse_company_row(row, ingested_at, source_date):
+    """Map a snapshot row to the record shape companies_house_kosmos.search_companies produces"""
+    company_number = row.get("CompanyNumber", "").strip()
+
+    sic_codes = []
+    for i in range(1, 5):
+        text = row.get(f"SICCode.SicText_{i}", "").strip()
+        code = text.split(" - ", 1)[0].strip()
+        if code and code[0].isdigit():
+            sic_codes.append(code)
+
+    return {
+        "company_number": company_number,
+        "name": row.get("CompanyName", "").strip(),
+        "type": row.get("CompanyCategory", ""),
+        "status": row.get("CompanyStatus", "").lower(),
+        "address": {
+            "care_of": row.get("RegAddress.CareOf", ""),
+            "po_box": row.get("RegAddress.POBox", ""),
+            "address_line_1": row.get("RegAddress.AddressLine1", ""),
+            "address_line_2": row.get("RegAddress.AddressLine2", ""),
+            "locality": row.get("RegAddress.PostTown", ""),
+            "region": row.get("RegAddress.County", ""),
+            "country": row.get("RegAddress.Country", ""),
+            "postal_code": row.get("RegAddress.PostCode", "")
+        },
+        "sic_codes": sic_codes,
+        "incorporation_date": row.get("IncorporationDate", ""),
+        "dissolution_date": row.get("DissolutionDate", ""),
+        "source_url": row.get("URI", "") or f"/company/{company_number}",
+        "source_name": "Companies House BasicCompanyData",
+        "source_date": source_date,
+        "ingested_at": ingested_at,
+        "confidence_score": None,  # scored per batch - confidence.RULES["company"]
+        "provenance": {
+            "pipeline": "companies_house_bulk",
+            "source_hash": company_number,
+            "ingested_at": ingested_at
+        },
+        "gdpr_flags": {
+            "public_only_contact": True,
+            "minimised": False,
+            "rectification_requested": False,
+            "takedown_requested": False
+        },
+        # Partition key - companies with several SIC codes go under their first one
+        "sic_section": sic_section(sic_codes[0]) if sic_codes else "unknown"
+    }
+
+
+def company_schema():
+    import pyarrow as pa
+
+    text = pa.string()
+    return pa.schema([
+        ("company_number", text),
+        ("name", text),
+        ("type", text),
+        ("status", text),
+        ("address", pa.struct([(k, text) for k in [
+            "care_of", "po_box", "address_line_1", "address_line_2",
+            "locality", "region", "country", "postal_code"]])),
+        ("sic_codes", pa.list_(text)),
+        ("incorporation_date", text),
+        ("dissolution_date", text),
+        ("source_url", text),
+        ("source_name", text),
+        ("source_date", text),
+        ("ingested_at", text),
+        ("confidence_score", pa.int16()),
+        ("provenance", pa.struct([("pipeline", text), ("source_hash", text), ("ingested_at", text)])),
+        ("gdpr_flags", pa.struct([(k, pa.bool_()) for k in [
+            "public_only_contact", "minimised", "rectification_requested", "takedown_requested"]])),
+        ("sic_section", text),
+    ])
+
+
+def _scored(batch, schema):
+    """Arrow batch with confidence_score filled in for every row at once"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pylist(batch, schema=schema)
+    scores = pa.array(score_table(table, RULES["company"]), pa.int16())
+    table = table.set_column(schema.get_field_index("confidence_score"), "confidence_score", scores)
+    return table.combine_chunks().to_batches()[0]
+
+
+def iter_record_batches(rows, schema, batch_size=BATCH_SIZE, source_date=None):
+    """Group parsed companies into Arrow record batches"""
+    ingested_at = datetime.now().isoformat()
+    source_date = source_date or datetime.now().strftime("%Y-%m-%d")
+    batch = []
+
+    for row in rows:
+        batch.append(parse_company_row(row, ingested_at, source_date))
+        if len(batch) >= batch_size:
+            yield _scored(batch, schema)
+            batch = []
+
+    if batch:
+        yield _scored(batch, schema)
+
+
+def ingest_snapshot(zip_paths, dataset_dir=None, source_date=None):
+    """
+    Stream snapshot zip(s) into a Parquet dataset partitioned by SIC section
+    dataset_dir/sic_section=J/part-0.parquet, ...
+    Returns the number of companies written
+    """
+    import pyarrow.dataset as ds
+
+    dataset_dir = dataset_dir or DATASET_DIR
+    schema = company_schema()
+    written = [0]
+
+    def counted(batches):
+        for batch in batches:
+            written[0] += batch.num_rows
+            print(f"  {written[0]:,} companies")
+            yield batch
+
+    batches = counted(iter_record_batches(iter_snapshot_rows(zip_paths), schema, source_date=source_date))
+
+    ds.write_dataset(
+        batches,
+        dataset_dir,
+        schema=schema,
+        format="parquet",
+        partitioning=["sic_section"],
+        partitioning_flavor="hive",
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=BATCH_SIZE,
+    )
+
+    print(f"\n✓ Saved {written[0]:,} companies to {dataset_dir}")
+    return written[0]
+
+
+def load_companies(sections=None, status="active", dataset_dir=None, limit=None):
+    """
+    Read companies back from the dataset as records
+    sections: e.g. ["K", "P"] - only those partitions are read
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(dataset_dir or DATASET_DIR, format="parquet", partitioning="hive")
+
+    condition = None
+    if sections:
+        condition = ds.field("sic_section").isin(sections)
+    if status:
+        status_filter = ds.field("status") == status
+        condition = status_filter if condition is None else condition & status_filter
+
+    table = dataset.to_table(filter=condition)
+    if limit:
+        table = table.slice(0, limit)
+    return table.to_pylist()
+
+
+def top_up_officers(companies, max_companies=50):
+    """Officers via the API, only for the selected companies"""
+    from companies_house_kosmos import collect_directors
+
+    return collect_directors(companies, max_companies=max_companies)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("KOSMOS - Companies House Bulk Snapshot")
+    print("=" * 60)
+
+    zip_paths = sys.argv[1:]
+
+    if not zip_paths:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        url = snapshot_url()
+        path = download_snapshot(url, os.path.join(OUTPUT_DIR, os.path.basename(url)))
+        zip_paths = [path] if path else []
+
+    if zip_paths:
+        ingest_snapshot(zip_paths)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Companies House Async Client
+Keep-alive connection pool + token bucket sized to the documented budgets
+https://developer-specs.company-information.service.gov.uk/guides/rateLimiting
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import threading
+
+import httpx
+
+import http_cache
+from rate_limit import TokenBucket, retry_after_seconds
+
+BASE_URL = "https://api.company-information.service.gov.uk"
+API_KEY = os.environ.get("COMPANIES_HOUSE_API_KEY", "")
+
+MAX_CONNECTIONS = 50
+MAX_RETRIES = 5
+PAGE_SIZE = 100
+
+# One bucket for the whole process - every client and blocking wrapper call
+# draws from it, so the quota holds across the run
+# With key: 600 requests/10 seconds. Without key: 150 requests/5 seconds
+BUCKET = TokenBucket(600, 10) if API_KEY else TokenBucket(150, 5)
+
+
+class CompaniesHouseClient:
+    """
+    async with CompaniesHouseClient() as ch:
+        bundle = await ch.company_bundle("00000006")
+    """
+
+    def __init__(self, api_key=API_KEY, rate_limit=None, max_connections=MAX_CONNECTIONS,
+                 use_cache=True):
+        self.api_key = api_key
+        self.cache = http_cache.get_cache() if use_cache else None
+        # The shared BUCKET, unless a client is given its own rate_limit
+        self.bucket = TokenBucket(*rate_limit) if rate_limit else BUCKET
+        self.max_connections = max_connections
+        self.client = None
+        self.requests_sent = 0
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            headers={"Accept": "application/json"},
+            # The API key is the basic-auth username, with an empty password
+            auth=(self.api_key, "") if self.api_key else None,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=30,
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def get(self, path, params=None):
+        """GET a JSON resource; None on 404/errors, retrying 429 and 5xx"""
+        url = f"{BASE_URL}{path}"
+        key = http_cache.cache_key("GET", url, params)
+        entry = self.cache.lookup(key) if self.cache else None
+
+        # Fresh cached copy - costs no quota
+        if entry and entry["fresh"]:
+            self.cache.count("hits")
+            return json.loads(entry["body"])
+
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+
+        for attempt in range(MAX_RETRIES):
+            await self.bucket.acquire()
+            self.requests_sent += 1
+
+            try:
+                response = await self.client.get(path, params=params, headers=headers)
+            except httpx.HTTPError as e:
+                print(f"Exception: {e}")
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            if response.status_code == 304 and entry:
+                self.cache.refresh(key, url)
+                self.cache.count("hits")
+                return json.loads(entry["body"])
+
+            if response.status_code == 200:
+                if self.cache:
+                    self.cache.count("misses")
+                    self.cache.store(key, url, 200, response.headers, response.content)
+                return response.json()
+
+            if response.status_code == 429:
+                wait = retry_after_seconds(response.headers, default=self.bucket.period)
+                print(f"Rate limited, waiting {wait:.0f} seconds...")
+                self.bucket.pause(wait)
+                continue
+
+            if response.status_code >= 500:
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            if response.status_code != 404:
+                print(f"Error {path}: {response.status_code}")
+            return None
+
+        print(f"Giving up on {path} after {MAX_RETRIES} attempts")
+        return None
+
+    async def search_companies(self, params, limit):
+        """All search pages up to `limit` results, fetched concurrently"""
+        starts = range(0, limit, PAGE_SIZE)
+        pages = await asyncio.gather(*[
+            self.get("/search/companies", {
+                **params,
+                "start_index": start,
+                "items_per_page": min(PAGE_SIZE, limit - start),
+            })
+            for start in starts
+        ])
+
+        items = []
+        for page in pages:
+            if not page:
+                break
+            page_items = page.get("items", [])
+            items.extend(page_items)
+            # Past the last page of results
+            if len(page_items) < PAGE_SIZE:
+                break
+        return items[:limit]
+
+    async def company_details(self, company_number):
+        return await self.get(f"/company/{company_number}")
+
+    async def company_officers(self, company_number):
+        return await self.get(f"/company/{company_number}/officers")
+
+    async def filing_history(self, company_number, limit=10):
+        return await self.get(f"/company/{company_number}/filing-history", {"items_per_page": limit})
+
+    async def company_bundle(self, company_number):
+        """Details, officers and filing history for one company, in parallel"""
+        details, officers, filings = await asyncio.gather(
+            self.company_details(company_number),
+            self.company_officers(company_number),
+            self.filing_history(company_number),
+        )
+        return {"details": details, "officers": officers, "filing_history": filings}
+
+
+# The blocking wrappers share one event loop, on its own thread, and one
+# client on it - a single keep-alive pool for the whole process, which also
+# works when the caller is already inside an event loop
+_loop = None
+_client = None
+_loop_lock = threading.Lock()
+
+
+def _shared_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="companies-house", daemon=True).start()
+            atexit.register(close)
+        return _loop
+
+
+async def _with_client(fn):
+    global _client
+    # Runs on the shared loop's thread only, so there's no race to create it
+    if _client is None:
+        _client = await CompaniesHouseClient().__aenter__()
+    return await fn(_client)
+
+
+def _run(fn):
+    """fn(client) on the shared loop and client, waiting for the result"""
+    return asyncio.run_coroutine_threadsafe(_with_client(fn), _shared_loop()).result()
+
+
+def close():
+    """Close the shared client's connections and stop its loop (also run at exit)"""
+    global _loop, _client
+    with _loop_lock:
+        if _loop is None:
+            return
+        if _client is not None:
+            asyncio.run_coroutine_threadsafe(_client.__aexit__(None, None, None), _loop).result()
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop, _client = None, None
+
+
+async def _bundles(ch, company_numbers):
+    bundles = await asyncio.gather(*[ch.company_bundle(n) for n in company_numbers])
+    return dict(zip(company_numbers, bundles))
+
+
+async def _officers(ch, company_numbers):
+    officers = await asyncio.gather(*[ch.company_officers(n) for n in company_numbers])
+    return dict(zip(company_numbers, officers))
+
+
+def get(path, params=None):
+    """Blocking wrapper - one JSON resource, or None"""
+    return _run(lambda ch: ch.get(path, params))
+
+
+def search_companies(params, limit):
+    """Blocking wrapper - search results (raw API items)"""
+    return _run(lambda ch: ch.search_companies(params, limit))
+
+
+def fetch_company_bundles(company_numbers):
+    """Blocking wrapper - {company_number: {details, officers, filing_history}}"""
+    company_numbers = list(company_numbers)
+    return _run(lambda ch: _bundles(ch, company_numbers))
+
+
+def fetch_officers(company_numbers):
+    """Blocking wrapper - {company_number: officers response or None}"""
+    company_numbers = list(company_numbers)
+    return _run(lambda ch: _officers(ch, company_numbers))
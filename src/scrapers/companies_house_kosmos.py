@@ -5,23 +5,18 @@ FREE API - No authentication needed for basic search
 https://developer.company-information.service.gov.uk/
 """
 
-import requests
-import json
-import time
 from datetime import datetime
 import os
 
-BASE_URL = "https://api.company-information.service.gov.uk"
-OUTPUT_DIR = "/home/ubuntu/.openclaw/workspace/kosmos/data/businesses"
-DATA_FILE = os.path.join(OUTPUT_DIR, "companies.json")
-
-# API key for higher limits (register for free)
-API_KEY = os.environ.get("COMPANIES_HOUSE_API_KEY", "")
+import companies_house_client
+from confidence import RULES, score_record
+from storage import category_dir, open_store
 
-HEADERS = {"Accept": "application/json"}
-if API_KEY:
-    HEADERS["Authorization"] = API_KEY
+BASE_URL = "https://api.company-information.service.gov.uk"
+OUTPUT_DIR = category_dir("businesses")
 
+# API key for higher limits (register for free): COMPANIES_HOUSE_API_KEY,
+# picked up by companies_house_client, which all requests go through
 # Rate limits: No key = 150 req/5sec, 15000/day | With key = 600 req/10sec, 500000/day
 
 
@@ -31,124 +26,76 @@ def search_companies(query="", size="large", limit=500):
     size: "large" (250+ employees), "medium" (50-249), "small" (10-49), "micro" (0-9)
     """
     companies = []
-    start_index = 0
-    
-    while start_index < limit:
-        params = {
-            "q": query if query else "company",
-            "size": size,
-            "start_index": start_index,
-            "items_per_page": min(100, limit - start_index)
+    
+    params = {
+        "q": query if query else "company",
+        "size": size
+    }
+    
+    # Pages are fetched concurrently within the rate limit
+    items = companies_house_client.search_companies(params, limit)
+    
+    for company in items:
+        record = {
+            "company_number": company.get("company_number"),
+            # Search results name these title / company_status / company_type /
+            # address / date_of_creation; company profiles use the other names
+            "name": company.get("company_name") or company.get("title"),
+            "type": company.get("company_type") or company.get("type"),
+            "status": company.get("company_status") or company.get("status"),
+            "address": company.get("registered_office_address") or company.get("address", {}),
+            "sic_codes": company.get("sic_codes", []),
+            "incorporation_date": company.get("date_of_creation"),
+            "source_url": company.get("links", {}).get("self"),
+            "source_name": "Companies House API",
+            "source_date": datetime.now().strftime("%Y-%m-%d"),
+            "ingested_at": datetime.now().isoformat(),
+            "confidence_score": None,  # below - confidence.RULES["company"]
+            "provenance": {
+                "pipeline": "companies_house_collector",
+                "source_hash": company.get("company_number", ""),
+                "ingested_at": datetime.now().isoformat()
+            },
+            "gdpr_flags": {
+                "public_only_contact": True,
+                "minimised": False,
+                "rectification_requested": False,
+                "takedown_requested": False
+            }
         }
-        
-        try:
-            response = requests.get(
-                f"{BASE_URL}/search/companies",
-                headers=HEADERS,
-                params=params,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                items = data.get("items", [])
-                
-                for company in items:
-                    record = {
-                        "company_number": company.get("company_number"),
-                        "name": company.get("company_name"),
-                        "type": company.get("type"),
-                        "status": company.get("status"),
-                        "address": company.get("registered_office_address", {}),
-                        "sic_codes": company.get("sic_codes", []),
-                        "source_url": company.get("links", {}).get("self"),
-                        "source_name": "Companies House API",
-                        "source_date": datetime.now().strftime("%Y-%m-%d"),
-                        "ingested_at": datetime.now().isoformat(),
-                        "confidence_score": 80,  # High - official data
-                        "provenance": {
-                            "pipeline": "companies_house_collector",
-                            "source_hash": company.get("company_number", ""),
-                            "ingested_at": datetime.now().isoformat()
-                        },
-                        "gdpr_flags": {
-                            "public_only_contact": True,
-                            "minimised": False,
-                            "rectification_requested": False,
-                            "takedown_requested": False
-                        }
-                    }
-                    companies.append(record)
-                
-                print(f"Found {len(items)} companies (total so far: {len(companies)})")
-                
-                if len(items) < 100:
-                    break
-                    
-                start_index += 100
-                time.sleep(6 if not API_KEY else 1)  # Rate limiting
-                
-            elif response.status_code == 429:
-                print("Rate limited, waiting 60 seconds...")
-                time.sleep(60)
-            else:
-                print(f"Error: {response.status_code}")
-                break
-                
-        except Exception as e:
-            print(f"Exception: {e}")
-            break
+        record["confidence_score"] = score_record(record, RULES["company"])
+        companies.append(record)
+    
+    print(f"Found {len(companies)} companies")
     
     return companies
 
 
 def get_company_details(company_number):
     """Get full details for a company"""
-    try:
-        response = requests.get(
-            f"{BASE_URL}/company/{company_number}",
-            headers=HEADERS,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
-            
-    except Exception as e:
-        print(f"Exception: {e}")
-        return None
+    return companies_house_client.get(f"/company/{company_number}")
 
 
 def get_company_officers(company_number):
     """Get directors/officers for a company"""
-    try:
-        response = requests.get(
-            f"{BASE_URL}/company/{company_number}/officers",
-            headers=HEADERS,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
-            
-    except Exception as e:
-        print(f"Exception: {e}")
-        return None
+    return companies_house_client.get(f"/company/{company_number}/officers")
 
 
 def collect_directors(companies, max_companies=50):
     """Collect directors from companies (public officers)"""
     directors = []
+    selected = [c for c in companies[:max_companies] if c.get("company_number")]
+    
+    # All officer lists at once, within the rate limit
+    officers_by_company = companies_house_client.fetch_officers(
+        [c["company_number"] for c in selected]
+    )
     
-    for i, company in enumerate(companies[:max_companies]):
+    for i, company in enumerate(selected):
         company_number = company.get("company_number")
         
         if company_number:
-            officers = get_company_officers(company_number)
+            officers = officers_by_company.get(company_number)
             
             if officers:
                 for officer in officers.get("items", []):
@@ -167,7 +114,7 @@ def collect_directors(companies, max_companies=50):
                         "source_name": "Companies House API",
                         "source_date": datetime.now().strftime("%Y-%m-%d"),
                         "ingested_at": datetime.now().isoformat(),
-                        "confidence_score": 90,  # Very high - official record
+                        "confidence_score": None,  # below - confidence.RULES["officer"]
                         "provenance": {
                             "pipeline": "companies_house_directors",
                             "source_hash": officer.get("links", {}).get("self", ""),
@@ -180,10 +127,10 @@ def collect_directors(companies, max_companies=50):
                             "takedown_requested": False
                         }
                     }
+                    director["confidence_score"] = score_record(director, RULES["officer"])
                     directors.append(director)
             
-            print(f"Processed {i+1}/{min(max_companies, len(companies))}: {company.get('name')}")
-            time.sleep(1.5 if not API_KEY else 0.5)
+            print(f"Processed {i+1}/{len(selected)}: {company.get('name')}")
     
     return directors
 
@@ -200,18 +147,16 @@ def run_collection():
     print("\n1. Searching for large UK companies...")
     companies = search_companies(size="large", limit=200)
     
-    with open(DATA_FILE, 'w') as f:
-        json.dump(companies, f, indent=2)
+    store = open_store("businesses")
+    companies_file = store.write("companies", companies)
     
-    print(f"\n✓ Saved {len(companies)} companies to {DATA_FILE}")
+    print(f"\n✓ Saved {len(companies)} companies to {companies_file}")
     
     # Collect directors (from first 50 companies)
     print("\n2. Collecting directors/officers...")
     directors = collect_directors(companies, max_companies=50)
     
-    directors_file = os.path.join(OUTPUT_DIR, "directors.json")
-    with open(directors_file, 'w') as f:
-        json.dump(directors, f, indent=2)
+    directors_file = store.write("directors", directors)
     
     print(f"\n✓ Saved {len(directors)} directors to {directors_file}")
     
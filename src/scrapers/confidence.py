@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Confidence Scoring
+One scoring engine for every collector, driven by a rule set per entity type
+
+    completeness = weighted share of `fields` that are filled in    (0-100)
+                   or, with `tiers`, a score by how many fields are filled
+    confidence   = completeness * source trust / 100                 (0-100)
+
+A rule set with no fields scores every record at its source's trust. Batches are scored column-wise over a DataFrame or
+Arrow table (score_frame / score_table) or a list of dicts (score_records);
+score_record applies the same rules to one nested dict while a collector
+runs. Field names are dotted paths ("address.postcode"), matching flattened
+Parquet / json_normalize columns.
+
+Change a rule, then re-score what's already on disk without collecting again:
+
+    python src/scrapers/confidence.py rescore data/education/schools.parquet --entity education
+"""
+
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    entity_type: str
+    # Fields that count towards completeness (dotted paths into nested records)
+    fields: Tuple[str, ...] = ()
+    # field -> weight, default 1
+    weights: Dict[str, float] = field(default_factory=dict)
+    # ((min filled, score), ...) highest first - score by count instead of weighted share
+    tiers: Optional[Tuple[Tuple[int, int], ...]] = None
+    # source name -> trust (0-100); sources not listed get default_trust
+    trust: Dict[str, int] = field(default_factory=dict)
+    default_trust: int = 100
+    # Where the source name is found on a record
+    source_field: str = "source_name"
+
+    def weight(self, name):
+        return self.weights.get(name, 1.0)
+
+
+RULES = {
+    # KOSMOSCollector schools (SchoolsCollector)
+    "education": RuleSet(
+        entity_type="education",
+        fields=("name", "address.postcode", "contact.phone"),
+    ),
+    # Headteachers from the raw schools CSV (kosmos_schools) - every column counts
+    "education_leader": RuleSet(
+        entity_type="education_leader",
+        tiers=((10, 95), (7, 80), (5, 60), (0, 40)),
+    ),
+    # Companies from the API search (companies_house_kosmos) and the bulk
+    # snapshot (companies_house_bulk) - both use the same record shape.
+    # dissolution_date isn't counted: it's empty for every live company
+    "company": RuleSet(
+        entity_type="company",
+        fields=("name", "status", "address.address_line_1", "address.postal_code",
+                "incorporation_date", "sic_codes"),
+        weights={"name": 2, "address.postal_code": 2},
+        trust={"Companies House API": 80, "Companies House BasicCompanyData": 80},
+        default_trust=80,
+    ),
+    # Directors (companies_house_kosmos.collect_directors). resignation_date
+    # isn't counted either - it's empty for every current officer
+    "officer": RuleSet(
+        entity_type="officer",
+        fields=("name", "role", "appointment_date", "nationality",
+                "country_of_residence", "date_of_birth", "address.postal_code"),
+        weights={"name": 2, "appointment_date": 2},
+        trust={"Companies House API": 90},
+        default_trust=90,
+    ),
+}
+
+
+# --- One record -------------------------------------------------------------
+
+def _get(record, path):
+    for key in path.split("."):
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+def _filled(value):
+    if value is None or value is False or value == "":
+        return False
+    if isinstance(value, float) and value != value:
+        return False
+    return bool(value) if isinstance(value, (int, float, list, dict)) else True
+
+
+def _combine(completeness, trust):
+    return int(np.floor(completeness * trust / 100 + 0.5))
+
+
+def score_record(record, rules):
+    """Confidence (int) for one record - same result as score_frame on it"""
+    source = _get(record, rules.source_field)
+    trust = rules.trust.get(source, rules.default_trust)
+
+    fields = rules.fields
+    if rules.tiers:
+        values = [_get(record, f) for f in fields] if fields else record.values()
+        filled = sum(1 for v in values if _filled(v))
+        completeness = next((score for minimum, score in rules.tiers if filled >= minimum), 0)
+    elif fields:
+        total = sum(rules.weight(f) for f in fields)
+        completeness = sum(rules.weight(f) for f in fields if _filled(_get(record, f))) / total * 100
+    else:
+        completeness = 100
+    return _combine(completeness, trust)
+
+
+# --- Whole batches ------------------------------------------------------------
+
+def _present(column):
+    """Vectorised _filled over one column"""
+    if pd.api.types.is_bool_dtype(column):
+        return column.fillna(False).to_numpy(dtype=bool)
+    if pd.api.types.is_numeric_dtype(column):
+        return (column.notna() & column.ne(0)).to_numpy()
+    if pd.api.types.is_string_dtype(column) and column.dtype != object:
+        return (column.notna() & column.ne("")).to_numpy(dtype=bool)
+
+    values = column.to_numpy(dtype=object)
+    # Lists / dicts (e.g. sic_codes) count when non-empty, as in score_record
+    nested = np.fromiter((isinstance(v, (list, dict, np.ndarray)) for v in values), bool, len(values))
+    present = np.zeros(len(values), dtype=bool)
+    plain = values[~nested]
+    present[~nested] = pd.notna(plain) & (plain != "") & (plain != False)  # noqa: E712
+    if nested.any():
+        present[nested] = [len(v) > 0 for v in values[nested]]
+    return present
+
+
+def score_frame(df, rules):
+    """
+    Confidence for every row of a DataFrame (int16 array). Nested fields are
+    looked up as dotted column names - flatten first (pd.json_normalize,
+    Table.flatten) if they're dicts
+    """
+    n = len(df)
+    if rules.source_field in df.columns and rules.trust:
+        trust = df[rules.source_field].map(rules.trust).fillna(rules.default_trust).to_numpy(dtype=float)
+    else:
+        trust = np.full(n, rules.default_trust, dtype=float)
+
+    fields = rules.fields or (tuple(df.columns) if rules.tiers else ())
+    if rules.tiers:
+        filled = np.zeros(n, dtype=np.int64)
+        for f in fields:
+            if f in df.columns:
+                filled += _present(df[f])
+        completeness = np.select(
+            [filled >= minimum for minimum, _ in rules.tiers], [score for _, score in rules.tiers], 0
+        )
+    elif fields:
+        weights = np.array([rules.weight(f) for f in fields], dtype=float)
+        got = np.zeros(n, dtype=float)
+        for f, w in zip(fields, weights):
+            if f in df.columns:
+                got += w * _present(df[f])
+        completeness = got / weights.sum() * 100
+    else:
+        completeness = np.full(n, 100.0)
+
+    return np.floor(completeness * trust / 100 + 0.5).astype(np.int16)
+
+
+def score_table(table, rules):
+    """score_frame for an Arrow table - struct columns are flattened to dotted names"""
+    while any(str(t).startswith("struct") for t in table.schema.types):
+        table = table.flatten()
+    wanted = set(rules.fields) | {rules.source_field}
+    columns = table.column_names if rules.tiers and not rules.fields else [c for c in table.column_names
+                                                                           if c in wanted]
+    return score_frame(table.select(columns).to_pandas(), rules)
+
+
+def score_records(records, rules):
+    """score_frame for a list of (nested) dicts - only the columns the rules read are built"""
+    if rules.tiers and not rules.fields:
+        return score_frame(pd.DataFrame(records), rules)
+    columns = {f: [_get(r, f) for r in records] for f in (*rules.fields, rules.source_field)}
+    return score_frame(pd.DataFrame(columns, index=range(len(records))), rules)
+
+
+# --- Re-scoring stored files --------------------------------------------------
+
+def rescore_parquet(path, rules, column="confidence_score"):
+    """Recompute `column` in a Parquet file (as written by kosmos_unified.ParquetWriter), in place"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    # ParquetWriter keeps run provenance in the file metadata; rows point at it by index
+    file_metadata = parquet.metadata.metadata or {}
+    runs = json.loads(file_metadata.get(b"kosmos", b"[]"))
+    sources = pa.array([r.get("source_name") for r in runs], pa.string())
+
+    tmp_path = path + ".tmp"
+    count = 0
+    with pq.ParquetWriter(tmp_path, parquet.schema_arrow, compression="zstd") as writer:
+        for batch in parquet.iter_batches():
+            table = pa.Table.from_batches([batch])
+            if rules.source_field not in table.column_names and "provenance" in table.column_names and runs:
+                table = table.append_column(rules.source_field, sources.take(table["provenance"]))
+            scores = pa.array(score_table(table, rules)).cast(parquet.schema_arrow.field(column).type)
+            out = pa.Table.from_batches([batch])
+            out = out.set_column(out.column_names.index(column), column, scores)
+            writer.write_table(out)
+            count += len(out)
+        if b"kosmos" in file_metadata:
+            writer.add_key_value_metadata({"kosmos": file_metadata[b"kosmos"].decode()})
+    os.replace(tmp_path, path)
+    return count
+
+
+def rescore_ndjson(path, rules, field_path="_kosmos.confidence_score", batch_size=50000):
+    """Recompute the score at field_path in every line of an NDJSON file, in place"""
+    *parents, leaf = field_path.split(".")
+    tmp_path = path + ".tmp"
+    count = 0
+
+    def flush(records, out):
+        scores = score_records(records, rules)
+        for record, score in zip(records, scores):
+            target = record
+            for key in parents:
+                target = target.setdefault(key, {})
+            target[leaf] = int(score)
+            out.write(json.dumps(record) + "\n")
+
+    with open(path) as f, open(tmp_path, 'w') as out:
+        batch = []
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                flush(batch, out)
+                count += len(batch)
+                batch = []
+        if batch:
+            flush(batch, out)
+            count += len(batch)
+    os.replace(tmp_path, path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored records with the current rules")
+    parser.add_argument("command", choices=["rescore"])
+    parser.add_argument("path", help=".parquet or .ndjson")
+    parser.add_argument("--entity", required=True, choices=sorted(RULES))
+    args = parser.parse_args()
+
+    rules = RULES[args.entity]
+    start = time.perf_counter()
+    if args.path.endswith(".parquet"):
+        count = rescore_parquet(args.path, rules)
+    else:
+        count = rescore_ndjson(args.path, rules)
+    print(f"✓ Re-scored {count:,} {args.entity} records in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
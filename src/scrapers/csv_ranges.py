@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Parallel CSV Reading
+Splits a CSV into byte ranges that start and end on record boundaries, so
+each range can be parsed on its own - on a process pool - and the results
+put back together in file order
+
+A newline only ends a record outside quotes, and a position is inside
+quotes when an odd number of quote characters come before it (an escaped
+"" counts twice, so leaves that unchanged). Counting quotes is a C-speed
+bytes.count, ~50x cheaper than parsing, so finding the boundaries is a
+small serial step. Assumes standard quoting - any field containing a quote
+is itself quoted, as csv.writer and pandas write them; a bare quote inside
+an unquoted field would throw the count off.
+
+    for rows in map_ranges(transform, "uk_schools_raw.csv", processes=8, encoding="latin-1"):
+        ...   # transform(path, start, end, fieldnames, encoding, *args) - results in file order
+
+Ranges are decoded the same way open(path, encoding=...) reads the whole
+file, so rows come out exactly as a serial csv.DictReader returns them.
+"""
+
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+QUOTE = b'"'
+NEWLINE = b"\n"
+
+# Bytes read at a time while counting quotes / looking for a boundary
+BLOCK_SIZE = 1 << 24
+SCAN_SIZE = 1 << 16
+# Ranges smaller than this aren't worth a task
+MIN_RANGE = 1 << 20
+# More ranges than processes, so a slow range doesn't leave cores idle
+RANGES_PER_PROCESS = 4
+
+
+def _count_quotes(f, start, end):
+    f.seek(start)
+    count = 0
+    while start < end:
+        block = f.read(min(BLOCK_SIZE, end - start))
+        if not block:
+            break
+        count += block.count(QUOTE)
+        start += len(block)
+    return count
+
+
+def _next_boundary(f, pos, quoted):
+    """Offset just past the first newline at or after pos that's outside quotes (or EOF)"""
+    f.seek(pos)
+    while True:
+        chunk = f.read(SCAN_SIZE)
+        if not chunk:
+            return pos
+        start = 0
+        while (newline := chunk.find(NEWLINE, start)) >= 0:
+            quoted ^= chunk.count(QUOTE, start, newline) & 1
+            if not quoted:
+                return pos + newline + 1
+            start = newline + 1
+        quoted ^= chunk.count(QUOTE, start) & 1
+        pos += len(chunk)
+
+
+def _text(data, encoding):
+    """Bytes read the way open(path, encoding=encoding) reads them (universal newlines)"""
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+
+
+def record_ranges(path, parts, encoding="utf-8", min_size=None):
+    """
+    (fieldnames, [(start, end), ...]) - up to `parts` byte ranges covering
+    every record after the header, each starting and ending on a record
+    boundary
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header_end = _next_boundary(f, 0, False)
+        f.seek(0)
+        fieldnames = next(csv.reader(_text(f.read(header_end), encoding)), None)
+
+        step = max(min_size or MIN_RANGE, -(-(size - header_end) // max(parts, 1)))
+        bounds = [header_end]
+        for target in range(header_end + step, size, step):
+            if target <= bounds[-1]:
+                continue
+            # Every boundary is outside quotes, so parity restarts from there
+            quoted = _count_quotes(f, bounds[-1], target) & 1
+            boundary = _next_boundary(f, target, bool(quoted))
+            if boundary >= size:
+                break
+            bounds.append(boundary)
+        bounds.append(size)
+
+    ranges = [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+    return fieldnames, ranges
+
+
+def read_range(path, start, end, fieldnames, encoding="utf-8"):
+    """csv.DictReader over one byte range"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return csv.DictReader(_text(data, encoding), fieldnames=fieldnames)
+
+
+def map_ranges(fn, path, processes=None, encoding="utf-8", args=(), min_size=None):
+    """
+    fn(path, start, end, fieldnames, encoding, *args) for every range of the
+    file, run on a process pool; yields the results in file order. fn must
+    be a module-level function (it's pickled to the workers)
+    """
+    processes = processes or os.cpu_count() or 1
+    fieldnames, ranges = record_ranges(path, processes * RANGES_PER_PROCESS, encoding, min_size)
+
+    if processes == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield fn(path, start, end, fieldnames, encoding, *args)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=min(processes, len(ranges)))
+    try:
+        # A bounded window of ranges in flight - results wait for the consumer, not the whole file
+        pending = deque()
+        for start, end in ranges:
+            pending.append(pool.submit(fn, path, start, end, fieldnames, encoding, *args))
+            if len(pending) > 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
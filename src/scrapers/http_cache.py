@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+KOSMOS HTTP Response Cache
+SQLite-backed cache shared by all scrapers
+
+- Keyed by method + URL + params
+- Per-endpoint TTLs, then conditional revalidation (ETag / Last-Modified)
+- Size-bounded, least-recently-used entries evicted first
+- Hit/miss counters (http_cache.stats())
+
+Drop-in for requests.get:  response = http_cache.get(url, headers=..., params=...)
+"""
+
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_PATH = os.environ.get(
+    "KOSMOS_HTTP_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "kosmos", "http_cache.sqlite")
+)
+MAX_BYTES = int(os.environ.get("KOSMOS_HTTP_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# First matching pattern wins
+TTLS = [
+    (r"/officers", 7 * DAY),
+    (r"/filing-history", DAY),
+    (r"/search", DAY),
+    (r"api\.company-information\.service\.gov\.uk/company/", 7 * DAY),
+    (r"api\.charitycommission\.gov\.uk", 30 * DAY),
+    (r"api\.parliament\.uk", DAY),
+]
+DEFAULT_TTL = DAY
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access);
+
+-- Running total of responses.size, kept by triggers so store() never has to
+-- SUM the table (a cache from before this row existed is summed once, here)
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('bytes', (SELECT COALESCE(SUM(size), 0) FROM responses));
+CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size ON responses BEGIN
+    UPDATE meta SET value = value + NEW.size - OLD.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE name = 'bytes';
+END;
+"""
+
+# Oldest entries read at a time while evicting
+EVICT_BATCH = 500
+# Cache hits whose last_access is held in memory before being written in one go
+ACCESS_FLUSH = 256
+
+
+def ttl_for(url):
+    for pattern, ttl in TTLS:
+        if re.search(pattern, url):
+            return ttl
+    return DEFAULT_TTL
+
+
+def cache_key(method, url, params=None):
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    return f"{method.upper()} {url}?{query}" if query else f"{method.upper()} {url}"
+
+
+class HttpCache:
+    """One SQLite file, one connection per thread"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "evicted": 0}
+        # key -> last access time, not yet written - a hit stays a read
+        self._accessed = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db().executescript(SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def lookup(self, key):
+        """Cached entry for key (or None), with entry["fresh"] set"""
+        row = self._db().execute(
+            "SELECT url, status, headers, body, etag, last_modified, expires_at FROM responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._accessed[key] = now
+            flush = len(self._accessed) >= ACCESS_FLUSH
+        if flush:
+            self.flush_access()
+
+        url, status, headers, body, etag, last_modified, expires_at = row
+        return {
+            "url": url,
+            "status": status,
+            "headers": json.loads(headers),
+            "body": body,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": expires_at > now,
+        }
+
+    def flush_access(self):
+        """Write the buffered last_access times - one transaction for the lot"""
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            with self._db() as db:
+                db.executemany(
+                    "UPDATE responses SET last_access = MAX(last_access, ?) WHERE key = ?",
+                    [(at, key) for key, at in accessed.items()]
+                )
+
+    def store(self, key, url, status, headers, body):
+        headers = dict(headers)
+        now = time.time()
+        with self._db() as db:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete
+            # wouldn't fire the delete trigger
+            db.execute(
+                """
+                INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    url = excluded.url, status = excluded.status, headers = excluded.headers,
+                    body = excluded.body, etag = excluded.etag, last_modified = excluded.last_modified,
+                    expires_at = excluded.expires_at, last_access = excluded.last_access,
+                    size = excluded.size
+                """,
+                (key, url, status, json.dumps(headers), body,
+                 headers.get("ETag") or headers.get("etag"),
+                 headers.get("Last-Modified") or headers.get("last-modified"),
+                 now + ttl_for(url), now, len(body))
+            )
+        self.count("stored")
+        self.evict()
+
+    def refresh(self, key, url):
+        """Server confirmed our copy (304) - start a new TTL"""
+        now = time.time()
+        with self._db() as db:
+            db.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + ttl_for(url), now, key)
+            )
+        self.count("revalidated")
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def total_bytes(self):
+        return self._db().execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+
+    def evict(self):
+        """Drop least-recently-used entries until under 90% of max_bytes"""
+        db = self._db()
+        if self.total_bytes() <= self.max_bytes:
+            return
+
+        # Recent hits count as recent before picking what to drop
+        self.flush_access()
+        target = self.max_bytes * 0.9
+        removed = 0
+        with db:
+            total = self.total_bytes()
+            while total > target:
+                oldest = db.execute(
+                    "SELECT key, size FROM responses ORDER BY last_access LIMIT ?", (EVICT_BATCH,)
+                ).fetchall()
+                if not oldest:
+                    break
+                for key, size in oldest:
+                    if total <= target:
+                        break
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+                    removed += 1
+        self.count("evicted", removed)
+
+    def stats(self):
+        db = self._db()
+        entries = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._lock:
+            return {**self.counters, "entries": entries, "bytes": self.total_bytes()}
+
+
+def _response(url, status, headers, body):
+    """Rebuild a requests.Response from a cached entry"""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.url = url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+    return response
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache (created on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+            atexit.register(_cache.flush_access)
+        return _cache
+
+
+def get(url, params=None, headers=None, timeout=30, limiter=None, **kwargs):
+    """
+    requests.get through the cache - only 200 responses are stored
+    limiter: rate_limit.Limiter, only consumed when we actually hit the network
+    """
+    cache = get_cache()
+    key = cache_key("GET", url, params)
+    entry = cache.lookup(key)
+
+    if entry and entry["fresh"]:
+        cache.count("hits")
+        return _response(entry["url"], entry["status"], entry["headers"], entry["body"])
+
+    request_headers = {**(headers or {}), **cache.conditional_headers(entry)}
+    if limiter:
+        limiter.acquire()
+    response = requests.get(url, params=params, headers=request_headers, timeout=timeout, **kwargs)
+
+    if response.status_code == 304 and entry:
+        cache.refresh(key, url)
+        cache.count("hits")
+        return _response(entry["url"], entry["status"], entry["headers"], entry["body"])
+
+    cache.count("misses")
+    if response.status_code == 200:
+        cache.store(key, url, 200, response.headers, response.content)
+    return response
+
+
+def stats():
+    return get_cache().stats()
+
+
+def print_stats():
+    s = stats()
+    print(f"HTTP cache: {s['hits']} hits, {s['misses']} misses, {s['revalidated']} revalidated, "
+          f"{s['entries']} entries ({s['bytes'] / 1024 / 1024:.1f} MB)")
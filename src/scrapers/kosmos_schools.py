@@ -4,118 +4,131 @@ KOSMOS Schools Collector - Full Field Collection
 Per spec: Provenance, confidence, timestamps on every record
 """
 
+import argparse
 import csv
 import json
-import hashlib
 from datetime import datetime
 import os
 
+from confidence import RULES, score_record
+from csv_ranges import map_ranges, read_range
+from provenance import hash_values
+from storage import atomic_open, category_dir, open_store
+
 SOURCE_URL = "https://raw.githubusercontent.com/MagneticMule/UK-School-Data/master/schools.csv"
 SOURCE_DATE = "2026-02-13"  # Will be updated
 INGESTED_AT = datetime.now().isoformat()
 
-def calculate_confidence(record_type, field_count):
-    """Calculate confidence based on data completeness"""
-    if field_count >= 10:
-        return 95
-    elif field_count >= 7:
-        return 80
-    elif field_count >= 5:
-        return 60
-    else:
-        return 40
+RAW_SCHOOLS_CSV = os.path.join(category_dir("education"), "uk_schools_raw.csv")
 
-def collect_schools():
-    """Collect all UK schools with full metadata"""
+def school_leader(row, ingested_at=INGESTED_AT):
+    """One raw CSV row -> a headteacher record, or None if there's no name"""
     
-    schools = []
+    # Create provenance hash
+    provenance_hash = hash_values(
+        [row.get('name', ''), row.get('town', ''), row.get('postcode', '')], "uk_schools_collector"
+    )
     
-    csv_file = "/home/ubuntu/.openclaw/workspace/kosmos/data/education/uk_schools_raw.csv"
+    record = {
+        # Universal requirements
+        "entity_type": "person",
+        "person_type": "education_leader",  # headteacher
+        "full_name": f"{row.get('headfirstname', '')} {row.get('headsecondname', '')}".strip(),
+        "aliases": [],
     
-    with open(csv_file, 'r', encoding='latin-1') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            # Create provenance hash
-            source_content = f"{row.get('name', '')}|{row.get('town', '')}|{row.get('postcode', '')}"
-            provenance_hash = hashlib.md5(source_content.encode()).hexdigest()
-            
-            record = {
-                # Universal requirements
-                "entity_type": "person",
-                "person_type": "education_leader",  # headteacher
-                "full_name": f"{row.get('headfirstname', '')} {row.get('headsecondname', '')}".strip(),
-                "aliases": [],
-                
-                # Position/Role
-                "position": {
-                    "title": row.get("headtitle", ""),
-                    "organisation": row.get("name", ""),  # School name
-                    "organisation_type": "school",
-                    "start_date": None,
-                    "end_date": None,
-                    "current": True
-                },
-                
-                # Organisation (School)
-                "organisation_details": {
-                    "name": row.get("name", ""),
-                    "type": row.get("type", ""),
-                    "address": {
-                        "street": row.get("street", ""),
-                        "locality": row.get("locality", ""),
-                        "town": row.get("town", ""),
-                        "county": row.get("county", ""),
-                        "postcode": row.get("postcode", ""),
-                        "country": "UK"
-                    },
-                    "contact": {
-                        "phone": row.get("tel", ""),
-                        "website": row.get("web", ""),
-                        "email": None  # Often not public
-                    }
-                },
-                
-                # Source tracking
-                "source_url": f"https://get-information-schools.service.gov.uk/",
-                "source_name": "UK School Data (GitHub)",
-                "source_date": SOURCE_DATE,
-                "ingested_at": INGESTED_AT,
-                
-                # Provenance
-                "provenance": {
-                    "pipeline": "uk_schools_collector",
-                    "source_hash": provenance_hash,
-                    "confidence_score": calculate_confidence("school", len([v for v in row.values() if v]))
-                },
-                
-                # Compliance
-                "gdpr_flags": {
-                    "public_only_contact": True,
-                    "minimised": False,
-                    "rectification_requested": False,
-                    "takedown_requested": False
-                },
-                
-                # Review tracking
-                "last_verified": INGESTED_AT,
-                "next_review_due": None
+        # Position/Role
+        "position": {
+            "title": row.get("headtitle", ""),
+            "organisation": row.get("name", ""),  # School name
+            "organisation_type": "school",
+            "start_date": None,
+            "end_date": None,
+            "current": True
+        },
+    
+        # Organisation (School)
+        "organisation_details": {
+            "name": row.get("name", ""),
+            "type": row.get("type", ""),
+            "address": {
+                "street": row.get("street", ""),
+                "locality": row.get("locality", ""),
+                "town": row.get("town", ""),
+                "county": row.get("county", ""),
+                "postcode": row.get("postcode", ""),
+                "country": "UK"
+            },
+            "contact": {
+                "phone": row.get("tel", ""),
+                "website": row.get("web", ""),
+                "email": None  # Often not public
             }
+        },
+    
+        # Source tracking
+        "source_url": f"https://get-information-schools.service.gov.uk/",
+        "source_name": "UK School Data (GitHub)",
+        "source_date": SOURCE_DATE,
+        "ingested_at": ingested_at,
+    
+        # Provenance
+        "provenance": {
+            "pipeline": "uk_schools_collector",
+            "source_hash": provenance_hash,
+            "confidence_score": score_record(row, RULES["education_leader"])
+        },
+    
+        # Compliance
+        "gdpr_flags": {
+            "public_only_contact": True,
+            "minimised": False,
+            "rectification_requested": False,
+            "takedown_requested": False
+        },
+    
+        # Review tracking
+        "last_verified": ingested_at,
+        "next_review_due": None
+    }
+    
+    # Only add if we have a name
+    if record["full_name"] and record["full_name"] != "None None":
+        return record
+    return None
+
+def _leader_range(path, start, end, fieldnames, encoding, ingested_at):
+    """A pool worker: school_leader for one byte range of the CSV"""
+    leaders = (school_leader(row, ingested_at) for row in read_range(path, start, end, fieldnames, encoding))
+    return [record for record in leaders if record]
+
+def collect_schools(csv_file=RAW_SCHOOLS_CSV, processes=1):
+    """
+    Collect all UK schools with full metadata. processes > 1 (None = one
+    per core) splits the CSV across a process pool - same records, same order
+    """
+    
+    schools = []
+    
+    if processes != 1:
+        for records in map_ranges(_leader_range, csv_file, processes, 'latin-1', (INGESTED_AT,)):
+            schools.extend(records)
+    else:
+        with open(csv_file, 'r', encoding='latin-1') as f:
+            reader = csv.DictReader(f)
             
-            # Only add if we have a name
-            if record["full_name"] and record["full_name"] != "None None":
-                schools.append(record)
+            for row in reader:
+                record = school_leader(row)
+                if record:
+                    schools.append(record)
     
     print(f"Collected {len(schools)} schools")
     return schools
 
-def save_schools(schools):
-    """Save to JSON with metadata"""
+def save_schools(schools, store=None):
+    """Save with metadata - JSON unless store (or KOSMOS_STORAGE) says otherwise"""
     
-    output_file = "/home/ubuntu/.openclaw/workspace/kosmos/data/education/people_schools.json"
-    
-    with open(output_file, 'w') as f:
-        json.dump(schools, f, indent=2)
+    store = store or open_store("education")
+    output_file = store.write("people_schools", schools)
     
     print(f"Saved to {output_file}")
     
@@ -128,12 +141,16 @@ def save_schools(schools):
         "person_type": "education_leader"
     }
     
-    meta_file = "/home/ubuntu/.openclaw/workspace/kosmos/data/education/people_schools.metadata.json"
-    with open(meta_file, 'w') as f:
+    meta_file = os.path.join(store.directory, "people_schools.metadata.json")
+    with atomic_open(meta_file) as f:
         json.dump(metadata, f, indent=2)
     
     print(f"Metadata saved to {meta_file}")
 
 if __name__ == "__main__":
-    schools = collect_schools()
+    parser = argparse.ArgumentParser(description="Collect UK headteachers from the schools CSV")
+    parser.add_argument("--processes", type=int, default=None, help="default: one per core")
+    args = parser.parse_args()
+    
+    schools = collect_schools(processes=args.processes)
     save_schools(schools)
@@ -2,157 +2,500 @@
 """
 KOSMOS Unified Data Collector
 Collects entities with full provenance, confidence scores, and GDPR compliance
+
+Records are kept compact: the fields that are the same for every record in
+a run (source, dates, GDPR flags) live once in a RunProvenance that all
+the run's records point at, and each KOSMOSRecord only holds its own data,
+confidence and source hash. The familiar {..., "_kosmos": {...}} dict is
+built on the way out (to_dict), so nothing downstream changes.
+
+    collector = SchoolsCollector()
+    collector.stream("schools.json")       # or .ndjson / .parquet - written as records are read
+    collector.collect(); collector.save("schools.json")   # in memory, as before
+
+SchoolsCollector(processes=8) reads the CSV on a process pool instead (see
+csv_ranges.py) - same records, in the same order.
 """
 
 import json
 import csv
-import hashlib
+import sys
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Any
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 import os
 
+from confidence import RULES, RuleSet, score_record
+from csv_ranges import map_ranges, read_range
+from provenance import RecordHasher, hash_record
+from storage import DATA_ROOT, category_dir, open_file, strip_compression, tmp_path
+
+RAW_SCHOOLS_CSV = os.path.join(category_dir("education"), "uk_schools_raw.csv")
+OUTPUT_ROOT = DATA_ROOT
+
+# Records per Parquet row group
+BATCH_SIZE = 10000
+
+
+@dataclass(frozen=True, slots=True)
+class RunProvenance:
+    """Everything a run's records share - one instance per source per run"""
+    entity_type: str
+    source_url: str
+    source_name: str
+    source_date: str
+    ingested_at: str
+    pipeline: str
+    gdpr_compliant: bool = True
+    
+    def gdpr_flags(self) -> Dict:
+        return {
+            "public_only_contact": self.gdpr_compliant,
+            "minimised": False,
+            "rectification_requested": False,
+            "takedown_requested": False
+        }
+    
+    def to_dict(self) -> Dict:
+        return {
+            "entity_type": self.entity_type,
+            "source_url": self.source_url,
+            "source_name": self.source_name,
+            "source_date": self.source_date,
+            "ingested_at": self.ingested_at,
+            "pipeline": self.pipeline,
+            "gdpr_flags": self.gdpr_flags(),
+        }
+
+
+@dataclass(slots=True)
+class KOSMOSRecord:
+    """One record: its own data + confidence + hash, and a pointer to the run's provenance"""
+    data: Any                   # dict, or a row object with to_dict()
+    confidence: int
+    source_hash: str
+    provenance: RunProvenance
+    
+    def fields(self) -> Dict:
+        return self.data.to_dict() if hasattr(self.data, "to_dict") else dict(self.data)
+    
+    def kosmos(self) -> Dict:
+        """The per-record "_kosmos" block"""
+        run = self.provenance
+        return {
+            "entity_type": run.entity_type,
+            "source_url": run.source_url,
+            "source_name": run.source_name,
+            "source_date": run.source_date,
+            "ingested_at": run.ingested_at,
+            "confidence_score": self.confidence,
+            "provenance": {
+                "pipeline": run.pipeline,
+                "source_hash": self.source_hash,
+                "ingested_at": run.ingested_at
+            },
+            "gdpr_flags": run.gdpr_flags(),
+            "last_verified": run.ingested_at,
+            "next_review_due": None
+        }
+    
+    def to_dict(self) -> Dict:
+        return {**self.fields(), "_kosmos": self.kosmos()}
+
+
+def _shared(value: str) -> str:
+    """Interned - towns, counties, types etc. repeat thousands of times"""
+    return sys.intern(value) if value else ""
+
+
+@dataclass(slots=True)
+class SchoolRow:
+    """A school as SchoolsCollector keeps it - flat, slotted, repeated values interned"""
+    name: str
+    type: str
+    local_authority: str
+    street: str
+    locality: str
+    town: str
+    county: str
+    postcode: str
+    phone: str
+    website: str
+    head_name: str
+    head_title: str
+    
+    @classmethod
+    def from_csv(cls, row: Dict) -> "SchoolRow":
+        return cls(
+            name=row.get("name", ""),
+            type=_shared(row.get("type", "")),
+            local_authority=_shared(row.get("la", "")),
+            street=row.get("street", ""),
+            locality=_shared(row.get("locality", "")),
+            town=_shared(row.get("town", "")),
+            county=_shared(row.get("county", "")),
+            postcode=row.get("postcode", ""),
+            phone=row.get("tel", ""),
+            website=row.get("web", ""),
+            head_name=f"{row.get('headfirstname', '')} {row.get('headsecondname', '')}".strip(),
+            head_title=_shared(row.get("headtitle", "")),
+        )
+    
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "local_authority": self.local_authority,
+            "address": {
+                "street": self.street,
+                "locality": self.locality,
+                "town": self.town,
+                "county": self.county,
+                "postcode": self.postcode,
+                "country": "UK"
+            },
+            "contact": {
+                "phone": self.phone,
+                "website": self.website,
+                "email": None
+            },
+            "headteacher": {
+                "name": self.head_name,
+                "title": self.head_title
+            }
+        }
+
+
+# --- Streaming writers -------------------------------------------------------
+
+def _indent(text: str, prefix: str = "  ") -> str:
+    """json.dump(list, indent=2) indents each record by one level"""
+    return "\n".join(prefix + line for line in text.split("\n"))
+
+
+class JSONWriter:
+    """
+    A JSON array, byte for byte as json.dump(records, indent=2) lays it out,
+    written a record at a time (.json.gz / .json.zst: compressed)
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = open_file(tmp_path(path), 'w')
+        self._file.write("[")
+    
+    def write(self, record: KOSMOSRecord):
+        self._file.write(",\n" if self.count else "\n")
+        self._file.write(_indent(json.dumps(record.to_dict(), indent=2)))
+        self.count += 1
+    
+    def close(self):
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+        os.replace(tmp_path(self.path), self.path)
+    
+    def abort(self):
+        self._file.close()
+        os.remove(tmp_path(self.path))
+
+
+class NDJSONWriter:
+    """One record per line, written as it arrives (.ndjson.gz / .ndjson.zst: compressed)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = open_file(tmp_path(path), 'w')
+    
+    def write(self, record: KOSMOSRecord):
+        self._file.write(json.dumps(record.to_dict()) + "\n")
+        self.count += 1
+    
+    def close(self):
+        self._file.close()
+        os.replace(tmp_path(self.path), self.path)
+    
+    def abort(self):
+        self._file.close()
+        os.remove(tmp_path(self.path))
+
+
+class ParquetWriter:
+    """
+    Row groups of batch_size records. The run's provenance goes in the file
+    metadata once ("kosmos" key); rows carry their own confidence + hash
+    """
+    
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self._batch = []
+        self._writer = None
+        self._provenance = []
+    
+    def write(self, record: KOSMOSRecord):
+        if record.provenance not in self._provenance:
+            self._provenance.append(record.provenance)
+        self._batch.append({
+            **record.fields(),
+            "confidence_score": record.confidence,
+            "source_hash": record.source_hash,
+            "provenance": self._provenance.index(record.provenance),
+        })
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+    
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        if not self._batch:
+            return
+        if self._writer is None:
+            table = pa.Table.from_pylist(self._batch)
+            self._writer = pq.ParquetWriter(self.path + ".tmp", table.schema, compression="zstd")
+        else:
+            table = pa.Table.from_pylist(self._batch, schema=self._writer.schema)
+        self._writer.write_table(table)
+        self._batch = []
+    
+    def close(self):
+        self._flush()
+        if self._writer is None:
+            return
+        # Provenance is only complete now - "provenance" in each row indexes this list
+        self._writer.add_key_value_metadata(
+            {"kosmos": json.dumps([p.to_dict() for p in self._provenance])}
+        )
+        self._writer.close()
+        os.replace(self.path + ".tmp", self.path)
+    
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self.path + ".tmp")
+
+
+def open_writer(path: str, batch_size: int = BATCH_SIZE):
+    if path.endswith(".parquet"):
+        return ParquetWriter(path, batch_size)
+    if strip_compression(path).endswith((".ndjson", ".jsonl")):
+        return NDJSONWriter(path)
+    if strip_compression(path).endswith(".json"):
+        return JSONWriter(path)
+    raise ValueError(f"Can't stream to {path} - use .json / .ndjson (.gz / .zst) or .parquet")
+
+
 class KOSMOSCollector:
     """Base collector with common functionality"""
     
     def __init__(self, entity_type: str):
         self.entity_type = entity_type
-        self.ingested_at = datetime.now().isoformat()
-        self.records = []
-        
+        now = datetime.now()
+        self.ingested_at = now.isoformat()
+        self.source_date = now.strftime("%Y-%m-%d")
+        self.records: List[KOSMOSRecord] = []
+        self.record_count = 0
+        self._provenance: Dict[tuple, RunProvenance] = {}
+    
     def calculate_confidence(self, record: Dict, required_fields: List[str]) -> int:
-        """Calculate confidence based on data completeness"""
-        filled_fields = sum(1 for f in required_fields if record.get(f))
-        percentage = (filled_fields / len(required_fields)) * 100
-        return round(percentage, 0)
+        """Calculate confidence based on data completeness (see confidence.py)"""
+        return score_record(record, RuleSet(self.entity_type, fields=tuple(required_fields)))
+    
+    def source_hash(self, record: Dict) -> str:
+        return hash_record(record, self.entity_type)
     
     def create_provenance(self, record: Dict, pipeline: str) -> Dict:
         """Create provenance hash"""
-        key_content = f"{self.entity_type}|{json.dumps(record, sort_keys=True)}"
         return {
             "pipeline": pipeline,
-            "source_hash": hashlib.md5(key_content.encode()).hexdigest(),
+            "source_hash": self.source_hash(record),
             "ingested_at": self.ingested_at
         }
     
-    def add_universal_fields(self, record: Dict, source_url: str, source_name: str, 
+    def run_provenance(self, source_url: str, source_name: str, gdpr_compliant: bool = True) -> RunProvenance:
+        """The run's shared provenance for this source - created once, reused by every record"""
+        key = (source_url, source_name, gdpr_compliant)
+        if key not in self._provenance:
+            self._provenance[key] = RunProvenance(
+                entity_type=self.entity_type,
+                source_url=source_url,
+                source_name=source_name,
+                source_date=self.source_date,
+                ingested_at=self.ingested_at,
+                pipeline=f"{self.entity_type}_collector",
+                gdpr_compliant=gdpr_compliant,
+            )
+        return self._provenance[key]
+    
+    def make_record(self, row: Any, source_url: str, source_name: str, confidence: int,
+                    gdpr_compliant: bool = True) -> KOSMOSRecord:
+        """A compact record - row is a dict or a row object with to_dict()"""
+        record = row.to_dict() if hasattr(row, "to_dict") else row
+        return KOSMOSRecord(
+            data=row,
+            confidence=confidence,
+            source_hash=self.source_hash(record),
+            provenance=self.run_provenance(source_url, source_name, gdpr_compliant),
+        )
+    
+    def add_universal_fields(self, record: Dict, source_url: str, source_name: str,
                            confidence: int, gdpr_compliant: bool = True) -> Dict:
         """Add universal KOSMOS fields to any record"""
-        return {
-            **record,
-            "_kosmos": {
-                "entity_type": self.entity_type,
-                "source_url": source_url,
-                "source_name": source_name,
-                "source_date": datetime.now().strftime("%Y-%m-%d"),
-                "ingested_at": self.ingested_at,
-                "confidence_score": confidence,
-                "provenance": self.create_provenance(record, f"{self.entity_type}_collector"),
-                "gdpr_flags": {
-                    "public_only_contact": gdpr_compliant,
-                    "minimised": False,
-                    "rectification_requested": False,
-                    "takedown_requested": False
-                },
-                "last_verified": self.ingested_at,
-                "next_review_due": None
-            }
-        }
+        return self.make_record(record, source_url, source_name, confidence, gdpr_compliant).to_dict()
     
-    def save(self, filename: str):
-        """Save records to JSON"""
-        output_dir = f"/home/ubuntu/.openclaw/workspace/kosmos/data/{self.entity_type}"
+    def iter_records(self) -> Iterator[KOSMOSRecord]:
+        """Subclasses yield their records here, one at a time"""
+        raise NotImplementedError
+    
+    def collect(self) -> List[KOSMOSRecord]:
+        """Every record, held in memory (see stream() for big sources)"""
+        self.records = list(self.iter_records())
+        self.record_count = len(self.records)
+        return self.records
+    
+    def output_path(self, filename: str) -> str:
+        output_dir = os.path.join(OUTPUT_ROOT, self.entity_type)
         os.makedirs(output_dir, exist_ok=True)
-        
-        output_file = os.path.join(output_dir, filename)
-        
-        with open(output_file, 'w') as f:
-            json.dump(self.records, f, indent=2)
-        
-        print(f"✓ Saved {len(self.records)} {self.entity_type} records to {output_file}")
-        
-        # Save metadata
+        return os.path.join(output_dir, filename)
+    
+    def save_metadata(self, output_file: str, record_count: int):
         metadata = {
             "entity_type": self.entity_type,
             "collection_date": self.ingested_at,
-            "record_count": len(self.records),
+            "record_count": record_count,
             "source": self.entity_type
         }
         
-        meta_file = output_file.replace('.json', '.metadata.json')
+        meta_file = os.path.splitext(strip_compression(output_file))[0] + '.metadata.json'
         with open(meta_file, 'w') as f:
             json.dump(metadata, f, indent=2)
+    
+    def save(self, filename: str):
+        """Save records to JSON (schools.json.gz / .zst: compressed)"""
+        output_file = self.output_path(filename)
+        
+        # One record at a time - the full list of expanded dicts never exists
+        writer = JSONWriter(output_file)
+        try:
+            for record in self.records:
+                writer.write(record)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
         
+        print(f"✓ Saved {len(self.records)} {self.entity_type} records to {output_file}")
+        self.save_metadata(output_file, len(self.records))
+        
+        return output_file
+    
+    def stream(self, filename: str, records: Optional[Iterable[KOSMOSRecord]] = None,
+               batch_size: int = BATCH_SIZE) -> str:
+        """Write records (default: iter_records()) to .json / .ndjson / .parquet as they're produced"""
+        output_file = self.output_path(filename)
+        writer = open_writer(output_file, batch_size)
+        try:
+            for record in records if records is not None else self.iter_records():
+                writer.write(record)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        self.record_count = writer.count
+        
+        print(f"✓ Streamed {writer.count} {self.entity_type} records to {output_file}")
+        self.save_metadata(output_file, writer.count)
         return output_file
 
 
+# SchoolRow's fields, in order - no need to build the nested dict to hash it
+SCHOOL_HASHER = RecordHasher.for_attributes(SchoolRow.__slots__, "education")
+_school_values = attrgetter(*SchoolRow.__slots__)
+
+
+def _school(row: Dict, rules: RuleSet):
+    """One CSV row -> (SchoolRow, confidence, source hash) - the serial and parallel paths share it"""
+    school = SchoolRow.from_csv(row)
+    return school, score_record(school.to_dict(), rules), SCHOOL_HASHER(school)
+
+
+def _school_range(path: str, start: int, end: int, fieldnames: List[str], encoding: str,
+                  rules: RuleSet) -> List[tuple]:
+    """A pool worker: one byte range of the CSV -> (SchoolRow fields, confidence, hash) tuples"""
+    rows = []
+    for row in read_range(path, start, end, fieldnames, encoding):
+        school, confidence, source_hash = _school(row, rules)
+        # Plain tuples pickle back to the parent far faster than dataclasses
+        rows.append((_school_values(school), confidence, source_hash))
+    return rows
+
+
 class SchoolsCollector(KOSMOSCollector):
     """Collect UK schools with headteachers"""
     
-    def __init__(self):
+    def __init__(self, csv_file: str = RAW_SCHOOLS_CSV, processes: Optional[int] = 1):
         super().__init__("education")
+        self.csv_file = csv_file
         self.source_url = "https://github.com/MagneticMule/UK-School-Data"
         self.source_name = "UK School Data (GitHub)"
-        self.required_fields = ["name", "postcode", "phone"]
-        
-    def collect(self):
-        """Collect schools from CSV"""
-        csv_file = "/home/ubuntu/.openclaw/workspace/kosmos/data/education/uk_schools_raw.csv"
+        self.rules = RULES["education"]
+        # 1: read the CSV here; more (None = one per core): split it across a process pool
+        self.processes = processes
+    
+    def iter_records(self) -> Iterator[KOSMOSRecord]:
+        """Schools from the CSV, one at a time"""
+        provenance = self.run_provenance(self.source_url, self.source_name)
+        if self.processes != 1:
+            yield from self._iter_parallel(provenance)
+            return
         
-        with open(csv_file, 'r', encoding='latin-1') as f:
+        with open(self.csv_file, 'r', encoding='latin-1') as f:
             reader = csv.DictReader(f)
             
             for row in reader:
-                record = {
-                    "name": row.get("name", ""),
-                    "type": row.get("type", ""),
-                    "local_authority": row.get("la", ""),
-                    "address": {
-                        "street": row.get("street", ""),
-                        "locality": row.get("locality", ""),
-                        "town": row.get("town", ""),
-                        "county": row.get("county", ""),
-                        "postcode": row.get("postcode", ""),
-                        "country": "UK"
-                    },
-                    "contact": {
-                        "phone": row.get("tel", ""),
-                        "website": row.get("web", ""),
-                        "email": None
-                    },
-                    "headteacher": {
-                        "name": f"{row.get('headfirstname', '')} {row.get('headsecondname', '')}".strip(),
-                        "title": row.get("headtitle", "")
-                    }
-                }
-                
-                confidence = self.calculate_confidence(record, self.required_fields)
-                record = self.add_universal_fields(
-                    record, self.source_url, self.source_name, confidence
+                school, confidence, source_hash = _school(row, self.rules)
+                yield KOSMOSRecord(
+                    data=school,
+                    confidence=confidence,
+                    source_hash=source_hash,
+                    provenance=provenance,
+                )
+    
+    def _iter_parallel(self, provenance: RunProvenance) -> Iterator[KOSMOSRecord]:
+        """The same records, transformed range by range on a process pool and merged in file order"""
+        ranges = map_ranges(_school_range, self.csv_file, self.processes, 'latin-1', (self.rules,))
+        for rows in ranges:
+            for values, confidence, source_hash in rows:
+                yield KOSMOSRecord(
+                    data=SchoolRow(*values),
+                    confidence=confidence,
+                    source_hash=source_hash,
+                    provenance=provenance,
                 )
-                
-                self.records.append(record)
-        
-        return self.records
 
 
-def run_all_collectors():
-    """Run all entity collectors"""
+def run_all_collectors(processes: Optional[int] = 1):
+    """Run all entity collectors (processes: for the CSV sources, None = one per core)"""
     
     print("=" * 60)
     print("K O S M O S - Data Collection")
     print("=" * 60)
     
-    # Schools
+    # Schools - streamed straight to disk, the same schools.json as ever
     print("\n📚 Collecting Schools...")
-    schools = SchoolsCollector()
-    schools.collect()
-    schools.save("schools.json")
+    schools = SchoolsCollector(processes=processes)
+    schools.stream("schools.json")
     
     # Summary
     print("\n" + "=" * 60)
     print("COLLECTION COMPLETE")
     print("=" * 60)
-    print(f"Total records: {len(schools.records)}")
+    print(f"Total records: {schools.record_count}")
 
 
 if __name__ == "__main__":
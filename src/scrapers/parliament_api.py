@@ -5,19 +5,22 @@ FREE - Official UK Parliament Open Data
 https://developer.parliament.uk/
 """
 
-import requests
 import json
-import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import http_cache
+from rate_limit import Limiter
+from storage import atomic_open, category_dir, open_store
+
 BASE_URL = "https://api.parliament.uk"
-DATA_DIR = "/home/ubuntu/.openclaw/workspace/kosmos/data/politics"
-OUTPUT_FILE = os.path.join(DATA_DIR, "parliament.json")
+DATA_DIR = category_dir("politics")
 
 # No API key required for basic endpoints
 # Rate limit: 200 requests/10 seconds
 # Register for higher limits: https://developer.parliament.uk/
+LIMITER = Limiter(200, 10)
 
 HEADERS = {
     "Accept": "application/json"
@@ -27,65 +30,180 @@ HEADERS = {
 MEMENTS_API = "https://api.parliament.uk/historic-mp-api"
 
 
-def get_all_mps():
-    """Get all current MPs"""
-    endpoint = f"{BASE_URL}/historic-mp-api/v1/members"
-    
-    mps = []
-    page = 1
-    per_page = 200
-    
-    while True:
-        try:
-            response = requests.get(
-                endpoint,
-                headers=HEADERS,
-                params={"page": page, "size": per_page},
-                timeout=30
-            )
+# Output field -> path into each item's "value"
+MP_FIELDS = {
+    "id": ("id",),
+    "full_title": ("fullTitle",),
+    "name": ("name", "listAs"),
+    "first_name": ("name", "firstName"),
+    "last_name": ("name", "lastName"),
+    "gender": ("gender",),
+    "birth_date": ("dateOfBirth",),
+    "house": ("house",),
+    "party": ("party", "name"),
+    "constituency": ("constituency", "name"),
+    "from_date": ("fromDate",),
+}
+
+LORD_FIELDS = {
+    "id": ("id",),
+    "full_title": ("fullTitle",),
+    "name": ("name", "listAs"),
+    "title": ("name", "title"),
+    "first_name": ("name", "firstName"),
+    "last_name": ("name", "lastName"),
+    "party": ("party", "name"),
+    "lords_type": ("lordsType",),
+    "from_date": ("fromDate",),
+}
+
+# house -> (label, endpoint, fields, type)
+HOUSES = {
+    "mps": ("MPs", f"{BASE_URL}/historic-mp-api/v1/members", MP_FIELDS, "MP"),
+    "lords": ("Lords", f"{BASE_URL}/historic-lords-api/v1/members", LORD_FIELDS, "Lord"),
+}
+
+PER_PAGE = 200
+# Page requests in flight per House - LIMITER sets the actual pace
+MAX_WORKERS = 20
+
+
+def project_member(item, fields, member_type, collected_at):
+    """Flatten one API item to a record, "" where a field is missing"""
+    value = item.get("value") or {}
+    record = {}
+    
+    for key, path in fields.items():
+        field = value
+        for part in path:
+            field = field.get(part) if isinstance(field, dict) else None
+        record[key] = "" if field is None else field
+    
+    record["source"] = "UK Parliament API"
+    record["collected_at"] = collected_at
+    record["type"] = member_type
+    return record
+
+
+def fetch_page(endpoint, page, per_page=PER_PAGE):
+    """One page of a members endpoint as JSON; None on error"""
+    try:
+        response = http_cache.get(
+            endpoint,
+            headers=HEADERS,
+            params={"page": page, "size": per_page},
+            timeout=30,
+            limiter=LIMITER
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print(f"Error: {response.status_code}")
+            return None
             
-            if response.status_code == 200:
-                data = response.json()
-                items = data.get("items", [])
-                
-                if not items:
-                    break
-                
-                for item in items:
-                    mp = {
-                        "id": item.get("value", {}).get("id", ""),
-                        "full_title": item.get("value", {}).get("fullTitle", ""),
-                        "name": item.get("value", {}).get("name", {}).get("listAs", ""),
-                        "first_name": item.get("value", {}).get("name", {}).get("firstName", ""),
-                        "last_name": item.get("value", {}).get("name", {}).get("lastName", ""),
-                        "gender": item.get("value", {}).get("gender", ""),
-                        "birth_date": item.get("value", {}).get("dateOfBirth", ""),
-                        "house": item.get("value", {}).get("house", ""),
-                        "party": item.get("value", {}).get("party", {}).get("name", ""),
-                        "constituency": item.get("value", {}).get("constituency", {}).get("name", ""),
-                        "from_date": item.get("value", {}).get("fromDate", ""),
-                        "source": "UK Parliament API",
-                        "collected_at": datetime.now().isoformat()
-                    }
-                    mps.append(mp)
-                
-                print(f"Page {page}: {len(items)} MPs")
-                
-                if len(items) < per_page:
-                    break
-                    
-                page += 1
-                time.sleep(0.5)
-                
-            else:
-                print(f"Error: {response.status_code}")
+    except Exception as e:
+        print(f"Exception: {e}")
+        return None
+
+
+def total_results(data):
+    for key in ("totalResults", "totalItems", "total"):
+        if isinstance(data.get(key), int):
+            return data[key]
+    return None
+
+
+def iter_pages(endpoint, start_page=1, per_page=PER_PAGE, max_workers=MAX_WORKERS):
+    """
+    Yield (page, items) in page order
+    The first page gives the total, then every remaining page is fetched concurrently.
+    Stops at the first failed page, yielding (page, None) for it, so whatever
+    came before is a contiguous prefix - running out without one means every
+    page was fetched.
+    """
+    data = fetch_page(endpoint, start_page, per_page)
+    if not data:
+        yield start_page, None
+        return
+    if not data.get("items"):
+        return
+    yield start_page, data["items"]
+    
+    total = total_results(data)
+    
+    if total is None:
+        # No count in the response - fall back to walking pages until a short one
+        page, items = start_page, data["items"]
+        while len(items) == per_page:
+            page += 1
+            data = fetch_page(endpoint, page, per_page)
+            if not data:
+                yield page, None
+                return
+            items = data.get("items", [])
+            if not items:
+                return
+            yield page, items
+        return
+    
+    pages = range(start_page + 1, -(-total // per_page) + 1)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for page, data in zip(pages, pool.map(lambda p: fetch_page(endpoint, p, per_page), pages)):
+            if not data:
+                yield page, None
+                return
+            yield page, data.get("items", [])
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def get_house(house, checkpoint=None):
+    """
+    All members of one House, streamed to <DATA_DIR>/<house>.ndjson page by page
+    checkpoint: checkpoint.Checkpoint - flushed per page, resumes at the next
+    page, and finished once the last page is in
+    """
+    label, endpoint, fields, member_type = HOUSES[house]
+    collected_at = datetime.now().isoformat()
+    
+    members = checkpoint.records() if checkpoint else []
+    start_page = checkpoint.get("page", 1) if checkpoint else 1
+    
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"{house}.ndjson")
+    
+    with atomic_open(path) as f:
+        for member in members:
+            f.write(json.dumps(member) + "\n")
+        
+        for page, items in iter_pages(endpoint, start_page):
+            if items is None:
+                print(f"{label} page {page} failed - stopping at {len(members)}")
                 break
-                
-        except Exception as e:
-            print(f"Exception: {e}")
-            break
+            
+            page_members = [project_member(item, fields, member_type, collected_at) for item in items]
+            
+            for member in page_members:
+                f.write(json.dumps(member) + "\n")
+            members.extend(page_members)
+            
+            if checkpoint:
+                checkpoint.flush(page_members, page=page + 1)
+            
+            print(f"{label} page {page}: {len(items)} ({len(members)} total)")
+        
+        else:
+            if checkpoint:
+                checkpoint.finish(collected=len(members))
     
-    return mps
+    return members
+
+
+def get_all_mps(checkpoint=None):
+    """Get all current MPs"""
+    return get_house("mps", checkpoint)
 
 
 def get_mp_details(mp_id):
@@ -93,7 +211,7 @@ def get_mp_details(mp_id):
     endpoint = f"{BASE_URL}/historic-mp-api/v1/members/{mp_id}"
     
     try:
-        response = requests.get(endpoint, headers=HEADERS, timeout=30)
+        response = http_cache.get(endpoint, headers=HEADERS, timeout=30, limiter=LIMITER)
         
         if response.status_code == 200:
             return response.json()
@@ -105,63 +223,9 @@ def get_mp_details(mp_id):
         return None
 
 
-def get_all_lords():
+def get_all_lords(checkpoint=None):
     """Get all current Lords"""
-    endpoint = f"{BASE_URL}/historic-lords-api/v1/members"
-    
-    lords = []
-    page = 1
-    per_page = 200
-    
-    while True:
-        try:
-            response = requests.get(
-                endpoint,
-                headers=HEADERS,
-                params={"page": page, "size": per_page},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                items = data.get("items", [])
-                
-                if not items:
-                    break
-                
-                for item in items:
-                    lord = {
-                        "id": item.get("value", {}).get("id", ""),
-                        "full_title": item.get("value", {}).get("fullTitle", ""),
-                        "name": item.get("value", {}).get("name", {}).get("listAs", ""),
-                        "title": item.get("value", {}).get("name", {}).get("title", ""),
-                        "first_name": item.get("value", {}).get("name", {}).get("firstName", ""),
-                        "last_name": item.get("value", {}).get("name", {}).get("lastName", ""),
-                        "party": item.get("value", {}).get("party", {}).get("name", ""),
-                        "lords_type": item.get("value", {}).get("lordsType", ""),
-                        "from_date": item.get("value", {}).get("fromDate", ""),
-                        "source": "UK Parliament API",
-                        "collected_at": datetime.now().isoformat()
-                    }
-                    lords.append(lord)
-                
-                print(f"Page {page}: {len(lords)} Lords total")
-                
-                if len(items) < per_page:
-                    break
-                    
-                page += 1
-                time.sleep(0.5)
-                
-            else:
-                print(f"Error: {response.status_code}")
-                break
-                
-        except Exception as e:
-            print(f"Exception: {e}")
-            break
-    
-    return lords
+    return get_house("lords", checkpoint)
 
 
 def get_constituencies():
@@ -169,7 +233,7 @@ def get_constituencies():
     endpoint = f"{BASE_URL}/election-results/api/v1/constituencies"
     
     try:
-        response = requests.get(endpoint, headers=HEADERS, timeout=30)
+        response = http_cache.get(endpoint, headers=HEADERS, timeout=30, limiter=LIMITER)
         
         if response.status_code == 200:
             return response.json()
@@ -181,39 +245,39 @@ def get_constituencies():
         return None
 
 
-def collect_parliament_data():
-    """Main collection function"""
+def collect_parliament_data(checkpoint=None):
+    """
+    Main collection function
+    checkpoint: checkpoint.Checkpoint - MPs and Lords each get their own
+    child, and it's finished once both of them are
+    """
     print("=" * 50)
     print("KOSMOS - UK Parliament Data Collector")
     print("=" * 50)
     
     os.makedirs(DATA_DIR, exist_ok=True)
     
-    all_politicians = []
+    # Both Houses at once - they share LIMITER, so together they stay within budget
+    print("\nCollecting MPs and Lords...")
+    houses = [checkpoint.child("mps"), checkpoint.child("lords")] if checkpoint else [None, None]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        mps_future = pool.submit(get_all_mps, houses[0])
+        lords_future = pool.submit(get_all_lords, houses[1])
+        mps = mps_future.result()
+        lords = lords_future.result()
     
-    # Collect MPs
-    print("\n1. Collecting MPs...")
-    mps = get_all_mps()
     print(f"✓ Collected {len(mps)} MPs")
-    
-    for mp in mps:
-        mp["type"] = "MP"
-        all_politicians.append(mp)
-    
-    # Collect Lords
-    print("\n2. Collecting Lords...")
-    lords = get_all_lords()
     print(f"✓ Collected {len(lords)} Lords")
     
-    for lord in lords:
-        lord["type"] = "Lord"
-        all_politicians.append(lord)
+    all_politicians = mps + lords
     
     # Save combined data
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(all_politicians, f, indent=2)
+    output_file = open_store("politics").write("parliament", all_politicians)
+    
+    print(f"\n✓ Saved {len(all_politicians)} politicians to {output_file}")
     
-    print(f"\n✓ Saved {len(all_politicians)} politicians to {OUTPUT_FILE}")
+    if checkpoint and all(house.complete for house in houses):
+        checkpoint.finish(collected=len(all_politicians))
     
     # Summary
     print("\n" + "=" * 50)
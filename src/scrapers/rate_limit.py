@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Rate Limiting
+Token buckets shared by the API clients (async and blocking)
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allow `capacity` requests per `period` seconds, refilling continuously
+    e.g. TokenBucket(600, 10) for Companies House with an API key
+    """
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        # A threading lock, not an asyncio one: it's only held for the
+        # arithmetic, never across an await, so one bucket can be shared by
+        # coroutines on any number of event loops and threads
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        while True:
+            with self._lock:
+                now = self._refill()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Server said slow down (429 / Retry-After) - hold everyone back"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class Limiter:
+    """
+    Blocking, thread-safe token bucket for the requests-based scrapers
+    e.g. Limiter(200, 10) for the Parliament API
+    """
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.rate)
+
+
+def retry_after_seconds(headers, default=60):
+    """Parse a Retry-After header (seconds or HTTP date)"""
+    value = headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        from email.utils import parsedate_to_datetime
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return default
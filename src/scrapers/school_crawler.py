@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+KOSMOS School Website Crawler
+Reads school websites for emails, staff contacts, governors and the pupil
+premium / SEND / financial report pages
+
+- one shared keep-alive connection pool for every site
+- per-host politeness delay (or the site's Crawl-delay, if longer)
+- robots.txt fetched once per host and cached
+- per-school budget: MAX_PAGES pages, MAX_DEPTH links from the homepage,
+  following only links that look like contact/staff/governor/policy pages
+- pages are parsed as they stream in, capped at MAX_PAGE_BYTES
+
+    results = crawl_schools(["www.latimerprimary.co.uk", ...])
+    python src/scrapers/school_crawler.py data/leicester_schools.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+USER_AGENT = "KOSMOS school directory (public data)"
+MAX_CONNECTIONS = 200
+CONCURRENT_SCHOOLS = 200
+POLITENESS_DELAY = 1.0
+TIMEOUT = 20
+
+MAX_PAGES = 8
+MAX_DEPTH = 2
+MAX_PAGE_BYTES = 512 * 1024
+
+# Pages worth reading, by link text / URL
+PAGE_KEYWORDS = {
+    "contact": re.compile(r"contact", re.I),
+    "staff": re.compile(r"staff|our[-\s]?team|who[-\s]?.?s[-\s]?who", re.I),
+    "governors": re.compile(r"governor|governance|trustee", re.I),
+    "pupil_premium": re.compile(r"pupil[-\s]?premium", re.I),
+    "send": re.compile(r"\bsend\b|\bsen\b|special[-\s]educational|senco|inclusion", re.I),
+    "financial": re.compile(r"financ|benchmarking|accounts", re.I),
+}
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+NOT_EMAIL_RE = re.compile(r"\.(png|jpe?g|gif|svg|webp|css|js)$", re.I)
+PERSON_RE = re.compile(r"\b(?:Mr|Mrs|Ms|Miss|Dr|Rev|Revd)\.?[ \t]+[A-Z][a-z'-]+(?:[ \t]+[A-Z][a-z'-]+){1,2}")
+ROLE_RE = re.compile(
+    r"\b(?:(?:Executive |Deputy |Assistant )?Head ?teacher|Head of School|(?:Executive |Deputy |Assistant )?Head"
+    r"|(?:Vice |Assistant )?Principal|SENC[Oo]|SENDC[Oo]|(?:School )?Business Manager|Office Manager|Bursar"
+    r"|Administrator|Designated Safeguarding Lead|Chair of Governors|Clerk to (?:the )?Governors"
+    r"|Teaching Assistant|(?:Class )?Teacher)\b", re.I)
+# Text in different blocks is kept on different lines, so names don't run together
+BLOCK_TAGS = {"p", "br", "li", "div", "td", "th", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+SKIP_LINK_RE = re.compile(r"^(mailto:|tel:|javascript:)|\.(pdf|docx?|xlsx?|pptx?|jpe?g|png|gif|zip)(\?|$)", re.I)
+# Generic addresses the school office answers, best first
+OFFICE_PREFIXES = ("office", "admin", "enquiries", "enquiry", "info", "head", "reception")
+
+
+class PageParser(HTMLParser):
+    """Incremental parser: feed() chunks as they arrive, keeps links + visible text"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.text = []
+        self._href = None
+        self._label = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag == "a":
+            self._href = dict(attrs).get("href")
+            self._label = []
+            # mailto: links are often the only place an address appears
+            if self._href and self._href.lower().startswith("mailto:"):
+                self.text.append(" " + self._href[7:].split("?")[0] + " ")
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+        elif tag == "a" and self._href:
+            self.links.append((self._href, " ".join(self._label)))
+            self._href = None
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        self.text.append(data)
+        if self._href:
+            self._label.append(data)
+
+
+def find_emails(text):
+    emails = []
+    for email in EMAIL_RE.findall(text):
+        email = email.lower()
+        if not NOT_EMAIL_RE.search(email) and email not in emails:
+            emails.append(email)
+    return emails
+
+
+def find_people(text):
+    people = []
+    for name in PERSON_RE.findall(text):
+        if name not in people:
+            people.append(name)
+    return people
+
+
+def find_staff(text):
+    """"Name (Role) email" for each titled name; role and email come from its line or the two after"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    staff = {}
+    for i, line in enumerate(lines):
+        following = ""
+        for after in lines[i + 1:i + 3]:
+            if PERSON_RE.search(after):
+                break
+            following += " " + after
+        for name in PERSON_RE.findall(line):
+            if name in staff:
+                continue
+            role = ROLE_RE.search(line) or ROLE_RE.search(following)
+            email = EMAIL_RE.search(line) or EMAIL_RE.search(following)
+            staff[name] = " ".join(filter(None, (
+                name, role and f"({role.group(0)})", email and email.group(0).lower())))
+    return list(staff.values())
+
+
+def website_url(website):
+    website = (website or "").strip()
+    if not website:
+        return None
+    return website if website.startswith(("http://", "https://")) else f"http://{website}"
+
+
+def _site(host):
+    return host.lower().removeprefix("www.")
+
+
+def best_email(emails, website):
+    """The school office address - on the school's own domain if there is one"""
+    if not emails:
+        return ""
+    domain = _site(urlparse(website_url(website) or "").netloc)
+
+    def rank(email):
+        local, _, host = email.partition("@")
+        on_site = bool(domain) and (host == domain or host.endswith("." + domain) or domain.endswith(host))
+        prefix = next((i for i, p in enumerate(OFFICE_PREFIXES) if local.startswith(p)), len(OFFICE_PREFIXES))
+        return (not on_site, prefix)
+
+    return min(emails, key=rank)
+
+
+def topic_of(url, label):
+    target = f"{url} {label}"
+    for topic, pattern in PAGE_KEYWORDS.items():
+        if pattern.search(target):
+            return topic
+    return None
+
+
+class SchoolCrawler:
+    """
+    async with SchoolCrawler() as crawler:
+        result = await crawler.crawl_school("www.example.sch.uk")
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, delay=POLITENESS_DELAY, max_pages=MAX_PAGES,
+                 max_depth=MAX_DEPTH, timeout=TIMEOUT):
+        self.max_connections = max_connections
+        self.delay = delay
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.client = None
+        self.robots = {}
+        self._robots_locks = {}
+        self._host_locks = {}
+        self._next_request = {}
+        self.pages_fetched = 0
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=self.timeout,
+            follow_redirects=True,
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def _polite(self, host):
+        """Wait our turn for this host - at most one request per delay seconds"""
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            robots = self.robots.get(host)
+            delay = max(self.delay, (robots.crawl_delay(USER_AGENT) or 0) if robots else 0)
+            wait = self._next_request.get(host, 0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_request[host] = time.monotonic() + delay
+
+    async def _robots_for(self, url):
+        """Cached robots.txt for the URL's host (None if there isn't one)"""
+        parts = urlparse(url)
+        host = parts.netloc.lower()
+        if host in self.robots:
+            return self.robots[host]
+
+        async with self._robots_locks.setdefault(host, asyncio.Lock()):
+            if host not in self.robots:
+                robots = None
+                try:
+                    await self._polite(host)
+                    response = await self.client.get(f"{parts.scheme}://{host}/robots.txt")
+                    if response.status_code == 200:
+                        robots = RobotFileParser()
+                        robots.parse(response.text.splitlines())
+                except httpx.HTTPError:
+                    pass
+                self.robots[host] = robots
+        return self.robots[host]
+
+    async def allowed(self, url):
+        robots = await self._robots_for(url)
+        return robots is None or robots.can_fetch(USER_AGENT, url)
+
+    async def fetch(self, url):
+        """Stream one HTML page through a PageParser; (final url, parser) or None"""
+        if not await self.allowed(url):
+            return None
+        await self._polite(urlparse(url).netloc.lower())
+        self.pages_fetched += 1
+
+        parser = PageParser()
+        try:
+            async with self.client.stream("GET", url) as response:
+                if response.status_code != 200 or "html" not in response.headers.get("content-type", "html"):
+                    return None
+                size = 0
+                async for chunk in response.aiter_text():
+                    parser.feed(chunk)
+                    size += len(chunk)
+                    if size >= MAX_PAGE_BYTES:
+                        break
+                final_url = str(response.url)
+        except httpx.HTTPError:
+            return None
+        parser.close()
+        return final_url, parser
+
+    async def crawl_school(self, website):
+        """Homepage, then topic links breadth-first within the page budget"""
+        start = website_url(website)
+        if not start:
+            return {}
+
+        pages = {}        # topic -> url
+        texts = {}        # topic -> page text
+        seen = {start}
+        queue = [(start, 0, "home")]
+        site = None
+        fetched = 0
+
+        while queue and fetched < self.max_pages:
+            url, depth, topic = queue.pop(0)
+            # Pages robots.txt keeps us out of don't use up the budget
+            if not await self.allowed(url):
+                if topic == "home":
+                    return {}
+                continue
+            page = await self.fetch(url)
+            fetched += 1
+            if page is None:
+                if topic == "home":
+                    return {}
+                continue
+
+            final_url, parser = page
+            site = site or _site(urlparse(final_url).netloc)
+            text = "".join(parser.text)
+            texts[topic] = texts.get(topic, "") + " " + text
+
+            if depth >= self.max_depth:
+                continue
+            for href, label in parser.links:
+                if SKIP_LINK_RE.search(href):
+                    continue
+                link = urljoin(final_url, href.strip()).split("#")[0]
+                if link in seen or _site(urlparse(link).netloc) != site:
+                    continue
+                link_topic = topic_of(link, label)
+                if link_topic is None:
+                    continue
+                seen.add(link)
+                pages.setdefault(link_topic, link)
+                queue.append((link, depth + 1, link_topic))
+
+        emails = []
+        for text in texts.values():
+            emails.extend(e for e in find_emails(text) if e not in emails)
+        staff_text = texts.get("staff", "") + "\n" + texts.get("contact", "")
+
+        return {
+            "email": best_email(emails, website),
+            "all_emails": ", ".join(emails),
+            "staff_contacts": " | ".join(find_staff(staff_text) or find_emails(staff_text)),
+            "governors": ", ".join(find_people(texts.get("governors", ""))),
+            "has_pupil_premium": "pupil_premium" in pages,
+            "has_send": "send" in pages,
+            "has_financial_reports": "financial" in pages,
+        }
+
+    async def crawl_schools(self, websites, concurrency=CONCURRENT_SCHOOLS):
+        """Results in the same order as websites"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(website):
+            async with semaphore:
+                try:
+                    return await self.crawl_school(website)
+                except Exception as e:
+                    print(f"  {website}: {e}")
+                    return {}
+
+        return await asyncio.gather(*[one(w) for w in websites])
+
+
+async def _crawl(websites, **kwargs):
+    concurrency = kwargs.pop("concurrency", CONCURRENT_SCHOOLS)
+    async with SchoolCrawler(**kwargs) as crawler:
+        return await crawler.crawl_schools(websites, concurrency)
+
+
+def crawl_schools(websites, **kwargs):
+    """Blocking wrapper - one result dict per website, in order ({} when unreachable)"""
+    return asyncio.run(_crawl(list(websites), **kwargs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl the websites in a school CSV")
+    parser.add_argument("input", help="CSV with a website column")
+    parser.add_argument("--output", default="-", help="NDJSON, default stdout")
+    parser.add_argument("--delay", type=float, default=POLITENESS_DELAY)
+    args = parser.parse_args()
+
+    with open(args.input, newline="", encoding="utf-8") as f:
+        schools = list(csv.DictReader(f))
+
+    start = time.perf_counter()
+    results = crawl_schools([s.get("website") for s in schools], delay=args.delay)
+    elapsed = time.perf_counter() - start
+
+    lines = [json.dumps({"urn": s.get("urn"), "name": s.get("name"), **r}) for s, r in zip(schools, results)]
+    if args.output == "-":
+        print("\n".join(lines))
+    else:
+        with open(args.output, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+    print(f"✓ {len(schools):,} schools in {elapsed:.1f}s ({len(schools) / elapsed * 3600:,.0f}/hour)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
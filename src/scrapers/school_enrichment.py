@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+KOSMOS School Enrichment Pipeline
+Adds emails, staff contacts, governors, pupil premium / SEND / financial
+report flags and the Ofsted rating to a region's school list
+
+    python src/scrapers/school_enrichment.py data/leicester_schools.csv
+        -> data/leicester_schools_enriched.csv
+
+1. the input is split into SHARDS by URN
+2. shards run on a process pool (one per core); each crawls its schools'
+   websites in batches (school_crawler.py), then runs the per-school
+   enrichers on a thread pool, with concurrent requests per domain capped
+   across the whole run (DOMAIN_CONCURRENCY and DOMAIN_RATE, both divided
+   between processes)
+3. every shard checkpoints its progress - rerun with --resume after a crash
+   and only the unfinished schools are fetched again
+4. shards are merged back in input order, so the output doesn't depend on
+   which worker finished first
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import http_cache
+import school_crawler
+from checkpoint import Checkpoint
+from rate_limit import Limiter
+from storage import DATA_ROOT
+
+CHECKPOINT_DIR = os.path.join(DATA_ROOT, "checkpoints", "enrichment")
+
+ENRICHED_COLUMNS = [
+    "email", "all_emails", "staff_contacts", "has_pupil_premium",
+    "has_financial_reports", "ofsted_rating", "has_send", "governors",
+]
+
+SHARDS = 32
+THREADS = 8
+BATCH_SIZE = 50
+TIMEOUT = 20
+
+OFSTED_URL = "https://reports.ofsted.gov.uk/provider/21/{urn}"
+
+# Simultaneous requests per domain, for the whole run
+DOMAIN_CONCURRENCY = {"reports.ofsted.gov.uk": 4}
+DEFAULT_CONCURRENCY = 2
+# ...and requests per period per domain, for the whole run
+DOMAIN_RATE = {"reports.ofsted.gov.uk": (5, 1)}
+DEFAULT_RATE = (2, 1)
+
+TAG_RE = re.compile(r"<script.*?</script>|<style.*?</style>|<[^>]+>", re.I | re.S)
+OFSTED_RE = re.compile(r"\b(Outstanding|Good|Requires improvement|Inadequate|Serious weaknesses|Special measures)\b")
+
+
+# --- Per-domain limits ------------------------------------------------------
+
+class DomainLimits:
+    """
+    A semaphore (concurrency) + Limiter (rate) per domain, created on first
+    use. Each process gets its share of both, so N processes together stay
+    within the domain's limits
+    """
+
+    def __init__(self, processes=1):
+        self.processes = processes
+        self._lock = threading.Lock()
+        self._domains = {}
+
+    def get(self, domain):
+        with self._lock:
+            if domain not in self._domains:
+                concurrency = DOMAIN_CONCURRENCY.get(domain, DEFAULT_CONCURRENCY)
+                capacity, period = DOMAIN_RATE.get(domain, DEFAULT_RATE)
+                # A smaller burst and a longer period, at 1/processes of the rate
+                share = max(1, capacity // self.processes)
+                self._domains[domain] = (
+                    threading.Semaphore(max(1, concurrency // self.processes)),
+                    Limiter(share, period * self.processes * share / capacity),
+                )
+            return self._domains[domain]
+
+
+def fetch(url, limits):
+    """Page text (or None), within the domain's limits and through the HTTP cache"""
+    semaphore, limiter = limits.get(urlparse(url).netloc.lower())
+    with semaphore:
+        try:
+            response = http_cache.get(url, timeout=TIMEOUT, limiter=limiter,
+                                      headers={"User-Agent": school_crawler.USER_AGENT})
+        except Exception as e:
+            print(f"  {url}: {e}")
+            return None
+    if response.status_code != 200 or "html" not in response.headers.get("Content-Type", "html"):
+        return None
+    return response.text
+
+
+# --- Enrichers --------------------------------------------------------------
+
+def _text(html):
+    return re.sub(r"\s+", " ", TAG_RE.sub(" ", html))
+
+
+def ofsted_enricher(school, limits):
+    """Latest overall judgement from the Ofsted reports site"""
+    urn = school.get("urn")
+    if not urn:
+        return {}
+    html = fetch(OFSTED_URL.format(urn=urn), limits)
+    match = OFSTED_RE.search(_text(html)) if html else None
+    return {"ofsted_rating": match.group(1)} if match else {}
+
+
+# Per-school enrichers, run after the website crawl; they only fill in
+# columns the crawl (or an earlier enricher) left empty
+ENRICHERS = [ofsted_enricher]
+
+
+def enrich_school(school, limits, enrichers=None, crawled=None):
+    result = dict(crawled or {})
+    for enricher in enrichers or ENRICHERS:
+        try:
+            found = enricher(school, limits)
+        except Exception as e:
+            print(f"  {school.get('name')}: {enricher.__name__} failed: {e}")
+            continue
+        for column, value in found.items():
+            if column not in result or result[column] in ("", None):
+                result[column] = value
+    return result
+
+
+# --- Shards -----------------------------------------------------------------
+
+def shard_of(school, shards):
+    """Stable shard for a school - by URN, or by name if there isn't one"""
+    key = (school.get("urn") or "").split(".")[0] or school.get("name", "")
+    if key.isdigit():
+        return int(key) % shards
+    return int(hashlib.md5(key.encode()).hexdigest(), 16) % shards
+
+
+def read_schools(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def shard_checkpoint(region, shard):
+    return Checkpoint(os.path.join(CHECKPOINT_DIR, region, f"shard_{shard:03d}"))
+
+
+def run_shard(region, shard, rows, processes, threads, enrichers=None):
+    """
+    Enrich one shard's (input index, school) rows under its checkpoint
+    Records are {"index": i, **enriched columns}; returns the count done
+    """
+    checkpoint = shard_checkpoint(region, shard)
+    if checkpoint.complete:
+        return checkpoint.get("records", 0)
+
+    done = {r["index"] for r in checkpoint.records()}
+    todo = [(i, school) for i, school in rows if i not in done]
+    limits = DomainLimits(processes)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for start in range(0, len(todo), BATCH_SIZE):
+            batch = todo[start:start + BATCH_SIZE]
+            # The whole batch's websites share one crawler (connection pool, robots cache)
+            crawled = school_crawler.crawl_schools([school.get("website") for _, school in batch])
+            results = pool.map(
+                lambda item: enrich_school(item[0][1], limits, enrichers, item[1]), zip(batch, crawled)
+            )
+            checkpoint.flush([{"index": i, **result} for (i, _), result in zip(batch, results)])
+
+    checkpoint.finish()
+    return checkpoint.get("records", 0)
+
+
+def _merged(found, school, column):
+    """Newly found value, else whatever the input already had"""
+    value = found.get(column)
+    if value in ("", None):
+        return school.get(column) or ""
+    return str(value) if isinstance(value, bool) else value
+
+
+def merge_shards(region, fieldnames, schools, shards, output_file):
+    """Input rows + their enrichment, in input order, written atomically"""
+    enriched = {}
+    for shard in range(shards):
+        for record in shard_checkpoint(region, shard).records():
+            enriched[record.pop("index")] = record
+
+    columns = fieldnames + [c for c in ENRICHED_COLUMNS if c not in fieldnames]
+    tmp_path = output_file + ".tmp"
+    with open(tmp_path, 'w', newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for i, school in enumerate(schools):
+            found = enriched.get(i, {})
+            writer.writerow({**school, **{c: _merged(found, school, c) for c in ENRICHED_COLUMNS}})
+    os.replace(tmp_path, output_file)
+
+
+def output_path(input_file):
+    """data/leicester_schools.csv -> data/leicester_schools_enriched.csv"""
+    root, ext = os.path.splitext(input_file)
+    return f"{root}_enriched{ext or '.csv'}"
+
+
+def region_of(input_file):
+    return os.path.basename(input_file).split("_schools")[0].split(".")[0]
+
+
+def enrich_file(input_file, output_file=None, processes=None, threads=THREADS, shards=SHARDS,
+                resume=False, enrichers=None):
+    """Enrich a region CSV; returns the output path"""
+    output_file = output_file or output_path(input_file)
+    region = region_of(input_file)
+    processes = processes or os.cpu_count() or 1
+    fieldnames, schools = read_schools(input_file)
+
+    if not resume:
+        for shard in range(shards):
+            shard_checkpoint(region, shard).reset()
+
+    rows = [[] for _ in range(shards)]
+    for i, school in enumerate(schools):
+        rows[shard_of(school, shards)].append((i, school))
+
+    print(f"Enriching {len(schools):,} schools from {input_file}: "
+          f"{shards} shards, {processes} processes x {threads} threads")
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(run_shard, region, shard, rows[shard], processes, threads, enrichers)
+            for shard in range(shards) if rows[shard]
+        ]
+        done = 0
+        for future in futures:
+            done += future.result()
+            print(f"  {done:,}/{len(schools):,} schools")
+
+    merge_shards(region, fieldnames, schools, shards, output_file)
+    print(f"✓ Saved {output_file}")
+    return output_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enrich a region's school CSV")
+    parser.add_argument("input", help="e.g. data/leicester_schools.csv")
+    parser.add_argument("--output", help="default: <input>_enriched.csv")
+    parser.add_argument("--processes", type=int, default=None, help="default: one per core")
+    parser.add_argument("--threads", type=int, default=THREADS, help="per process")
+    parser.add_argument("--shards", type=int, default=SHARDS)
+    parser.add_argument("--resume", action="store_true", help="carry on from the last run's checkpoints")
+    args = parser.parse_args()
+
+    enrich_file(args.input, args.output, args.processes, args.threads, args.shards, args.resume)
+
+
+if __name__ == "__main__":
+    main()
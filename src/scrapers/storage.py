@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+KOSMOS Storage
+Where the scrapers write, and in what format
+
+Every output lives under DATA_ROOT/<category>/ - the repo's data/ directory
+unless KOSMOS_DATA_ROOT says otherwise, so output can go on fast local disk
+or a compressed volume. Collections are written through a Store:
+
+    store = open_store("education")               # KOSMOS_STORAGE / KOSMOS_COMPRESSION
+    store.write("uk_schools", schools)            # -> data/education/uk_schools.json
+    open_store("education", "ndjson", "zstd").write("uk_schools", schools)
+                                                  # -> data/education/uk_schools.ndjson.zst
+
+Backends:
+    json      one JSON array per collection, indent=2 (the default - as before)
+    ndjson    one record per line, streamed
+    parquet   a dataset directory of zstd Parquet files, ROWS_PER_FILE rows each
+    sqlite    one <category>.db per category, a table of JSON records per collection
+
+Compression (json / ndjson: gzip or zstd; parquet: the column codec, zstd by
+default) is picked from the file suffix when reading. Every write goes to a
+temporary name and is renamed into place when complete (SQLite: one
+transaction), so a crash never leaves a half-written file behind.
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+from contextlib import contextmanager
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATA_ROOT = os.environ.get("KOSMOS_DATA_ROOT") or os.path.join(REPO_DIR, "data")
+
+# Defaults for open_store()
+BACKEND = os.environ.get("KOSMOS_STORAGE", "json")
+COMPRESSION = os.environ.get("KOSMOS_COMPRESSION") or None
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+GZIP_LEVEL = 6
+
+ROWS_PER_FILE = 100000
+BATCH_SIZE = 5000
+
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def category_dir(category, root=None):
+    """DATA_ROOT/<category> (not created)"""
+    return os.path.join(root or DATA_ROOT, category)
+
+
+# --- Files ------------------------------------------------------------------
+
+def compression_of(path):
+    """"gzip" / "zstd" / None, from the file suffix"""
+    for compression, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def strip_compression(path):
+    """data/x.ndjson.zst -> data/x.ndjson"""
+    compression = compression_of(path)
+    return path[:-len(SUFFIXES[compression])] if compression else path
+
+
+def open_file(path, mode="r", encoding="utf-8", newline=None):
+    """open(), decompressing / compressing by suffix (.gz, .zst)"""
+    compression = compression_of(path)
+    binary = "b" in mode
+    if binary:
+        encoding = None
+    if compression is None:
+        return open(path, mode, encoding=encoding, newline=newline)
+    if compression == "gzip":
+        mode = mode.replace("t", "").replace("b", "") + ("b" if binary else "t")
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL, encoding=encoding, newline=newline)
+
+    import pyarrow as pa
+    if mode.startswith("r"):
+        stream = pa.CompressedInputStream(pa.OSFile(path, "rb"), "zstd")
+    elif mode.startswith("w"):
+        stream = pa.CompressedOutputStream(pa.OSFile(path, "wb"), "zstd")
+    else:
+        raise ValueError(f"Can't open {path} with mode {mode!r}")
+    return stream if binary else io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+
+@contextmanager
+def atomic_open(path, mode="w", encoding="utf-8", newline=None):
+    """
+    Write to <path>.tmp, renamed over path only if the block finishes.
+    Compressed by suffix, like open_file
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = tmp_path(path)
+    f = open_file(tmp, mode, encoding, newline)
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        os.remove(tmp)
+        raise
+    f.close()
+    os.replace(tmp, path)
+
+
+def tmp_path(path):
+    """Where atomic_open writes path until it's complete - the compression suffix stays last"""
+    compression = compression_of(path)
+    if compression is None:
+        return path + ".tmp"
+    return strip_compression(path) + ".tmp" + SUFFIXES[compression]
+
+
+def read_path(path):
+    """Records from any file or dataset a Store writes (.json, .ndjson, .parquet, compressed or not)"""
+    plain = strip_compression(path)
+    if plain.endswith(".parquet"):
+        yield from _read_parquet(path)
+    elif plain.endswith((".ndjson", ".jsonl")):
+        with open_file(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open_file(path) as f:
+            yield from json.load(f)
+
+
+def find(path):
+    """
+    The file a Store actually wrote for path (data/x/name.json): the path
+    itself, a compressed copy, or the same collection in another backend
+    """
+    root, _ = os.path.splitext(strip_compression(path))
+    candidates = [path] + [
+        root + ext + suffix
+        for ext in (".json", ".ndjson", ".parquet")
+        for suffix in ("", *SUFFIXES.values())
+    ]
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- Parquet ----------------------------------------------------------------
+
+def _has_empty_struct(arrow_type):
+    import pyarrow as pa
+    if pa.types.is_struct(arrow_type):
+        return arrow_type.num_fields == 0 or any(_has_empty_struct(f.type) for f in arrow_type)
+    if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return _has_empty_struct(arrow_type.value_type)
+    return False
+
+
+def _arrow_table(records):
+    """
+    One Arrow column per top-level field (nested dicts become structs). A
+    column Arrow can't type - mixed types, empty dicts - is stored as JSON
+    text and listed in the "kosmos_json_columns" metadata
+    """
+    import pyarrow as pa
+
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    arrays, json_columns = [], []
+    for column in columns:
+        values = [record.get(column) for record in records]
+        try:
+            array = pa.array(values)
+            if _has_empty_struct(array.type):
+                raise ValueError(column)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError, OverflowError):
+            array = pa.array([None if v is None else json.dumps(v) for v in values], pa.string())
+            json_columns.append(column)
+        arrays.append(array)
+
+    table = pa.Table.from_arrays(arrays, names=columns)
+    return table.replace_schema_metadata({"kosmos_json_columns": json.dumps(json_columns)})
+
+
+def _read_parquet(path):
+    import pyarrow.parquet as pq
+
+    parts = sorted(
+        os.path.join(path, name) for name in os.listdir(path) if name.endswith(".parquet")
+    ) if os.path.isdir(path) else [path]
+    for part in parts:
+        table = pq.read_table(part)
+        metadata = table.schema.metadata or {}
+        json_columns = json.loads(metadata.get(b"kosmos_json_columns", b"[]"))
+        for record in table.to_pylist():
+            for column in json_columns:
+                if record.get(column) is not None:
+                    record[column] = json.loads(record[column])
+            yield record
+
+
+# --- Stores -----------------------------------------------------------------
+
+class Store:
+    """A collection per name under one directory - write(name, records) / read(name)"""
+    extension = ""
+
+    def __init__(self, directory, compression=None):
+        if compression not in (None, "none", *SUFFIXES):
+            raise ValueError(f"Unknown compression {compression!r} - use gzip or zstd")
+        self.directory = directory
+        self.compression = None if compression == "none" else compression
+
+    def path(self, name):
+        suffix = SUFFIXES.get(self.compression, "")
+        return os.path.join(self.directory, f"{name}{self.extension}{suffix}")
+
+    def write(self, name, records):
+        """Write records (any iterable of dicts); returns the path"""
+        raise NotImplementedError
+
+    def read(self, name):
+        return read_path(self.path(name))
+
+
+class JSONStore(Store):
+    """A JSON array per collection - what the scrapers have always written"""
+    extension = ".json"
+
+    def __init__(self, directory, compression=None, indent=2):
+        super().__init__(directory, compression)
+        self.indent = indent
+
+    def write(self, name, records):
+        path = self.path(name)
+        with atomic_open(path) as f:
+            json.dump(records if isinstance(records, list) else list(records), f, indent=self.indent)
+        return path
+
+
+class NDJSONStore(Store):
+    """One record per line, written as they come - never holds the collection"""
+    extension = ".ndjson"
+
+    def write(self, name, records):
+        path = self.path(name)
+        with atomic_open(path) as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        return path
+
+
+class ParquetStore(Store):
+    """
+    A dataset directory, <name>.parquet/part-NNNNN.parquet. compression is
+    the Parquet codec (zstd unless given) rather than a file suffix. Rows
+    read back with every column of their file - a missing field is None
+    """
+    extension = ".parquet"
+
+    def __init__(self, directory, compression=None, rows_per_file=ROWS_PER_FILE):
+        super().__init__(directory, compression)
+        self.codec = compression or "zstd"
+        self.compression = None
+        self.rows_per_file = rows_per_file
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}{self.extension}")
+
+    def write(self, name, records):
+        import pyarrow.parquet as pq
+
+        path = self.path(name)
+        tmp_dir = path + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            for i, batch in enumerate(_batches(records, self.rows_per_file)):
+                pq.write_table(_arrow_table(batch), os.path.join(tmp_dir, f"part-{i:05d}.parquet"),
+                               compression=self.codec)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # A directory can't be renamed over another - move the old one aside first
+        old_path = path + ".old"
+        if os.path.exists(path):
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.replace(path, old_path)
+        os.replace(tmp_dir, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return path
+
+
+class SQLiteStore(Store):
+    """
+    <category>.db in the directory, one table of JSON records per collection.
+    A write replaces the table in a single transaction; SQLite pages aren't
+    compressed, so compression is ignored
+    """
+    extension = ".db"
+
+    def path(self, name=None):
+        return os.path.join(self.directory, os.path.basename(self.directory) + self.extension)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path(), isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def write(self, name, records):
+        if not IDENTIFIER_RE.match(name):
+            raise ValueError(f"Not a table name: {name!r}")
+        os.makedirs(self.directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            conn.execute(f'CREATE TABLE "{name}" (id INTEGER PRIMARY KEY, record TEXT NOT NULL)')
+            for batch in _batches(records, BATCH_SIZE):
+                conn.executemany(f'INSERT INTO "{name}" (record) VALUES (?)',
+                                 [(json.dumps(record),) for record in batch])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.path()
+
+    def read(self, name):
+        if not IDENTIFIER_RE.match(name):
+            raise ValueError(f"Not a table name: {name!r}")
+        conn = self._connect()
+        try:
+            for (record,) in conn.execute(f'SELECT record FROM "{name}" ORDER BY id'):
+                yield json.loads(record)
+        finally:
+            conn.close()
+
+
+STORES = {
+    "json": JSONStore,
+    "ndjson": NDJSONStore,
+    "parquet": ParquetStore,
+    "sqlite": SQLiteStore,
+}
+
+
+def open_store(category, backend=None, compression=None, root=None):
+    """The Store for DATA_ROOT/<category> (backend / compression default to KOSMOS_STORAGE / KOSMOS_COMPRESSION)"""
+    backend = backend or BACKEND
+    if backend not in STORES:
+        raise ValueError(f"Unknown storage backend {backend!r} - use one of {', '.join(STORES)}")
+    return STORES[backend](category_dir(category, root), compression or COMPRESSION)
@@ -6,14 +6,33 @@ https://get-information-schools.service.gov.uk/
 """
 
 import requests
+import io
 import json
 import time
 import os
+import sys
 from datetime import datetime
 
+import http_cache
+from provenance import RecordHasher
+from storage import category_dir, open_store
+
 BASE_URL = "https://get-information-schools.service.gov.uk"
-DATA_DIR = "/home/ubuntu/.openclaw/workspace/kosmos/data/education"
-OUTPUT_FILE = os.path.join(DATA_DIR, "uk_schools.json")
+DATA_DIR = category_dir("education")
+OUTPUT_NDJSON = os.path.join(DATA_DIR, "uk_schools.ndjson")
+OUTPUT_PARQUET = os.path.join(DATA_DIR, "uk_schools.parquet")
+
+# Delta refresh: urn -> row hash from the last run, changed rows, change log
+STATE_FILE = os.path.join(DATA_DIR, "uk_schools.state.json")
+DELTA_FILE = os.path.join(DATA_DIR, "uk_schools_delta.ndjson")
+CHANGE_LOG = os.path.join(DATA_DIR, "uk_schools_changes.jsonl")
+
+# Streaming: bytes per network read, rows per Parquet row group
+CHUNK_SIZE = 1024 * 1024
+ROW_GROUP_SIZE = 10000
+
+# DfE publishes Establishments.csv as Windows-1252
+CSV_ENCODING = "cp1252"
 
 # Note: No API key required for downloads
 # For API access: https://find-and-use-an-api.education.gov.uk/
@@ -63,66 +82,198 @@ def download_groups_csv():
         return None
 
 
+def open_schools_csv_stream(chunk_size=CHUNK_SIZE):
+    """
+    Open the DfE establishments CSV as a streamed text file
+    The body is read from the socket in chunk_size pieces - never held whole
+    """
+    csv_url = f"{BASE_URL}/Downloads/Establishments.csv"
+    
+    print(f"Streaming from: {csv_url}")
+    
+    response = requests.get(csv_url, timeout=300, stream=True)
+    
+    if response.status_code != 200:
+        response.close()
+        print(f"Error downloading: {response.status_code}")
+        return None
+    
+    # Only trust the server's charset if it actually sent one
+    content_type = response.headers.get("Content-Type", "")
+    encoding = response.encoding if "charset" in content_type else CSV_ENCODING
+    
+    response.raw.decode_content = True
+    raw = io.BufferedReader(response.raw, buffer_size=chunk_size)
+    return io.TextIOWrapper(raw, encoding=encoding, newline="")
+
+
+def _school_record(row, collected_at):
+    """Full school record layout for one establishments CSV row"""
+    return {
+        "urn": row.get("URN", ""),
+        "uid": row.get("UID", ""),
+        "name": row.get("EstablishmentName", ""),
+        "type": row.get("TypeOfEstablishment", ""),
+        "type_group": row.get("EstablishmentTypeGroup", ""),
+        "phase": row.get("PhaseOfEducation", ""),
+        "gender": row.get("Gender", ""),
+        "religious_character": row.get("ReligiousCharacter", ""),
+        "diocese": row.get("Diocese", ""),
+        "admissions_policy": row.get("AdmissionsPolicy", ""),
+        "school_capacity": row.get("SchoolCapacity", ""),
+        "statutory_low_age": row.get("StatutoryLowAge", ""),
+        "statutory_high_age": row.get("StatutoryHighAge", ""),
+        "nursery_provision": row.get("NurseryProvision", ""),
+        "ofsted_rating": row.get("OverallEffectiveness", ""),
+        "last_ofsted": row.get("LastInspection", ""),
+        "address": {
+            "street": row.get("Street", ""),
+            "locality": row.get("Locality", ""),
+            "address3": row.get("Address3", ""),
+            "town": row.get("Town", ""),
+            "county": row.get("County", ""),
+            "postcode": row.get("Postcode", "")
+        },
+        "contact": {
+            "telephone": row.get("TelephoneNum", ""),
+            "fax": row.get("FaxNum", ""),
+            "website": row.get("Website", ""),
+            "email": row.get("Email", "")
+        },
+        "head": {
+            "name": row.get("HeadTitle", "") + " " + row.get("HeadFirstName", "") + " " + row.get("HeadLastName", ""),
+            "role": row.get("HeadPreferredJobTitle", "")
+        },
+        "local_authority": {
+            "code": row.get("LA", ""),
+            "name": row.get("LAName", "")
+        },
+        "region": row.get("Region", ""),
+        "open_date": row.get("OpenDate", ""),
+        "close_date": row.get("CloseDate", ""),
+        "source_url": f"{BASE_URL}/Establishments/Establishment/Details/{row.get('URN', '')}",
+        "collected_at": collected_at
+    }
+
+
+def parse_school_row(row, collected_at):
+    """Convert one establishments CSV row to a school record"""
+    school = _school_record(row, collected_at)
+    
+    # Clean up empty values
+    return {k: v for k, v in school.items() if v and v != "None"}
+
+
+def iter_schools(csv_file, collected_at=None):
+    """Parse an establishments CSV file object lazily, one school at a time"""
+    import csv
+    
+    # One timestamp per run, not per row
+    collected_at = collected_at or datetime.now().isoformat()
+    
+    for row in csv.DictReader(csv_file):
+        yield parse_school_row(row, collected_at)
+
+
 def parse_schools_csv(csv_text):
     """Parse CSV and convert to structured JSON"""
-    import csv
     from io import StringIO
     
-    schools = []
-    reader = csv.DictReader(StringIO(csv_text))
-    
-    for row in reader:
-        school = {
-            "urn": row.get("URN", ""),
-            "uid": row.get("UID", ""),
-            "name": row.get("EstablishmentName", ""),
-            "type": row.get("TypeOfEstablishment", ""),
-            "type_group": row.get("EstablishmentTypeGroup", ""),
-            "phase": row.get("PhaseOfEducation", ""),
-            "gender": row.get("Gender", ""),
-            "religious_character": row.get("ReligiousCharacter", ""),
-            "diocese": row.get("Diocese", ""),
-            "admissions_policy": row.get("AdmissionsPolicy", ""),
-            "school_capacity": row.get("SchoolCapacity", ""),
-            "statutory_low_age": row.get("StatutoryLowAge", ""),
-            "statutory_high_age": row.get("StatutoryHighAge", ""),
-            "nursery_provision": row.get("NurseryProvision", ""),
-            "ofsted_rating": row.get("OverallEffectiveness", ""),
-            "last_ofsted": row.get("LastInspection", ""),
-            "address": {
-                "street": row.get("Street", ""),
-                "locality": row.get("Locality", ""),
-                "address3": row.get("Address3", ""),
-                "town": row.get("Town", ""),
-                "county": row.get("County", ""),
-                "postcode": row.get("Postcode", "")
-            },
-            "contact": {
-                "telephone": row.get("TelephoneNum", ""),
-                "fax": row.get("FaxNum", ""),
-                "website": row.get("Website", ""),
-                "email": row.get("Email", "")
-            },
-            "head": {
-                "name": row.get("HeadTitle", "") + " " + row.get("HeadFirstName", "") + " " + row.get("HeadLastName", ""),
-                "role": row.get("HeadPreferredJobTitle", "")
-            },
-            "local_authority": {
-                "code": row.get("LA", ""),
-                "name": row.get("LAName", "")
-            },
-            "region": row.get("Region", ""),
-            "open_date": row.get("OpenDate", ""),
-            "close_date": row.get("CloseDate", ""),
-            "source_url": f"{BASE_URL}/Establishments/Establishment/Details/{row.get('URN', '')}",
-            "collected_at": datetime.now().isoformat()
-        }
+    return list(iter_schools(StringIO(csv_text)))
+
+
+def school_parquet_schema():
+    """Arrow schema for school records - derived from the record layout itself"""
+    import pyarrow as pa
+    
+    fields = []
+    for key, value in _school_record({}, "").items():
+        if isinstance(value, dict):
+            fields.append(pa.field(key, pa.struct([(k, pa.string()) for k in value])))
+        else:
+            fields.append(pa.field(key, pa.string()))
+    return pa.schema(fields)
+
+
+class SchoolSummary:
+    """Running counts by type group / phase / region - no need to keep the records"""
+    
+    def __init__(self):
+        self.total = 0
+        self.types = {}
+        self.phases = {}
+        self.regions = {}
+    
+    def add(self, school):
+        self.total += 1
+        t = school.get("type_group", "Unknown")
+        self.types[t] = self.types.get(t, 0) + 1
+        p = school.get("phase", "Unknown")
+        self.phases[p] = self.phases.get(p, 0) + 1
+        r = school.get("region", "Unknown")
+        self.regions[r] = self.regions.get(r, 0) + 1
+    
+    def print(self):
+        print("\n" + "=" * 50)
+        print("SUMMARY")
+        print("=" * 50)
+        print(f"Total schools: {self.total}")
+        
+        print("\nBy establishment type group:")
+        for t, count in sorted(self.types.items(), key=lambda x: -x[1]):
+            print(f"  {t}: {count}")
+        
+        print("\nBy phase of education:")
+        for p, count in sorted(self.phases.items(), key=lambda x: -x[1]):
+            print(f"  {p}: {count}")
         
-        # Clean up empty values
-        school = {k: v for k, v in school.items() if v and v != "None"}
-        schools.append(school)
+        print("\nBy region:")
+        for r, count in sorted(self.regions.items(), key=lambda x: -x[1])[:10]:
+            print(f"  {r}: {count}")
+
+
+def write_schools_ndjson(schools, path, summary=None):
+    """Write school records one JSON line at a time; returns the count"""
+    tmp_path = path + ".tmp"
+    count = 0
+    
+    with open(tmp_path, 'w') as f:
+        for school in schools:
+            f.write(json.dumps(school) + "\n")
+            count += 1
+            if summary:
+                summary.add(school)
     
-    return schools
+    os.replace(tmp_path, path)
+    return count
+
+
+def write_schools_parquet(schools, path, summary=None, row_group_size=ROW_GROUP_SIZE):
+    """Write school records as Parquet, one row group per row_group_size records"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = school_parquet_schema()
+    tmp_path = path + ".tmp"
+    count = 0
+    batch = []
+    
+    with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+        for school in schools:
+            batch.append(school)
+            if summary:
+                summary.add(school)
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    
+    os.replace(tmp_path, path)
+    return count
 
 
 def search_schools_by_la(la_code):
@@ -144,7 +295,7 @@ def get_school_details(urn):
     url = f"{BASE_URL}/Establishments/Establishment/Details/{urn}"
     
     try:
-        response = requests.get(url, timeout=30)
+        response = http_cache.get(url, timeout=30)
         
         if response.status_code == 200:
             return {"url": url, "status": "available"}
@@ -171,47 +322,15 @@ def collect_all_schools():
     if csv_text:
         schools = parse_schools_csv(csv_text)
         
-        # Save JSON
-        with open(OUTPUT_FILE, 'w') as f:
-            json.dump(schools, f, indent=2)
-        
-        print(f"\n✓ Saved {len(schools)} schools to {OUTPUT_FILE}")
-        
-        # Summary
-        print("\n" + "=" * 50)
-        print("SUMMARY")
-        print("=" * 50)
-        print(f"Total schools: {len(schools)}")
-        
-        # Count by type
-        types = {}
-        for school in schools:
-            t = school.get("type_group", "Unknown")
-            types[t] = types.get(t, 0) + 1
-        
-        print("\nBy establishment type group:")
-        for t, count in sorted(types.items(), key=lambda x: -x[1]):
-            print(f"  {t}: {count}")
-        
-        # Count by phase
-        phases = {}
-        for school in schools:
-            p = school.get("phase", "Unknown")
-            phases[p] = phases.get(p, 0) + 1
+        # JSON by default - KOSMOS_STORAGE / KOSMOS_COMPRESSION pick another format
+        output_file = open_store("education").write("uk_schools", schools)
         
-        print("\nBy phase of education:")
-        for p, count in sorted(phases.items(), key=lambda x: -x[1]):
-            print(f"  {p}: {count}")
+        print(f"\n✓ Saved {len(schools)} schools to {output_file}")
         
-        # Count by region
-        regions = {}
+        summary = SchoolSummary()
         for school in schools:
-            r = school.get("region", "Unknown")
-            regions[r] = regions.get(r, 0) + 1
-        
-        print("\nBy region:")
-        for r, count in sorted(regions.items(), key=lambda x: -x[1])[:10]:
-            print(f"  {r}: {count}")
+            summary.add(school)
+        summary.print()
         
         return schools
     
@@ -220,5 +339,157 @@ def collect_all_schools():
         return []
 
 
+def collect_all_schools_streaming(output_format="ndjson"):
+    """
+    Streaming collection - flat memory however large the register gets
+    Rows go from the HTTP body straight to NDJSON lines or Parquet row groups
+    Returns the number of schools written
+    """
+    print("=" * 50)
+    print("KOSMOS - UK Schools Data Collector (streaming)")
+    print("=" * 50)
+    
+    os.makedirs(DATA_DIR, exist_ok=True)
+    
+    print("\n1. Streaming schools CSV...")
+    csv_file = open_schools_csv_stream()
+    
+    if csv_file is None:
+        print("\n✗ Failed to download schools data")
+        return 0
+    
+    summary = SchoolSummary()
+    
+    with csv_file:
+        schools = iter_schools(csv_file)
+        if output_format == "parquet":
+            output_file = OUTPUT_PARQUET
+            count = write_schools_parquet(schools, output_file, summary)
+        else:
+            output_file = OUTPUT_NDJSON
+            count = write_schools_ndjson(schools, output_file, summary)
+    
+    print(f"\n✓ Saved {count} schools to {output_file}")
+    summary.print()
+    
+    return count
+
+
+# The _school_record layout is fixed, so hash its fields in that order
+# rather than walking and sorting every record's keys
+SCHOOL_HASHER = RecordHasher.for_layout(_school_record({}, ""), "uk_schools", exclude=("collected_at",))
+
+
+def school_hash(school):
+    """Content hash of a school record, ignoring when it was collected"""
+    return SCHOOL_HASHER(school)
+
+
+def load_state(path=None):
+    """urn -> hash from the previous run ({} on first run)"""
+    path = path or STATE_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=None):
+    path = path or STATE_FILE
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def diff_schools(schools, previous, state):
+    """
+    Compare parsed schools against the previous urn -> hash state
+    Yields (change, urn, record, hash) for inserted / updated / closed schools,
+    then ("removed", urn, None, None) for URNs no longer in the register
+    state is filled with the new urn -> hash as rows go past
+    """
+    for school in schools:
+        urn = school.get("urn")
+        if not urn:
+            continue
+        
+        h = school_hash(school)
+        state[urn] = h
+        old = previous.get(urn)
+        
+        if old == h:
+            continue
+        if old is None:
+            yield "inserted", urn, school, h
+        elif school.get("close_date"):
+            yield "closed", urn, school, h
+        else:
+            yield "updated", urn, school, h
+    
+    for urn in sorted(previous.keys() - state.keys()):
+        yield "removed", urn, None, None
+
+
+def collect_schools_delta():
+    """
+    Delta refresh keyed on URN - only changed establishments are written
+    Writes DELTA_FILE (changed records), appends to CHANGE_LOG, updates STATE_FILE
+    Returns {change: count}
+    """
+    print("=" * 50)
+    print("KOSMOS - UK Schools Delta Refresh")
+    print("=" * 50)
+    
+    os.makedirs(DATA_DIR, exist_ok=True)
+    
+    previous = load_state()
+    print(f"\nPrevious snapshot: {len(previous)} schools")
+    
+    csv_file = open_schools_csv_stream()
+    if csv_file is None:
+        print("\n✗ Failed to download schools data")
+        return {}
+    
+    run_at = datetime.now().isoformat()
+    counts = {"inserted": 0, "updated": 0, "closed": 0, "removed": 0}
+    state = {}
+    changes = diff_schools(iter_schools(csv_file, run_at), previous, state)
+    
+    tmp_path = DELTA_FILE + ".tmp"
+    with csv_file, open(tmp_path, 'w') as delta, open(CHANGE_LOG, 'a') as log:
+        for change, urn, school, h in changes:
+            counts[change] += 1
+            if school is not None:
+                delta.write(json.dumps({"change": change, "record": school}) + "\n")
+            log.write(json.dumps({"at": run_at, "urn": urn, "change": change, "hash": h}) + "\n")
+    os.replace(tmp_path, DELTA_FILE)
+    save_state(state)
+    
+    print(f"\n✓ {len(state)} schools checked, {sum(counts.values())} changed")
+    for change, count in counts.items():
+        print(f"  {change}: {count}")
+    print(f"\nDelta: {DELTA_FILE}")
+    print(f"Change log: {CHANGE_LOG}")
+    
+    return counts
+
+
+def changed_urns(path=None):
+    """URNs touched by the last delta run - enrichment can skip everything else"""
+    path = path or DELTA_FILE
+    urns = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                urns.add(json.loads(line)["record"]["urn"])
+    return urns
+
+
 if __name__ == "__main__":
-    collect_all_schools()
+    if "--delta" in sys.argv:
+        collect_schools_delta()
+    elif "--stream" in sys.argv:
+        collect_all_schools_streaming("parquet" if "--parquet" in sys.argv else "ndjson")
+    else:
+        collect_all_schools()